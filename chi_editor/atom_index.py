@@ -0,0 +1,105 @@
+from math import floor, hypot
+from typing import TYPE_CHECKING
+
+from chi_editor.bases.sources import BASIC_RECTANGLE
+
+if TYPE_CHECKING:
+    from typing import Iterator
+
+    from PyQt6.QtCore import QPointF
+
+    from chi_editor.bases.alpha_atom import AlphaAtom
+
+# atoms are drawn as circles inscribed into the basic rectangle
+ATOM_RADIUS = BASIC_RECTANGLE.width() / 2
+
+
+class AtomIndex:
+    """Spatial hash of atom centers.
+
+    The plane is split into square cells, every atom is stored in the cell
+    containing its center. Looking for atoms near a point only visits the
+    few cells around it, so it does not depend on the number of items.
+    """
+    cell_size: "float"
+
+    _cells: "dict[tuple[int, int], set[AlphaAtom]]"
+    _centers: "dict[AlphaAtom, tuple[float, float]]"
+
+    def __init__(self, cell_size: "float" = 2 * ATOM_RADIUS) -> "None":
+        self.cell_size = cell_size
+        self._cells = {}
+        self._centers = {}
+
+    def __len__(self) -> "int":
+        return len(self._centers)
+
+    def __contains__(self, atom: "AlphaAtom") -> "bool":
+        return atom in self._centers
+
+    def __iter__(self) -> "Iterator[AlphaAtom]":
+        return iter(self._centers)
+
+    def _cell(self, x: "float", y: "float") -> "tuple[int, int]":
+        return floor(x / self.cell_size), floor(y / self.cell_size)
+
+    def insert(self, atom: "AlphaAtom", center: "QPointF") -> "None":
+        if atom in self._centers:
+            self.remove(atom)
+        x, y = center.x(), center.y()
+        self._centers[atom] = (x, y)
+        self._cells.setdefault(self._cell(x, y), set()).add(atom)
+
+    def move(self, atom: "AlphaAtom", center: "QPointF") -> "None":
+        old_x, old_y = self._centers[atom]
+        x, y = center.x(), center.y()
+        self._centers[atom] = (x, y)
+
+        old_cell, new_cell = self._cell(old_x, old_y), self._cell(x, y)
+        if old_cell != new_cell:
+            self._discard_from_cell(atom, old_cell)
+            self._cells.setdefault(new_cell, set()).add(atom)
+
+    def remove(self, atom: "AlphaAtom") -> "None":
+        x, y = self._centers.pop(atom)
+        self._discard_from_cell(atom, self._cell(x, y))
+
+    def discard(self, atom: "AlphaAtom") -> "None":
+        if atom in self._centers:
+            self.remove(atom)
+
+    def clear(self) -> "None":
+        self._cells.clear()
+        self._centers.clear()
+
+    def _discard_from_cell(self, atom: "AlphaAtom", cell: "tuple[int, int]") -> "None":
+        atoms = self._cells[cell]
+        atoms.discard(atom)
+        if not atoms:
+            del self._cells[cell]
+
+    def squares(self, size: "float") -> "dict[tuple[int, int], list[AlphaAtom]]":
+        """Sorts the atoms into squares of the given size by their centers."""
+        squares: "dict[tuple[int, int], list[AlphaAtom]]" = {}
+        for atom, (x, y) in self._centers.items():
+            squares.setdefault((floor(x / size), floor(y / size)), []).append(atom)
+        return squares
+
+    def nearest(
+        self, point: "QPointF", radius: "float" = ATOM_RADIUS
+    ) -> "AlphaAtom | None":
+        """Returns the closest atom with center within radius of the point."""
+        x, y = point.x(), point.y()
+        min_column, min_row = self._cell(x - radius, y - radius)
+        max_column, max_row = self._cell(x + radius, y + radius)
+
+        closest: "AlphaAtom | None" = None
+        closest_distance = radius
+        for column in range(min_column, max_column + 1):
+            for row in range(min_row, max_row + 1):
+                for atom in self._cells.get((column, row), ()):
+                    atom_x, atom_y = self._centers[atom]
+                    distance = hypot(atom_x - x, atom_y - y)
+                    if distance <= closest_distance:
+                        closest, closest_distance = atom, distance
+        return closest
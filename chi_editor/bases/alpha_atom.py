@@ -1,19 +1,45 @@
 from typing import TYPE_CHECKING
 
 from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QBrush, QColor, QFont, QPen
+from PyQt6.QtGui import QBrush, QColor, QFont, QPaintEngine, QPen
 from PyQt6.QtWidgets import QGraphicsItem
 
+from chi_editor.bases.glyph_atlas import GlyphAtlas
+from chi_editor.bases.level_of_detail import SIMPLIFIED_LOD, element_brush
 from chi_editor.bases.line import Line
 from chi_editor.bases.molecule import Molecule
 from chi_editor.bases.sources import BASIC_RECTANGLE
+from chi_editor.canvas import Canvas
 
 if TYPE_CHECKING:
     from typing import ClassVar
 
     from PyQt6.QtCore import QPointF, QRectF, QVariant
     from PyQt6.QtGui import QPainter
-    from PyQt6.QtWidgets import QGraphicsScene, QGraphicsSceneMouseEvent
+    from PyQt6.QtWidgets import QGraphicsScene, QStyleOptionGraphicsItem
+
+
+# paint engines whose output should keep labels as text, not as pictures
+VECTOR_ENGINES = frozenset({QPaintEngine.Type.SVG, QPaintEngine.Type.Pdf})
+
+Change = QGraphicsItem.GraphicsItemChange
+# changes after which the bonds of the atom have to follow it
+GEOMETRY_CHANGES = frozenset({
+    Change.ItemPositionHasChanged,
+    Change.ItemTransformHasChanged,
+})
+# changes itemChange acts on, the others go straight to Qt
+HANDLED_CHANGES = GEOMETRY_CHANGES | {
+    Change.ItemPositionChange,
+    Change.ItemSceneChange,
+    Change.ItemSceneHasChanged,
+}
+FLAGS = (
+    QGraphicsItem.GraphicsItemFlag.ItemIsMovable
+    | QGraphicsItem.GraphicsItemFlag.ItemIsSelectable
+    | QGraphicsItem.GraphicsItemFlag.ItemSendsScenePositionChanges
+    | QGraphicsItem.GraphicsItemFlag.ItemSendsGeometryChanges
+)
 
 
 class AlphaAtom(QGraphicsItem):
@@ -22,23 +48,53 @@ class AlphaAtom(QGraphicsItem):
     text_font: "ClassVar[QFont]" = QFont("Helvetica", 40)
     brush: "ClassVar[QBrush]" = QBrush(QColor("white"))
     rect: "ClassVar[QRectF]" = BASIC_RECTANGLE
+    # adjusted for border width
+    bounds: "ClassVar[QRectF]" = BASIC_RECTANGLE.adjusted(
+        -background_pen.width() / 2,
+        -background_pen.width() / 2,
+        background_pen.width() / 2,
+        background_pen.width() / 2,
+    )
+    glyphs: "ClassVar[GlyphAtlas]" = GlyphAtlas(bounds)
+    # drawn instead of the label when zoomed out
+    dot_rect: "ClassVar[QRectF]" = BASIC_RECTANGLE.adjusted(10, 10, -10, -10)
+    # ring around atoms with too many bonds
+    error_pen: "ClassVar[QPen]" = QPen(QColor("red"), 4)
+    error_rect: "ClassVar[QRectF]" = BASIC_RECTANGLE.adjusted(2, 2, -2, -2)
+    # ring around atoms found by a substructure search
+    highlight_pen: "ClassVar[QPen]" = QPen(QColor(255, 160, 0), 4)
 
     molecule: "Molecule"
     text: "str"
     lines: "list[Line]"
-
-    def __init__(self, element: "str", *args, **kwargs) -> "None":
+    # row of the atom in the document of the canvas
+    atom_id: "int | None"
+    # set by the valence check of the canvas, shared until set
+    valence_error: "bool" = False
+    # set by the substructure search of the canvas, shared until set
+    highlighted: "bool" = False
+
+    def __init__(
+        self,
+        element: "str",
+        *args,
+        molecule: "Molecule | None" = None,
+        **kwargs,
+    ) -> "None":
         super().__init__(*args, **kwargs)
 
         self.text = element
         self.lines = []
+        self.atom_id = None
         self.setZValue(1)
+        # one call, every flag set on its own goes through itemChange twice
+        self.setFlags(FLAGS)
 
-        self.setFlag(self.GraphicsItemFlag.ItemIsMovable)
-        self.setFlag(self.GraphicsItemFlag.ItemIsSelectable)
-        self.setFlag(self.GraphicsItemFlag.ItemSendsScenePositionChanges)
-
-        self.molecule = Molecule(self)
+        if molecule is None:
+            self.molecule = Molecule(self)
+        else:
+            self.molecule = molecule
+            molecule.add_atom(self)
 
     def get_adjacent_atoms(self) -> "list":
         adjacent_atoms = []
@@ -48,9 +104,8 @@ class AlphaAtom(QGraphicsItem):
             )
         return adjacent_atoms
 
-    def setPos(self, pos: "QPointF") -> "None":
-        super().setPos(pos)
-        self.molecule.update_atoms()
+    def center(self) -> "QPointF":
+        return self.pos() + self.rect.center()
 
     def remove(self) -> "None":
         list_of_lines = list(self.lines)
@@ -84,16 +139,92 @@ class AlphaAtom(QGraphicsItem):
         change: "QGraphicsItem.GraphicsItemChange",
         value: "QVariant",
     ) -> "QVariant":
-        for line in self.lines:
-            line.update_pixmap(self)
+        if change not in HANDLED_CHANGES:
+            return value
+        scene = self.scene()
+        canvas = scene if isinstance(scene, Canvas) else None
+        if change == Change.ItemPositionChange:
+            self.molecule.move_atom(value.x() - self.x(), value.y() - self.y())
+        elif change == Change.ItemPositionHasChanged:
+            if canvas is not None:
+                canvas.atom_index.move(self, self.center())
+                canvas.document.move_atom(self.atom_id, self.x(), self.y())
+        elif change == Change.ItemSceneChange:
+            if canvas is not None:
+                canvas.atom_index.discard(self)
+                canvas.document.remove_atom(self.atom_id)
+                canvas.valence.forget(self)
+                self.atom_id = None
+        elif change == Change.ItemSceneHasChanged:
+            if isinstance(value, Canvas):
+                value.atom_index.insert(self, self.center())
+                self.atom_id = value.document.add_atom(
+                    self.text, self.x(), self.y(), self
+                )
+                value.valence.mark(self)
+        if change in GEOMETRY_CHANGES and self.lines:
+            if canvas is not None:
+                canvas.geometry_updates.schedule(self)
+            else:
+                for line in self.lines:
+                    line.update_geometry()
         return super().itemChange(change, value)
 
+    def set_valence_error(self, error: "bool") -> "None":
+        if error != self.valence_error:
+            self.valence_error = error
+            self.update()
+
+    def set_highlighted(self, highlighted: "bool") -> "None":
+        if highlighted != self.highlighted:
+            self.highlighted = highlighted
+            self.update()
+
     def boundingRect(self) -> "QRectF":
-        # adjust for boarder width
-        adjust = self.background_pen.width() / 2
-        return self.rect.adjusted(-adjust, -adjust, adjust, adjust)
+        return self.bounds
 
-    def paint(self, painter: "QPainter", *args) -> "None":
+    def paint(
+        self,
+        painter: "QPainter",
+        option: "QStyleOptionGraphicsItem",
+        *args,
+    ) -> "None":
+        level_of_detail = option.levelOfDetailFromTransform(painter.worldTransform())
+        if level_of_detail < SIMPLIFIED_LOD:
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(element_brush(self.text))
+            painter.drawEllipse(self.dot_rect)
+            self.draw_marks(painter)
+            return
+
+        if painter.paintEngine().type() in VECTOR_ENGINES:
+            glyph = None
+        else:
+            glyph = self.glyphs.glyph(
+                self.text,
+                level_of_detail,
+                painter.device().devicePixelRatioF(),
+                self.draw_glyph,
+            )
+        if glyph is None:
+            self.draw_glyph(painter)
+        else:
+            pixmap, source, target = glyph
+            painter.drawPixmap(target, pixmap, source)
+        self.draw_marks(painter)
+
+    def draw_marks(self, painter: "QPainter") -> "None":
+        """Draws the rings of search hits and valence errors, errors on top."""
+        for marked, pen in (
+            (self.highlighted, self.highlight_pen),
+            (self.valence_error, self.error_pen),
+        ):
+            if marked:
+                painter.setPen(pen)
+                painter.setBrush(Qt.BrushStyle.NoBrush)
+                painter.drawEllipse(self.error_rect)
+
+    def draw_glyph(self, painter: "QPainter") -> "None":
         # save + restore to reset pen and brush
         painter.save()
         painter.setPen(self.background_pen)
@@ -103,7 +234,3 @@ class AlphaAtom(QGraphicsItem):
         painter.setFont(self.text_font)
         painter.drawText(self.rect, Qt.AlignmentFlag.AlignCenter, self.text)
         painter.restore()
-
-    def mouseMoveEvent(self, event: "QGraphicsSceneMouseEvent") -> "None":
-        super().mouseMoveEvent(event)
-        self.molecule.update_atoms()
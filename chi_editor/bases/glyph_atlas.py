@@ -0,0 +1,115 @@
+from collections import OrderedDict
+from math import ceil
+from typing import TYPE_CHECKING
+
+from PyQt6.QtCore import QRectF, Qt
+from PyQt6.QtGui import QPainter, QPixmap
+
+if TYPE_CHECKING:
+    from typing import Callable
+
+
+class GlyphPage:
+    """Glyphs of the same size packed into a row of one pixmap."""
+    cell: "int"
+    columns: "int"
+    pixmap: "QPixmap"
+    slots: "dict[str, QRectF]"
+    target: "QRectF"
+
+    def __init__(self, cell: "int", size: "int", target: "QRectF") -> "None":
+        self.cell = cell
+        self.target = target
+        self.columns = max(1, size // cell)
+        self.pixmap = QPixmap(self.columns * cell, cell)
+        self.pixmap.fill(Qt.GlobalColor.transparent)
+        self.slots = {}
+
+    def is_full(self) -> "bool":
+        return len(self.slots) == self.columns
+
+    def allocate(self, name: "str") -> "QRectF":
+        slot = QRectF(len(self.slots) * self.cell, 0, self.cell, self.cell)
+        self.slots[name] = slot
+        return slot
+
+
+class GlyphAtlas:
+    """Cache of pre-rasterized glyphs shared by all items of one kind.
+
+    Glyphs are rendered once per name, zoom level and device pixel ratio and
+    then blitted. Glyphs for one zoom level share pages of a single pixmap.
+    The least recently used zoom levels are dropped when there are too many.
+    """
+    bounds: "QRectF"
+    page_size: "int"
+    max_cell: "int"
+    max_levels: "int"
+
+    _levels: "OrderedDict[tuple[float, float], list[GlyphPage]]"
+
+    def __init__(
+        self,
+        bounds: "QRectF",
+        page_size: "int" = 1024,
+        max_cell: "int" = 256,
+        max_levels: "int" = 8,
+    ) -> "None":
+        self.bounds = bounds
+        self.page_size = page_size
+        self.max_cell = max_cell
+        self.max_levels = max_levels
+        self._levels = OrderedDict()
+
+    def glyph(
+        self,
+        name: "str",
+        zoom: "float",
+        device_pixel_ratio: "float",
+        draw: "Callable[[QPainter], None]",
+    ) -> "tuple[QPixmap, QRectF, QRectF] | None":
+        """Returns the pixmap, the source and the target rectangles of the glyph.
+
+        The draw callback is called only when the glyph is not cached yet, it
+        should paint the glyph within the bounds of the atlas. None is
+        returned when the glyph would be too big to be worth caching.
+        """
+        key = (round(zoom, 2), device_pixel_ratio)
+        scale = key[0] * device_pixel_ratio
+        cell = ceil(max(self.bounds.width(), self.bounds.height()) * scale)
+        if cell == 0 or cell > self.max_cell:
+            return None
+
+        pages = self._levels.get(key)
+        if pages is None:
+            pages = self._levels[key] = []
+            if len(self._levels) > self.max_levels:
+                self._levels.popitem(last=False)
+        else:
+            self._levels.move_to_end(key)
+
+        for page in pages:
+            slot = page.slots.get(name)
+            if slot is not None:
+                return page.pixmap, slot, page.target
+
+        if not pages or pages[-1].is_full():
+            target = QRectF(
+                self.bounds.x(), self.bounds.y(), cell / scale, cell / scale
+            )
+            pages.append(GlyphPage(cell, max(self.page_size, cell), target))
+        page = pages[-1]
+        slot = page.allocate(name)
+
+        painter = QPainter(page.pixmap)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setRenderHint(QPainter.RenderHint.TextAntialiasing)
+        painter.translate(slot.topLeft())
+        painter.scale(scale, scale)
+        painter.translate(-self.bounds.topLeft())
+        draw(painter)
+        painter.end()
+        return page.pixmap, slot, page.target
+
+    def clear(self) -> "None":
+        self._levels.clear()
@@ -0,0 +1,32 @@
+from PyQt6.QtGui import QBrush, QColor
+
+# below this level of detail atoms are drawn as colored dots
+# and multiple bonds are collapsed to a single stroke
+SIMPLIFIED_LOD = 0.5
+
+# below this level of detail every molecule is drawn as one cached thumbnail
+THUMBNAIL_LOD = 0.2
+
+ELEMENT_COLORS: "dict[str, QColor]" = {
+    "C": QColor("#303030"),
+    "N": QColor("#3050f8"),
+    "O": QColor("#ff0d0d"),
+    "S": QColor("#c8a000"),
+    "P": QColor("#ff8000"),
+    "F": QColor("#50b000"),
+    "Cl": QColor("#1fa01f"),
+    "Br": QColor("#a62929"),
+    "I": QColor("#940094"),
+}
+DEFAULT_ELEMENT_COLOR = QColor("#808080")
+
+_element_brushes: "dict[str, QBrush]" = {}
+
+
+def element_brush(element: "str") -> "QBrush":
+    brush = _element_brushes.get(element)
+    if brush is None:
+        brush = _element_brushes[element] = QBrush(
+            ELEMENT_COLORS.get(element, DEFAULT_ELEMENT_COLOR)
+        )
+    return brush
@@ -1,102 +1,186 @@
-from math import atan2, cos, degrees, fabs, radians
+from math import atan2, degrees, hypot
 from typing import TYPE_CHECKING
 
-from PyQt6.QtCore import QPointF
-from PyQt6.QtGui import QColor, QPen, QPixmap
-from PyQt6.QtWidgets import QGraphicsEllipseItem, QGraphicsItem, QGraphicsPixmapItem
+from PyQt6.QtCore import QLineF, QPointF, QRectF
+from PyQt6.QtGui import QBrush, QColor, QPainterPath, QPen, QPolygonF
+from PyQt6.QtWidgets import QGraphicsItem
+
+from chi_editor.bases.level_of_detail import SIMPLIFIED_LOD
+from chi_editor.canvas import Canvas
 
 if TYPE_CHECKING:
     from typing import ClassVar
 
-    from PyQt6.QtCore import QRectF
+    from PyQt6.QtCore import QVariant
     from PyQt6.QtGui import QPainter
+    from PyQt6.QtWidgets import QStyleOptionGraphicsItem
 
     from chi_editor.bases.alpha_atom import AlphaAtom
 
 
-class Line(QGraphicsPixmapItem):
-    """Connects two graphics items with a line."""
+class Line(QGraphicsItem):
+    """Connects two graphics items with a line.
+
+    The item only keeps its endpoints: it is placed at the center of the first
+    vertex and its bounds are computed from the vector to the second one.
+    Children classes draw in the frame of the bond, where the bond goes down
+    along the y axis from (width / 2, 0) to (width / 2, height).
+    """
     width: "ClassVar[float]" = 30.0
+    pen: "ClassVar[QPen]" = QPen(QColor("black"), 3)
+    wedge: "ClassVar[bool]" = False
+    # room for the pen and its caps around the frame of the bond
+    margin: "ClassVar[float]" = 2.0
+    # band under bonds found by a substructure search
+    highlight_brush: "ClassVar[QBrush]" = QBrush(QColor(255, 160, 0, 128))
 
     vertex1: "AlphaAtom"
-    vertex2: "QGraphicsItem"
+    vertex2: "AlphaAtom | None"
     height: "float"
     multiplicity: "int"
+    # row of the bond in the document of the canvas
+    bond_id: "int | None"
+    # set by the substructure search of the canvas
+    highlighted: "bool"
+
+    _dx: "float"
+    _dy: "float"
+    _angle: "float"
+    _bounding_rect: "QRectF"
 
     def __init__(
         self,
         start: "AlphaAtom",
-        end: "QGraphicsItem | QPointF",
+        end: "AlphaAtom | QPointF",
         *args, **kwargs,
     ) -> "None":
         super().__init__(*args, **kwargs)
         self.vertex1 = start
+        self.bond_id = None
+        self.highlighted = False
+        self.height = 0.0
+        # forces the first call of set_points to compute the bounds
+        self._dx = self._dy = float("nan")
+        self._angle = 0.0
+        self._bounding_rect = QRectF()
 
         if isinstance(end, QGraphicsItem):
             self.vertex2 = end
-            self.vertex1.molecule.update_atoms()
+            self.update_geometry()
         else:
-            self.vertex2 = QGraphicsEllipseItem(0, 0, 0, 0)
-            self.vertex2.setPos(end)
-
-        self.setShapeMode(QGraphicsPixmapItem.ShapeMode.BoundingRectShape)
-
-        self.setPos(
-            self.vertex1.sceneBoundingRect().center() - QPointF(self.width / 2, 0)
-        )
+            self.vertex2 = None
+            self.set_points(self.vertex1.sceneBoundingRect().center(), end)
 
-        self.update_pixmap(self.vertex2)
-
-    def set_v2(self, end: "QGraphicsItem") -> "None":
+    def set_v2(self, end: "AlphaAtom") -> "None":
         self.vertex2 = end
+        self.update_geometry()
+        if isinstance(self.scene(), Canvas):
+            self._register(self.scene())
+
+    def _register(self, canvas: "Canvas") -> "None":
+        """Adds the bond to the document once both of its atoms are there."""
+        if (
+            self.bond_id is None
+            and self.vertex2 is not None
+            and self.vertex1.atom_id is not None
+            and self.vertex2.atom_id is not None
+        ):
+            self.bond_id = canvas.document.add_bond(
+                self.vertex1.atom_id,
+                self.vertex2.atom_id,
+                self.multiplicity,
+                self.wedge,
+                self,
+            )
+            canvas.valence.mark(self.vertex1)
+            canvas.valence.mark(self.vertex2)
+
+    def itemChange(
+        self,
+        change: "QGraphicsItem.GraphicsItemChange",
+        value: "QVariant",
+    ) -> "QVariant":
+        if change == self.GraphicsItemChange.ItemSceneChange:
+            if self.bond_id is not None and isinstance(self.scene(), Canvas):
+                self.scene().document.remove_bond(self.bond_id)
+                self.scene().valence.mark(self.vertex1)
+                self.scene().valence.mark(self.vertex2)
+                self.bond_id = None
+        elif change == self.GraphicsItemChange.ItemSceneHasChanged:
+            if isinstance(value, Canvas):
+                self._register(value)
+        return super().itemChange(change, value)
 
     def remove(self) -> "None":
         self.vertex1.lines.remove(self)
         self.vertex2.lines.remove(self)
+        self.vertex1.molecule.remove_bond(self)
         if self.scene():
             self.scene().removeItem(self)
 
-    def update_pixmap(
-        self,
-        moved_vertex: "QGraphicsItem",
-        following_mouse: "bool" = False,
-    ) -> "None":
-        moved_point = moved_vertex.sceneBoundingRect().center()
-        self.setRotation(0)
-        self.setScale(1)
+    def start_point(self) -> "QPointF":
+        return self.pos()
 
-        if moved_vertex is self.vertex2 or following_mouse:
-            static_point = self.vertex1.sceneBoundingRect().center()
-        else:
-            static_point = self.vertex2.sceneBoundingRect().center()
-        self.setTransformOriginPoint(self.mapFromScene(static_point))
-
-        self.setPos(static_point - QPointF(self.width / 2, 0))
-
-        self.setRotation(
-            -1
-            * degrees(
-                atan2(
-                    moved_point.x() - static_point.x(),
-                    moved_point.y() - static_point.y(),
-                )
-            )
-        )
+    def end_point(self) -> "QPointF":
+        return QPointF(self.x() + self._dx, self.y() + self._dy)
 
-        if self.rotation() % 360 == 90 or self.rotation() % 360 == 270:
-            self.height = fabs(static_point.x() - moved_point.x())
+    def update_geometry(self) -> "None":
+        """Moves the line after its vertices."""
+        start = self.vertex1.sceneBoundingRect().center()
+        if self.vertex2 is not None:
+            end = self.vertex2.sceneBoundingRect().center()
         else:
-            self.height = fabs(
-                (static_point.y() - moved_point.y()) / cos(radians(self.rotation()))
+            end = self.end_point()
+        self.set_points(start, end)
+
+    def follow(self, end: "QPointF") -> "None":
+        """Stretches the line from its first vertex to the given point."""
+        self.set_points(self.vertex1.sceneBoundingRect().center(), end)
+
+    def set_points(self, start: "QPointF", end: "QPointF") -> "None":
+        dx = end.x() - start.x()
+        dy = end.y() - start.y()
+        if (dx, dy) != (self._dx, self._dy):
+            self.prepareGeometryChange()
+            self._dx, self._dy = dx, dy
+            self.height = hypot(dx, dy)
+            self._angle = -degrees(atan2(dx, dy))
+
+            normal_x, normal_y = self._half_normal()
+            adjust_x = abs(normal_x) + self.margin
+            adjust_y = abs(normal_y) + self.margin
+            self._bounding_rect.setCoords(
+                min(0.0, dx) - adjust_x,
+                min(0.0, dy) - adjust_y,
+                max(0.0, dx) + adjust_x,
+                max(0.0, dy) + adjust_y,
             )
+        self.setPos(start)
 
-        self.setPixmap(QPixmap(int(self.width), int(self.height)))
+    def _half_normal(self) -> "tuple[float, float]":
+        """Returns the vector across the bond with length of width / 2."""
+        if self.height == 0:
+            return self.width / 2, 0.0
+        scale = self.width / 2 / self.height
+        return self._dy * scale, -self._dx * scale
 
-        self.update()
-
-    def paint(self, painter: "QPainter", *args) -> "None":
+    def paint(
+        self,
+        painter: "QPainter",
+        option: "QStyleOptionGraphicsItem",
+        *args,
+    ) -> "None":
         painter.save()
-        self.paint_line(painter)
+        painter.rotate(self._angle)
+        painter.translate(-self.width / 2, 0)
+        if self.highlighted:
+            band = QRectF(0, 0, self.width, self.height)
+            painter.fillRect(band, self.highlight_brush)
+        if option.levelOfDetailFromTransform(painter.worldTransform()) < SIMPLIFIED_LOD:
+            # strokes of multiple bonds would merge anyway
+            Line.paint_line(self, painter)
+        else:
+            self.paint_line(painter)
         painter.restore()
 
     def paint_line(self, painter: "QPainter") -> "None":
@@ -104,12 +188,30 @@ class Line(QGraphicsPixmapItem):
 
         It should be overriden by children classes.
         """
-        pen = QPen(QColor("black"), 3)
-        painter.setPen(pen)
+        painter.setPen(self.pen)
 
-        painter.drawLine(
-            QPointF(self.width / 2, 0), QPointF(self.width / 2, self.height)
-        )
+        painter.drawLine(QLineF(self.width / 2, 0, self.width / 2, self.height))
+
+    def set_highlighted(self, highlighted: "bool") -> "None":
+        if highlighted != self.highlighted:
+            self.highlighted = highlighted
+            self.update()
 
     def boundingRect(self) -> "QRectF":
-        return super().boundingRect()
+        return self._bounding_rect
+
+    def shape(self) -> "QPainterPath":
+        normal_x, normal_y = self._half_normal()
+        path = QPainterPath()
+        path.addPolygon(
+            QPolygonF(
+                [
+                    QPointF(normal_x, normal_y),
+                    QPointF(self._dx + normal_x, self._dy + normal_y),
+                    QPointF(self._dx - normal_x, self._dy - normal_y),
+                    QPointF(-normal_x, -normal_y),
+                ]
+            )
+        )
+        path.closeSubpath()
+        return path
@@ -1,47 +1,290 @@
+from contextlib import contextmanager
 from typing import TYPE_CHECKING
 from weakref import WeakSet
 
+from PyQt6.QtCore import QPointF
+from rdkit import Chem
+
 from chi_editor.bases.molecule.molecule_anchor import MoleculeAnchor
 
 if TYPE_CHECKING:
+    from typing import Iterator
+
+    from rdkit.DataStructs import ExplicitBitVect
+
     from chi_editor.bases.alpha_atom import AlphaAtom
+    from chi_editor.bases.line import Line
+
+BOND_TYPES: "dict[int, Chem.BondType]" = {
+    1: Chem.BondType.SINGLE,
+    2: Chem.BondType.DOUBLE,
+    3: Chem.BondType.TRIPLE,
+}
+# bits of the fingerprints screening substructure searches
+PATTERN_FINGERPRINT_SIZE = 2048
+# sanitization of search copies, valences are left unchecked
+SEARCH_SANITIZATION = (
+    Chem.SanitizeFlags.SANITIZE_ALL ^ Chem.SanitizeFlags.SANITIZE_PROPERTIES
+)
 
 
 class Molecule:
+    """A connected component of atoms.
+
+    Components are kept up to date incrementally: adding a bond merges the
+    smaller molecule into the bigger one, removing a bond runs a local search
+    that only walks the smaller of the two possible halves. The sum of atom
+    positions is tracked along the way, so the anchor is moved in O(1).
+
+    An RDKit mirror of the structure is edited along with the items, atom
+    by atom and bond by bond, so it never has to be rebuilt from the scene.
+    """
     atoms: "WeakSet[AlphaAtom]"
     anchor: "MoleculeAnchor"
+    # bumped on every change of the structure, moves don't count
+    revision: "int"
+
+    # live RDKit copy of the structure, must not be changed from outside
+    rwmol: "Chem.RWMol"
+    # index of every atom in rwmol and atoms by their index
+    atom_indices: "dict[AlphaAtom, int]"
+    indexed_atoms: "list[AlphaAtom]"
 
-    def __init__(self, atom: "AlphaAtom") -> None:
+    # copy of rwmol made for substructure matching, its pattern fingerprint
+    # and the revision they were made at
+    _search_copy: "tuple[int, Chem.Mol, ExplicitBitVect] | None"
+    _x_sum: "float"
+    _y_sum: "float"
+    _batch_depth: "int"
+
+    def __init__(self, *atoms: "AlphaAtom") -> None:
         self.atoms = WeakSet()
-        self.atoms.add(atom)
+        self.revision = 0
+        self.rwmol = Chem.RWMol()
+        self.atom_indices = {}
+        self.indexed_atoms = []
+        self._search_copy = None
+        self._x_sum = 0.0
+        self._y_sum = 0.0
+        self._batch_depth = 0
         self.anchor = MoleculeAnchor(self.atoms)
+        for atom in atoms:
+            self.add_atom(atom)
 
     def add_atom(self, atom: "AlphaAtom") -> None:
+        self.revision += 1
+        self.anchor.invalidate_thumbnail()
         self.atoms.add(atom)
+        self.atom_indices[atom] = self.rwmol.AddAtom(Chem.Atom(atom.text))
+        self.indexed_atoms.append(atom)
+        self._x_sum += atom.x()
+        self._y_sum += atom.y()
+        self.update_anchor()
 
     def remove_atom(self, atom: "AlphaAtom") -> None:
+        self.revision += 1
+        self.anchor.invalidate_thumbnail()
         self.atoms.remove(atom)
+        self._remove_indexed({atom})
+        self._x_sum -= atom.x()
+        self._y_sum -= atom.y()
         if len(self.atoms) == 0:
             self.anchor.remove()
+        else:
+            self.update_anchor()
+
+    def _remove_indexed(self, removed: "set[AlphaAtom]") -> None:
+        # RDKit renumbers the atoms that follow the removed ones
+        self.rwmol.BeginBatchEdit()
+        for atom in removed:
+            self.rwmol.RemoveAtom(self.atom_indices.pop(atom))
+        self.rwmol.CommitBatchEdit()
+        self.indexed_atoms = [
+            atom for atom in self.indexed_atoms if atom not in removed
+        ]
+        for index, atom in enumerate(self.indexed_atoms):
+            self.atom_indices[atom] = index
+
+    def search_copy(self) -> "tuple[Chem.Mol, ExplicitBitVect]":
+        """Returns a copy for substructure matching and its pattern fingerprint.
+
+        Atoms of the copy are numbered as in rwmol. Both are kept until the
+        structure is edited again.
+        """
+        if self._search_copy is None or self._search_copy[0] != self.revision:
+            molecule = Chem.Mol(self.rwmol)
+            molecule.UpdatePropertyCache(strict=False)
+            # rings and aromaticity, so aromatic queries find Kekulé drawings
+            Chem.SanitizeMol(molecule, SEARCH_SANITIZATION, catchErrors=True)
+            fingerprint = Chem.PatternFingerprint(molecule, PATTERN_FINGERPRINT_SIZE)
+            self._search_copy = (self.revision, molecule, fingerprint)
+        return self._search_copy[1], self._search_copy[2]
+
+    def move_atom(self, dx: "float", dy: "float") -> None:
+        """Accounts for one of the atoms being shifted by (dx, dy)."""
+        self._x_sum += dx
+        self._y_sum += dy
+        self.update_anchor()
+
+    def center(self) -> "QPointF":
+        atoms_count = len(self.atoms)
+        if atoms_count == 0:
+            return QPointF(0, 0)
+        return QPointF(self._x_sum / atoms_count, self._y_sum / atoms_count)
+
+    def update_anchor(self) -> None:
+        if self._batch_depth == 0:
+            self.anchor.update_position(self.center())
+
+    @contextmanager
+    def batch(self) -> "Iterator[Molecule]":
+        """Defers anchor updates until the outermost batch is finished."""
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            self.update_anchor()
+
+    def merge(self, other: "Molecule") -> "Molecule":
+        """Unites two molecules and returns the one that survived.
+
+        Atoms of the smaller molecule are relabelled, so every atom changes
+        its molecule at most O(log n) times.
+        """
+        if other is self:
+            return self
+        if len(other.atoms) > len(self.atoms):
+            return other.merge(self)
+
+        self.revision += 1
+        other.revision += 1
+        self.anchor.invalidate_thumbnail()
+        for atom in list(other.atoms):
+            atom.molecule = self
+            self.atoms.add(atom)
+        self._x_sum += other._x_sum
+        self._y_sum += other._y_sum
+
+        # atoms of the inserted molecule keep their order at the end
+        offset = self.rwmol.GetNumAtoms()
+        self.rwmol.InsertMol(other.rwmol)
+        for atom in other.indexed_atoms:
+            self.atom_indices[atom] = offset + other.atom_indices[atom]
+        self.indexed_atoms.extend(other.indexed_atoms)
+
+        other.atoms.clear()
+        other._x_sum = other._y_sum = 0.0
+        other._reset_rwmol()
+        other.anchor.remove()
+
+        self.update_anchor()
+        return self
+
+    def _reset_rwmol(self) -> None:
+        self.rwmol = Chem.RWMol()
+        self.atom_indices = {}
+        self.indexed_atoms = []
+
+    def add_bond(self, line: "Line") -> "Molecule":
+        molecule = line.vertex1.molecule.merge(line.vertex2.molecule)
+        molecule.revision += 1
+        molecule._add_rdkit_bond(line)
+        return molecule
+
+    def _add_rdkit_bond(self, line: "Line") -> None:
+        begin = self.atom_indices[line.vertex1]
+        end = self.atom_indices[line.vertex2]
+        if self.rwmol.GetBondBetweenAtoms(begin, end) is not None:
+            return
+        self.rwmol.AddBond(begin, end, BOND_TYPES[line.multiplicity])
+        if line.wedge:
+            bond = self.rwmol.GetBondBetweenAtoms(begin, end)
+            bond.SetBondDir(Chem.BondDir.BEGINWEDGE)
+
+    def remove_bond(self, line: "Line") -> None:
+        """Splits the molecule if the removed line was a bridge.
+
+        The line must be already detached from its atoms.
+        """
+        self.revision += 1
+        self.anchor.invalidate_thumbnail()
+        begin = self.atom_indices.get(line.vertex1)
+        end = self.atom_indices.get(line.vertex2)
+        if begin is not None and end is not None:
+            self.rwmol.RemoveBond(begin, end)
+        component = find_detached_component(line.vertex1, line.vertex2)
+        if component is not None:
+            self.split(component)
+
+    def split(self, component: "set[AlphaAtom]") -> "Molecule":
+        self.revision += 1
+        self.anchor.invalidate_thumbnail()
+        for atom in component:
+            self.atoms.remove(atom)
+            self._x_sum -= atom.x()
+            self._y_sum -= atom.y()
+        self._remove_indexed(component)
+        self.update_anchor()
+
+        separated = Molecule(*component)
+        for atom in component:
+            atom.molecule = separated
+        # lines of the component can't lead outside of it
+        for atom in component:
+            for line in atom.lines:
+                if line.vertex1 is atom:
+                    separated._add_rdkit_bond(line)
+
+        canvas = self.anchor.scene()
+        if canvas is not None:
+            separated.anchor.add_to_canvas(canvas)
+        return separated
 
     def destroy(self):
-        atoms_to_remove: "WeakSet[AlphaAtom]" = self.atoms.copy()
+        atoms_to_remove: "list[AlphaAtom]" = list(self.atoms)
+        self.revision += 1
+        self.atoms.clear()
+        self._reset_rwmol()
+        self._x_sum = self._y_sum = 0.0
+
+        # every line of these atoms lies inside this molecule,
+        # so there is no need to check them for bridges one by one
         for atom in atoms_to_remove:
-            atom.remove()
-
-    def update_atoms(self) -> None:
-        queue: "list[AlphaAtom]" = [atom for atom in self.atoms]
-        while queue:
-            current_atom: "AlphaAtom" = queue.pop()
-            if current_atom.molecule != self:
-                current_atom.molecule.remove_atom(current_atom)
-            current_atom.molecule = self
-            self.atoms.add(current_atom)
-            queue.extend(
-                [
-                    x
-                    for x in current_atom.get_adjacent_atoms()
-                    if x not in self.atoms and x not in queue
-                ]
-            )
-        self.anchor.update_position([atom for atom in self.atoms])
+            for line in atom.lines:
+                if line.scene() is not None:
+                    line.scene().removeItem(line)
+            atom.lines = []
+            if atom.scene() is not None:
+                atom.scene().removeItem(atom)
+        self.anchor.remove()
+
+
+def find_detached_component(
+    first: "AlphaAtom", second: "AlphaAtom"
+) -> "set[AlphaAtom] | None":
+    """Searches from both atoms at once, always expanding the smaller side.
+
+    Returns None when the atoms are still connected, otherwise returns all
+    atoms of the smaller of the two new components. In both cases the work
+    done is proportional to the size of the smaller component.
+    """
+    if first is second:
+        return None
+
+    visited: "tuple[set[AlphaAtom], set[AlphaAtom]]" = ({first}, {second})
+    frontiers: "tuple[list[AlphaAtom], list[AlphaAtom]]" = ([first], [second])
+    while frontiers[0] and frontiers[1]:
+        side = 0 if len(visited[0]) <= len(visited[1]) else 1
+        own, opposite = visited[side], visited[1 - side]
+        next_frontier: "list[AlphaAtom]" = []
+        for atom in frontiers[side]:
+            for adjacent in atom.get_adjacent_atoms():
+                if adjacent in opposite:
+                    return None
+                if adjacent not in own:
+                    own.add(adjacent)
+                    next_frontier.append(adjacent)
+        frontiers[side][:] = next_frontier
+
+    return visited[0] if not frontiers[0] else visited[1]
@@ -1,10 +1,20 @@
+from math import ceil
 from typing import TYPE_CHECKING
 from weakref import WeakSet
 
-from PyQt6.QtCore import QPointF, QRectF
-from PyQt6.QtGui import QBrush, QColor, QImage, QPainter, QPen
-from PyQt6.QtWidgets import QGraphicsItem
-
+from PyQt6.QtCore import QLineF, QPointF, QRectF, Qt
+from PyQt6.QtGui import (
+    QBrush,
+    QColor,
+    QImage,
+    QPainter,
+    QPainterPath,
+    QPen,
+    QPixmap,
+)
+from PyQt6.QtWidgets import QGraphicsItem, QGraphicsItemGroup
+
+from chi_editor.bases.level_of_detail import THUMBNAIL_LOD, element_brush
 from chi_editor.bases.sources import BASIC_RECTANGLE
 from chi_editor.constants import ASSETS
 
@@ -14,14 +24,7 @@ if TYPE_CHECKING:
     from PyQt6.QtWidgets import QGraphicsScene, QGraphicsSceneMouseEvent
 
     from chi_editor.bases.alpha_atom import AlphaAtom
-
-
-def get_geometrical_center(atoms: "list[AlphaAtom]") -> "QPointF":
-    position: "QPointF" = QPointF(0, 0)
-    for atom in atoms:
-        position = position + atom.pos()
-    atoms_count: int = len(atoms)
-    return position / atoms_count
+    from chi_editor.bases.line import Line
 
 
 class MoleculeAnchor(QGraphicsItem):
@@ -32,24 +35,112 @@ class MoleculeAnchor(QGraphicsItem):
     rect: "ClassVar[QRectF]" = QRectF(
         BASIC_RECTANGLE.center().x() - 10, BASIC_RECTANGLE.center().y() - 10, 20, 20
     )
+    # adjusted for border width
+    bounds: "ClassVar[QRectF]" = rect.adjusted(
+        -background_pen.width() / 2,
+        -background_pen.width() / 2,
+        background_pen.width() / 2,
+        background_pen.width() / 2,
+    )
+
+    thumbnail_pen: "ClassVar[QPen]" = QPen(QColor("black"), 3)
 
     atoms: "WeakSet[AlphaAtom]"
+    thumbnail_mode: "bool"
+
+    # both are computed lazily and dropped whenever the molecule changes
+    _thumbnail_bounds: "QRectF | None"
+    _thumbnail: "QPixmap | None"
+
+    # atoms and bonds moved as one item while the anchor is dragged
+    _drag_group: "QGraphicsItemGroup | None"
+    _drag_start: "QPointF"
 
     def __init__(self, atoms: "WeakSet[AlphaAtom]", *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.atoms = atoms
+        self.thumbnail_mode = False
+        self._thumbnail_bounds = None
+        self._thumbnail = None
+        self._drag_group = None
+        self._drag_start = QPointF()
         self.setZValue(2)
         self.setFlag(self.GraphicsItemFlag.ItemSendsScenePositionChanges)
         self.setFlag(self.GraphicsItemFlag.ItemIsSelectable)
         self.setFlag(self.GraphicsItemFlag.ItemIsMovable)
 
-    def update_position(self, atoms: "list[AlphaAtom]") -> "None":
-        self.setPos(get_geometrical_center(atoms))
+    def update_position(self, center: "QPointF") -> "None":
+        self.setPos(center)
+
+    def set_thumbnail_mode(self, enabled: "bool") -> "None":
+        """Draws the whole molecule as one picture instead of its items."""
+        if enabled == self.thumbnail_mode:
+            return
+        self.prepareGeometryChange()
+        self.thumbnail_mode = enabled
+        self._thumbnail_bounds = self._thumbnail = None
+        for atom in self.atoms:
+            atom.setVisible(not enabled)
+            for line in atom.lines:
+                line.setVisible(not enabled)
+
+    def invalidate_thumbnail(self) -> "None":
+        if self.thumbnail_mode:
+            self.prepareGeometryChange()
+            self._thumbnail_bounds = self._thumbnail = None
+
+    def thumbnail_bounds(self) -> "QRectF":
+        if self._thumbnail_bounds is None:
+            extent = QRectF(self.bounds)
+            for atom in self.atoms:
+                extent = extent.united(
+                    atom.boundingRect().translated(atom.pos() - self.pos())
+                )
+            self._thumbnail_bounds = extent
+        return self._thumbnail_bounds
+
+    def thumbnail(self) -> "QPixmap":
+        if self._thumbnail is None:
+            bounds = self.thumbnail_bounds()
+            pixmap = QPixmap(
+                ceil(bounds.width() * THUMBNAIL_LOD),
+                ceil(bounds.height() * THUMBNAIL_LOD),
+            )
+            pixmap.fill(Qt.GlobalColor.transparent)
+
+            painter = QPainter(pixmap)
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            painter.scale(THUMBNAIL_LOD, THUMBNAIL_LOD)
+            painter.translate(-bounds.topLeft() - self.pos())
+
+            painter.setPen(self.thumbnail_pen)
+            lines: "set[Line]" = set()
+            for atom in self.atoms:
+                lines.update(atom.lines)
+            for line in lines:
+                # bonds may still wait for their geometry update
+                painter.drawLine(
+                    QLineF(line.vertex1.center(), line.vertex2.center())
+                )
+
+            painter.setPen(Qt.PenStyle.NoPen)
+            for atom in self.atoms:
+                painter.setBrush(element_brush(atom.text))
+                painter.drawEllipse(atom.dot_rect.translated(atom.pos()))
+            painter.end()
+            self._thumbnail = pixmap
+        return self._thumbnail
 
     def boundingRect(self) -> "QRectF":
-        # adjust for boarder width
-        adjust = self.background_pen.width() / 2
-        return self.rect.adjusted(-adjust, -adjust, adjust, adjust)
+        if self.thumbnail_mode:
+            return self.thumbnail_bounds()
+        return self.bounds
+
+    def shape(self) -> "QPainterPath":
+        # only the anchor itself can be grabbed, even in thumbnail mode
+        path = QPainterPath()
+        path.addEllipse(self.bounds)
+        return path
 
     def add_to_canvas(self, canvas: "QGraphicsScene") -> "None":
         canvas.addItem(self)
@@ -59,6 +150,14 @@ class MoleculeAnchor(QGraphicsItem):
             self.scene().removeItem(self)
 
     def paint(self, painter: "QPainter", *_) -> "None":
+        if self.thumbnail_mode:
+            thumbnail = self.thumbnail()
+            painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+            painter.drawPixmap(
+                self.thumbnail_bounds(), thumbnail, QRectF(thumbnail.rect())
+            )
+            return
+
         # save + restore to reset pen and brush
         painter.save()
         painter.setPen(self.background_pen)
@@ -69,8 +168,56 @@ class MoleculeAnchor(QGraphicsItem):
 
     def mouseMoveEvent(self, event: "QGraphicsSceneMouseEvent") -> "None":
         super().mouseMoveEvent(event)
+        if self._drag_group is None:
+            self.begin_rigid_drag()
+        self._drag_group.setPos(self.pos() - self._drag_start)
+
+    def mouseReleaseEvent(self, event: "QGraphicsSceneMouseEvent") -> "None":
+        super().mouseReleaseEvent(event)
+        self.end_rigid_drag()
+
+    def _lines(self) -> "list[Line]":
+        return list({line: None for atom in self.atoms for line in atom.lines})
+
+    def begin_rigid_drag(self) -> "None":
+        """Puts the atoms and bonds in a group moved instead of each of them.
+
+        Items in the group keep their own positions, so nothing is recomputed
+        until end_rigid_drag commits the offset of the group.
+        """
+        group = QGraphicsItemGroup()
+        group.setZValue(1)
+        self.scene().addItem(group)
+        # the group is at the origin, so parenting keeps scene positions;
+        # addToGroup and removeFromGroup would recompute its bounds every time
+        for line in self._lines():
+            line.setParentItem(group)
         for atom in self.atoms:
-            atom.moveBy(
-                event.pos().x() - event.lastPos().x(),
-                event.pos().y() - event.lastPos().y(),
+            # moving the group would notify every atom otherwise
+            atom.setFlag(
+                self.GraphicsItemFlag.ItemSendsScenePositionChanges, False
             )
+            atom.setParentItem(group)
+        self._drag_group = group
+        self._drag_start = self.pos()
+
+    def end_rigid_drag(self) -> "None":
+        """Moves the atoms and bonds by the offset of the group and ungroups them."""
+        group, self._drag_group = self._drag_group, None
+        if group is None:
+            return
+        offset = group.pos()
+        # lines are put in place right away, their atoms only schedule updates
+        for line in self._lines():
+            line.setParentItem(None)
+            line.moveBy(offset.x(), offset.y())
+        atoms = list(self.atoms)
+        if atoms:
+            with atoms[0].molecule.batch():
+                for atom in atoms:
+                    atom.setParentItem(None)
+                    atom.moveBy(offset.x(), offset.y())
+                    atom.setFlag(
+                        self.GraphicsItemFlag.ItemSendsScenePositionChanges
+                    )
+        group.scene().removeItem(group)
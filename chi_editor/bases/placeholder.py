@@ -0,0 +1,49 @@
+from typing import TYPE_CHECKING
+
+from PyQt6 import sip
+from PyQt6.QtCore import QRectF, Qt
+from PyQt6.QtGui import QColor, QPen
+from PyQt6.QtWidgets import QGraphicsItem
+
+from chi_editor.bases.sources import BASIC_RECTANGLE
+
+if TYPE_CHECKING:
+    from typing import ClassVar
+
+    from PyQt6.QtCore import QPointF
+    from PyQt6.QtGui import QPainter
+
+
+class Placeholder(QGraphicsItem):
+    """Marks where a molecule will appear once a background task is done."""
+    pen: "ClassVar[QPen]" = QPen(QColor("gray"), 2, Qt.PenStyle.DashLine)
+    rect: "ClassVar[QRectF]" = QRectF(
+        BASIC_RECTANGLE.center().x() - 40, BASIC_RECTANGLE.center().y() - 40, 80, 80
+    )
+    bounds: "ClassVar[QRectF]" = rect.adjusted(
+        -pen.width() / 2, -pen.width() / 2, pen.width() / 2, pen.width() / 2
+    )
+
+    def __init__(self, position: "QPointF", *args, **kwargs) -> "None":
+        super().__init__(*args, **kwargs)
+        self.setPos(position)
+        self.setZValue(3)
+
+    def boundingRect(self) -> "QRectF":
+        return self.bounds
+
+    def paint(self, painter: "QPainter", *_) -> "None":
+        painter.setPen(self.pen)
+        painter.drawRoundedRect(self.rect, 10, 10)
+        painter.drawText(self.rect, Qt.AlignmentFlag.AlignCenter, "...")
+
+    def remove(self) -> "bool":
+        """Removes the placeholder and tells if it was still on a canvas.
+
+        A placeholder that is gone, e.g. because the canvas was cleared,
+        means the result it was waiting for should be dropped.
+        """
+        if sip.isdeleted(self) or self.scene() is None:
+            return False
+        self.scene().removeItem(self)
+        return True
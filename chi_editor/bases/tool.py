@@ -1,8 +1,6 @@
 from typing import TYPE_CHECKING
 
-from PyQt6.QtGui import QAction, QIcon
-
-from chi_editor.constants import RESOURCES
+from PyQt6.QtGui import QAction
 
 if TYPE_CHECKING:
     from PyQt6.QtWidgets import QGraphicsSceneMouseEvent
@@ -11,18 +9,15 @@ if TYPE_CHECKING:
 
 
 class Tool(QAction):
+    """Handles mouse events of the canvas while it's the current action.
+
+    Tools are listed in chi_editor.toolbar.tools, the toolbar creates them
+    when they are first chosen.
+    """
+
     def __init__(self, canvas: "Canvas", *args, **kwargs) -> "None":
         super().__init__(*args, **kwargs)
         self.canvas = canvas
-
-        icon_path = RESOURCES / "assets" / "toolbar" / f"{self.picture}.png"
-        if not icon_path.exists():
-            raise ValueError(
-                f"can't find assets for {type(self).__name__}, checked at "
-                f"{icon_path}\n module reference: {self.__module__}"
-            )
-
-        self.setIcon(QIcon(str(icon_path)))
         self.setCheckable(True)
 
     def mouse_press_event(self, event: "QGraphicsSceneMouseEvent") -> "None":
@@ -33,8 +28,3 @@ class Tool(QAction):
 
     def mouse_release_event(self, event: "QGraphicsSceneMouseEvent") -> "None":
         pass
-
-    @property
-    def picture(self) -> "str":
-        """Returns the name of the icon for this tool without extension."""
-        raise NotImplementedError
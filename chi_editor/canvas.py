@@ -1,33 +1,175 @@
 from typing import TYPE_CHECKING, overload
 
-from PyQt6.QtCore import QRectF
+from PyQt6.QtCore import QRectF, pyqtSignal
 from PyQt6.QtWidgets import QGraphicsScene
 
+from chi_editor.atom_index import ATOM_RADIUS, AtomIndex
+from chi_editor.bases.level_of_detail import THUMBNAIL_LOD
+from chi_editor.bases.molecule import MoleculeAnchor
+from chi_editor.bases.tool import Tool
+from chi_editor.document import Document
+from chi_editor.geometry_updates import GeometryUpdates
+from chi_editor.history import History
+from chi_editor.profiler import profiler
+from chi_editor.search import SubstructureSearch
+from chi_editor.tiles import Tiles
+from chi_editor.valence import ValenceCheck
+
 if TYPE_CHECKING:
-    from chi_editor.bases.tool import Tool
+    from typing import Iterable
+
+    from PyQt6.QtCore import QPointF
+    from PyQt6.QtGui import QPainter
+    from PyQt6.QtWidgets import QGraphicsItem, QGraphicsSceneMouseEvent
 
-    from PyQt6.QtWidgets import QGraphicsSceneMouseEvent
+    from chi_editor.bases.alpha_atom import AlphaAtom
+    from chi_editor.bases.molecule import Molecule
+    from chi_editor.chemistry import ChemistryExecutor
+    from chi_editor.storage import DocumentFile
 
 
 class Canvas(QGraphicsScene):
+    # numbers of molecules laid out again, left as they were because they're
+    # invalid and left because the cleanup failed on them
+    cleaned_up = pyqtSignal(int, int, int)
+    # the molecule under the cursor changed to the one given
+    molecule_hovered = pyqtSignal(object)
+
     current_action: "Tool"
     min_scene_rect: "QRectF"
+    atom_index: "AtomIndex"
+    document: "Document"
+    history: "History"
+    geometry_updates: "GeometryUpdates"
+    valence: "ValenceCheck"
+    # molecules kept off the canvas while they're far from the view
+    tiles: "Tiles"
+    search: "SubstructureSearch"
+    # whether molecules are drawn as thumbnails
+    overview: "bool"
+    # opened file whose molecules are still being materialized
+    document_file: "DocumentFile | None"
+    # the molecule last found under the cursor
+    hovered_molecule: "Molecule | None"
+
+    _chemistry: "ChemistryExecutor | None"
 
     def __init__(self, *args, **kwargs) -> "None":
         super().__init__(*args, **kwargs)
         self.min_scene_rect = super().sceneRect()
+        # ignores the mouse until a tool is chosen, the cursor may hover before
+        self.current_action = Tool(self)
+        self.atom_index = AtomIndex()
+        self.document = Document()
+        self.history = History(self)
+        self.geometry_updates = GeometryUpdates(parent=self)
+        self.valence = ValenceCheck(parent=self)
+        self.tiles = Tiles(self)
+        self.search = SubstructureSearch(self)
+        self.overview = False
+        self.document_file = None
+        self.hovered_molecule = None
+        self._chemistry = None
 
     def mousePressEvent(self, event: "QGraphicsSceneMouseEvent") -> "None":
+        # tools hit test bonds by their shapes
+        self.geometry_updates.flush()
         self.current_action.mouse_press_event(event)
 
     def mouseMoveEvent(self, event: "QGraphicsSceneMouseEvent") -> "None":
         self.current_action.mouse_move_event(event)
+        if self.receivers(self.molecule_hovered):
+            atom = self.atom_at(event.scenePos())
+            if atom is not None and atom.molecule is not self.hovered_molecule:
+                self.hovered_molecule = atom.molecule
+                self.molecule_hovered.emit(atom.molecule)
 
     def mouseReleaseEvent(self, event: "QGraphicsSceneMouseEvent") -> "None":
         self.current_action.mouse_release_event(event)
 
+    def drawBackground(self, painter: "QPainter", rect: "QRectF") -> "None":
+        # views draw the background first and the foreground last in a frame
+        if profiler().enabled:
+            profiler().frame_started()
+        super().drawBackground(painter, rect)
+
+    def drawForeground(self, painter: "QPainter", rect: "QRectF") -> "None":
+        super().drawForeground(painter, rect)
+        if profiler().enabled:
+            profiler().frame_finished()
+
+    def atom_at(
+        self, pos: "QPointF", radius: "float" = ATOM_RADIUS
+    ) -> "AlphaAtom | None":
+        """Returns the nearest atom whose center is within radius of pos."""
+        return self.atom_index.nearest(pos, radius)
+
+    @property
+    def chemistry(self) -> "ChemistryExecutor":
+        """Worker pool for RDKit tasks, started when it's first needed."""
+        if self._chemistry is None:
+            from chi_editor.chemistry import ChemistryExecutor
+
+            self._chemistry = ChemistryExecutor(parent=self)
+        return self._chemistry
+
+    def clear(self) -> "None":
+        # deleted items don't notify about leaving the scene
+        self.atom_index.clear()
+        self.document.clear()
+        # the items commands refer to are deleted
+        self.history.clear()
+        self.geometry_updates.discard()
+        self.valence.discard()
+        self.tiles.clear()
+        self.search.discard()
+        self.hovered_molecule = None
+        self.close_document_file()
+        super().clear()
+
+    def close_document_file(self) -> "None":
+        if self.document_file is not None:
+            self.document_file.close()
+            self.document_file = None
+
+    def materialize(self, region: "QRectF | None" = None) -> "None":
+        """Creates items of the opened file within the region, or all of them.
+
+        Molecules far from the region are evicted if the canvas is over its
+        memory budget, evicted ones near it are put back.
+        """
+        if self.document_file is not None:
+            self.document_file.materialize(self, region)
+            if self.document_file.is_complete:
+                self.close_document_file()
+        if region is None:
+            self.tiles.restore_all()
+        else:
+            self.tiles.update(region)
+
+    def set_level_of_detail(self, level_of_detail: "float") -> "None":
+        """Switches between drawing items and drawing molecule thumbnails."""
+        overview = level_of_detail < THUMBNAIL_LOD
+        if overview == self.overview:
+            return
+        self.overview = overview
+        for item in self.items():
+            if isinstance(item, MoleculeAnchor):
+                item.set_thumbnail_mode(overview)
+
+    def addItem(self, item: "QGraphicsItem") -> "None":
+        super().addItem(item)
+        if self.overview and isinstance(item, MoleculeAnchor):
+            item.set_thumbnail_mode(True)
+
+    def add_items(self, items: "Iterable[QGraphicsItem]") -> "None":
+        for item in items:
+            self.addItem(item)
+
     def enlargeScene(self, sceneRect: "QRectF") -> "None":
         self.min_scene_rect = self.min_scene_rect.united(sceneRect)
+        # views ask the C++ side, the override below is only seen from Python
+        super().setSceneRect(self.min_scene_rect)
 
     def sceneRect(self) -> "QRectF":
         return self.min_scene_rect
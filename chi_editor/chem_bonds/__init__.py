@@ -0,0 +1,25 @@
+from typing import TYPE_CHECKING
+
+from .double_bond import DoubleBond
+from .single_bond import SingleBond
+from .triple_bond import TripleBond
+from .wedge_bond import WedgeBond
+
+if TYPE_CHECKING:
+    from chi_editor.bases.line import Line
+
+# bond classes by multiplicity and whether the bond is a wedge
+BOND_CLASSES: "dict[tuple[int, bool], type[Line]]" = {
+    (1, False): SingleBond,
+    (2, False): DoubleBond,
+    (3, False): TripleBond,
+    (1, True): WedgeBond,
+}
+
+__all__ = (
+    "BOND_CLASSES",
+    "DoubleBond",
+    "SingleBond",
+    "TripleBond",
+    "WedgeBond",
+)
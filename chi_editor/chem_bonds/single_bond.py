@@ -1,7 +1,6 @@
 from typing import TYPE_CHECKING
 
-from PyQt6.QtCore import QPointF
-from PyQt6.QtGui import QColor, QPen
+from PyQt6.QtCore import QLineF
 
 from chi_editor.bases.line import Line
 
@@ -13,9 +12,7 @@ class SingleBond(Line):
     multiplicity = 1
 
     def paint_line(self, painter: "QPainter") -> "None":
-        pen = QPen(QColor("black"), 3)
-        painter.setPen(pen)
+        painter.setPen(self.pen)
 
         # draw straight line
-        painter.drawLine(QPointF(self.width / 2, 0),
-                         QPointF(self.width / 2, self.height))
\ No newline at end of file
+        painter.drawLine(QLineF(self.width / 2, 0, self.width / 2, self.height))
@@ -1,7 +1,6 @@
 from typing import TYPE_CHECKING
 
-from PyQt6.QtCore import QPointF
-from PyQt6.QtGui import QColor, QPen
+from PyQt6.QtCore import QLineF
 
 from chi_editor.bases.line import Line
 
@@ -13,13 +12,11 @@ class TripleBond(Line):
     multiplicity = 3
 
     def paint_line(self, painter: "QPainter") -> "None":
-        pen = QPen(QColor("black"), 3)
-        painter.setPen(pen)
+        painter.setPen(self.pen)
 
         # draw straight line
-        painter.drawLine(QPointF(self.width / 4, 0),
-                         QPointF(self.width / 4, self.height))
-        painter.drawLine(QPointF(self.width / 2, 0),
-                         QPointF(self.width / 2, self.height))
-        painter.drawLine(QPointF(3 * self.width / 4, 0),
-                         QPointF(3 * self.width / 4, self.height))
+        painter.drawLines(
+            QLineF(self.width / 4, 0, self.width / 4, self.height),
+            QLineF(self.width / 2, 0, self.width / 2, self.height),
+            QLineF(3 * self.width / 4, 0, 3 * self.width / 4, self.height),
+        )
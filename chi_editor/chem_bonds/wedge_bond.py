@@ -1,26 +1,30 @@
 from typing import TYPE_CHECKING
 
 from PyQt6.QtCore import QPointF
-from PyQt6.QtGui import QBrush, QColor, QPainterPath, QPen
+from PyQt6.QtGui import QBrush, QColor, QPen
 
 from chi_editor.bases.line import Line
 
 if TYPE_CHECKING:
+    from typing import ClassVar
+
     from PyQt6.QtGui import QPainter
 
 
 class WedgeBond(Line):
     multiplicity = 1
+    wedge = True
 
-    def paint_line(self, painter: "QPainter") -> "None":
-        pen = QPen(QColor("black"), 0)
-        brush = QBrush(QColor("black"))
-        painter.setPen(pen)
-        painter.setBrush(brush)
+    pen: "ClassVar[QPen]" = QPen(QColor("black"), 0)
+    brush: "ClassVar[QBrush]" = QBrush(QColor("black"))
 
-        wedge_path = QPainterPath(QPointF(0, 0))
-        wedge_path.lineTo(self.width / 2, self.height)
-        wedge_path.lineTo(self.width, 0)
+    def paint_line(self, painter: "QPainter") -> "None":
+        painter.setPen(self.pen)
+        painter.setBrush(self.brush)
 
         # draw straight line
-        painter.drawPath(wedge_path)
+        painter.drawConvexPolygon(
+            QPointF(0, 0),
+            QPointF(self.width / 2, self.height),
+            QPointF(self.width, 0),
+        )
@@ -0,0 +1,171 @@
+"""RDKit work done off the GUI thread.
+
+Tasks are plain functions run in worker processes; molecules cross the
+process boundary pickled in RDKit's binary format. Results come back to the
+GUI thread through a queued signal and are handed to the callback given on
+submission.
+"""
+import multiprocessing
+import os
+import sys
+import weakref
+from concurrent import futures
+from concurrent.futures.process import BrokenProcessPool
+from typing import TYPE_CHECKING
+
+from PyQt6.QtCore import QCoreApplication, QObject, Qt, pyqtSignal
+from rdkit import Chem
+
+from chi_editor.layout_cache import compute_2d_coords, configure, layout_cache
+
+if TYPE_CHECKING:
+    from typing import Any, Callable
+
+
+def depict(molecule: "Chem.Mol") -> "Chem.Mol":
+    Chem.Kekulize(molecule)
+    compute_2d_coords(molecule)
+    return molecule
+
+
+def clean_up(molecule: "Chem.Mol") -> "Chem.Mol | None":
+    """Returns the molecule laid out again, or None if it's not valid."""
+    # datamol brings pandas along, it's imported by the workers that need it
+    from datamol import incorrect_valence
+
+    if molecule is None or incorrect_valence(molecule):
+        return None
+    return depict(molecule)
+
+
+def clean_up_all(molecules: "list[Chem.Mol]") -> "list[Chem.Mol | str | None]":
+    """Cleans up each molecule, so one molecule can't fail the others.
+
+    A molecule RDKit rejects as invalid gives None, one the cleanup fails on
+    otherwise gives the error message.
+    """
+    results: "list[Chem.Mol | str | None]" = []
+    for molecule in molecules:
+        try:
+            results.append(clean_up(molecule))
+        except ValueError:
+            results.append(None)
+        except Exception as error:
+            results.append(f"{type(error).__name__}: {error}")
+    return results
+
+
+def from_smiles(smiles: "str") -> "Chem.Mol | None":
+    molecule = Chem.MolFromSmiles(smiles)
+    if molecule is None:
+        return None
+    return depict(molecule)
+
+
+def run_task(task: "Callable[..., Any]", *args: "Any") -> "tuple[Any, int, int]":
+    """Runs the task in a worker, with the layout cache lookups it made."""
+    cache = layout_cache()
+    hits, misses = cache.hits, cache.misses
+    result = task(*args)
+    return result, cache.hits - hits, cache.misses - misses
+
+
+class ChemistryExecutor(QObject):
+    """A pool of worker processes reporting results to the GUI thread."""
+    # a finished future and the callback for its result
+    _finished = pyqtSignal(object, object)
+
+    max_workers: "int | None"
+
+    _pool: "futures.ProcessPoolExecutor"
+    # shuts the current pool down, also when the executor is collected
+    _finalizer: "weakref.finalize | None"
+    _pending: "set[futures.Future]"
+
+    def __init__(
+        self, max_workers: "int | None" = None, parent: "QObject | None" = None
+    ) -> "None":
+        super().__init__(parent)
+        self.max_workers = max_workers
+        self._finalizer = None
+        self._pool = self._start_pool()
+        self._pending = set()
+        # queued even when a task is done before its callback is attached,
+        # so callbacks never run inside submit
+        self._finished.connect(self._deliver, Qt.ConnectionType.QueuedConnection)
+        application = QCoreApplication.instance()
+        if application is not None:
+            application.aboutToQuit.connect(self.shutdown)
+
+    def _start_pool(self) -> "futures.ProcessPoolExecutor":
+        # workers never touch Qt, but forking a process running Qt is unsafe
+        pool = futures.ProcessPoolExecutor(
+            self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=configure,
+            initargs=(layout_cache().path,),
+        )
+        # a pool collected without shutdown breaks the interpreter exit; the
+        # pool replaced after a crash is shut down and forgotten right away
+        if self._finalizer is not None:
+            self._finalizer()
+        self._finalizer = weakref.finalize(
+            self, pool.shutdown, wait=False, cancel_futures=True
+        )
+        return pool
+
+    def submit(
+        self,
+        task: "Callable[..., Any]",
+        *args: "Any",
+        callback: "Callable[[Any], None]",
+    ) -> "futures.Future":
+        """Runs the task in a worker and calls back with its result.
+
+        The callback is called on the GUI thread, with None if the task
+        failed, and not at all if the future is cancelled. The future holds
+        what run_task returns.
+        """
+        try:
+            future = self._pool.submit(run_task, task, *args)
+        except BrokenProcessPool:
+            # a worker died, e.g. crashed inside RDKit
+            self._pool = self._start_pool()
+            future = self._pool.submit(run_task, task, *args)
+        self._pending.add(future)
+        future.add_done_callback(lambda done: self._finished.emit(done, callback))
+        return future
+
+    def _deliver(
+        self, future: "futures.Future", callback: "Callable[[Any], None]"
+    ) -> "None":
+        self._pending.discard(future)
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            # an exception escaping a slot would abort the application
+            sys.excepthook(type(error), error, error.__traceback__)
+            callback(None)
+            return
+        result, hits, misses = future.result()
+        layout_cache().add_worker_lookups(hits, misses)
+        callback(result)
+
+    @property
+    def workers(self) -> "int":
+        return self.max_workers or os.cpu_count() or 1
+
+    @property
+    def pending(self) -> "int":
+        """Number of submitted tasks whose callbacks have not run yet."""
+        return len(self._pending)
+
+    def wait(self) -> "None":
+        """Blocks until every submitted task is finished and delivered."""
+        while self._pending:
+            futures.wait(list(self._pending))
+            QCoreApplication.processEvents()
+
+    def shutdown(self) -> "None":
+        self._finalizer()
@@ -0,0 +1,231 @@
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from numpy.typing import ArrayLike, NDArray
+
+    from chi_editor.bases.alpha_atom import AlphaAtom
+    from chi_editor.bases.line import Line
+
+
+class Document:
+    """Atoms and bonds of the canvas stored in contiguous arrays.
+
+    Every atom and bond gets an id, which is its row in the arrays and stays
+    valid until the entry is removed. Rows of removed entries are marked as
+    dead and handed out again by later additions, so the arrays don't grow
+    past the most entries alive at once however often items come and go.
+    Bonds are removed before their atoms, a bond never refers to a reused
+    row. Graphics items keep their id and write their changes through, which
+    lets bulk operations work on whole columns instead of walking the scene.
+
+    The document is a mirror, not the model the items are views of: atoms and
+    bonds still hold their element, position and connections, Qt draws and
+    hit tests them from that state, and every change is paid for twice.
+    """
+    symbols: "list[str]"
+
+    elements: "NDArray[np.int16]"
+    coordinates: "NDArray[np.float64]"
+    atom_alive: "NDArray[np.bool_]"
+
+    bonds: "NDArray[np.int32]"
+    bond_orders: "NDArray[np.int8]"
+    bond_wedges: "NDArray[np.bool_]"
+    bond_alive: "NDArray[np.bool_]"
+
+    atom_items: "list[AlphaAtom | None]"
+    bond_items: "list[Line | None]"
+
+    _symbol_codes: "dict[str, int]"
+    # dead rows waiting to be reused
+    _free_atoms: "list[int]"
+    _free_bonds: "list[int]"
+
+    def __init__(self, capacity: "int" = 64) -> "None":
+        self._reset(capacity)
+
+    def _reset(self, capacity: "int") -> "None":
+        self.symbols = []
+        self._symbol_codes = {}
+
+        self.elements = np.zeros(capacity, dtype=np.int16)
+        self.coordinates = np.zeros((capacity, 2), dtype=np.float64)
+        self.atom_alive = np.zeros(capacity, dtype=np.bool_)
+
+        self.bonds = np.zeros((capacity, 2), dtype=np.int32)
+        self.bond_orders = np.zeros(capacity, dtype=np.int8)
+        self.bond_wedges = np.zeros(capacity, dtype=np.bool_)
+        self.bond_alive = np.zeros(capacity, dtype=np.bool_)
+
+        self.atom_items = []
+        self.bond_items = []
+        self._free_atoms = []
+        self._free_bonds = []
+
+    @property
+    def atom_count(self) -> "int":
+        """Number of atom rows in use, including dead ones waiting for reuse."""
+        return len(self.atom_items)
+
+    @property
+    def bond_count(self) -> "int":
+        """Number of bond rows in use, including dead ones waiting for reuse."""
+        return len(self.bond_items)
+
+    def symbol_code(self, symbol: "str") -> "int":
+        code = self._symbol_codes.get(symbol)
+        if code is None:
+            code = self._symbol_codes[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return code
+
+    def element(self, atom_id: "int") -> "str":
+        return self.symbols[self.elements[atom_id]]
+
+    def _reserve_atoms(self, count: "int") -> "None":
+        needed = self.atom_count + count
+        capacity = len(self.elements)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        self.elements = _grow(self.elements, capacity)
+        self.coordinates = _grow(self.coordinates, capacity)
+        self.atom_alive = _grow(self.atom_alive, capacity)
+
+    def _reserve_bonds(self, count: "int") -> "None":
+        needed = self.bond_count + count
+        capacity = len(self.bond_orders)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        self.bonds = _grow(self.bonds, capacity)
+        self.bond_orders = _grow(self.bond_orders, capacity)
+        self.bond_wedges = _grow(self.bond_wedges, capacity)
+        self.bond_alive = _grow(self.bond_alive, capacity)
+
+    def add_atom(
+        self, symbol: "str", x: "float", y: "float", item: "AlphaAtom | None" = None
+    ) -> "int":
+        if self._free_atoms:
+            atom_id = self._free_atoms.pop()
+            self.atom_items[atom_id] = item
+        else:
+            self._reserve_atoms(1)
+            atom_id = self.atom_count
+            self.atom_items.append(item)
+        self.elements[atom_id] = self.symbol_code(symbol)
+        self.coordinates[atom_id] = x, y
+        self.atom_alive[atom_id] = True
+        return atom_id
+
+    def move_atom(self, atom_id: "int", x: "float", y: "float") -> "None":
+        # two scalar writes are about twice as fast as assigning a pair
+        coordinates = self.coordinates
+        coordinates[atom_id, 0] = x
+        coordinates[atom_id, 1] = y
+
+    def remove_atom(self, atom_id: "int") -> "None":
+        # a row freed twice would be handed out to two atoms
+        if not self.atom_alive[atom_id]:
+            return
+        self.atom_alive[atom_id] = False
+        self.atom_items[atom_id] = None
+        self._free_atoms.append(atom_id)
+
+    def add_bond(
+        self,
+        start: "int",
+        end: "int",
+        order: "int",
+        wedge: "bool" = False,
+        item: "Line | None" = None,
+    ) -> "int":
+        if self._free_bonds:
+            bond_id = self._free_bonds.pop()
+            self.bond_items[bond_id] = item
+        else:
+            self._reserve_bonds(1)
+            bond_id = self.bond_count
+            self.bond_items.append(item)
+        self.bonds[bond_id] = start, end
+        self.bond_orders[bond_id] = order
+        self.bond_wedges[bond_id] = wedge
+        self.bond_alive[bond_id] = True
+        return bond_id
+
+    def remove_bond(self, bond_id: "int") -> "None":
+        if not self.bond_alive[bond_id]:
+            return
+        self.bond_alive[bond_id] = False
+        self.bond_items[bond_id] = None
+        self._free_bonds.append(bond_id)
+
+    def clear(self) -> "None":
+        self._reset(len(self.elements))
+
+    def live_atoms(self) -> "NDArray[np.intp]":
+        return np.flatnonzero(self.atom_alive[:self.atom_count])
+
+    def live_bonds(self) -> "NDArray[np.intp]":
+        return np.flatnonzero(self.bond_alive[:self.bond_count])
+
+    def bonds_within(self, atom_ids: "ArrayLike") -> "NDArray[np.intp]":
+        """Returns ids of live bonds with both ends among the given atoms."""
+        selected = np.zeros(self.atom_count, dtype=np.bool_)
+        selected[np.asarray(atom_ids, dtype=np.intp)] = True
+        bond_ids = self.live_bonds()
+        ends = self.bonds[bond_ids]
+        return bond_ids[selected[ends[:, 0]] & selected[ends[:, 1]]]
+
+    def centroid(self, atom_ids: "ArrayLike") -> "tuple[float, float]":
+        x, y = self.coordinates[np.asarray(atom_ids, dtype=np.intp)].mean(axis=0)
+        return float(x), float(y)
+
+    def bounds(
+        self, atom_ids: "ArrayLike"
+    ) -> "tuple[float, float, float, float]":
+        """Returns (min x, min y, max x, max y) of the given atoms."""
+        points = self.coordinates[np.asarray(atom_ids, dtype=np.intp)]
+        (min_x, min_y), (max_x, max_y) = points.min(axis=0), points.max(axis=0)
+        return float(min_x), float(min_y), float(max_x), float(max_y)
+
+    def translate(self, atom_ids: "ArrayLike", dx: "float", dy: "float") -> "None":
+        """Shifts the atoms in the model and then moves their items."""
+        atom_ids = np.asarray(atom_ids, dtype=np.intp)
+        self.coordinates[atom_ids] += dx, dy
+        self.sync_items(atom_ids)
+
+    def sync_items(self, atom_ids: "ArrayLike") -> "None":
+        """Moves items of the given atoms to the coordinates of the model."""
+        atom_ids = np.asarray(atom_ids, dtype=np.intp)
+        for atom_id, (x, y) in zip(atom_ids.tolist(), self.coordinates[atom_ids]):
+            item = self.atom_items[atom_id]
+            if item is not None:
+                item.setPos(x, y)
+
+    def compact(
+        self, atom_ids: "ArrayLike | None" = None
+    ) -> "tuple[NDArray[np.intp], NDArray[np.intp], NDArray[np.int32]]":
+        """Renumbers live atoms and the bonds between them from zero.
+
+        Returns ids of the atoms and the bonds that were taken and pairs of
+        bonded atoms in the new numbering.
+        """
+        if atom_ids is None:
+            atom_ids = self.live_atoms()
+        atom_ids = np.asarray(atom_ids, dtype=np.intp)
+        bond_ids = self.bonds_within(atom_ids)
+
+        new_ids = np.full(self.atom_count, -1, dtype=np.int32)
+        new_ids[atom_ids] = np.arange(len(atom_ids), dtype=np.int32)
+        return atom_ids, bond_ids, new_ids[self.bonds[bond_ids]]
+
+
+def _grow(array: "NDArray", capacity: "int") -> "NDArray":
+    grown = np.zeros((capacity, *array.shape[1:]), dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
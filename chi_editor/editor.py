@@ -1,18 +1,42 @@
+from typing import TYPE_CHECKING
+
 from PyQt6.QtCore import QRectF, Qt
-from PyQt6.QtGui import QIcon, QTransform
+from PyQt6.QtGui import QAction, QIcon, QKeySequence, QTransform
 from PyQt6.QtWidgets import (
+    QFileDialog,
     QGraphicsView,
     QHBoxLayout,
+    QInputDialog,
     QMainWindow,
+    QMessageBox,
+    QProgressDialog,
     QPushButton,
+    QStyleOptionGraphicsItem,
     QVBoxLayout,
     QWidget,
 )
 
 from chi_editor.canvas import Canvas
 from chi_editor.constants import ASSETS
+from chi_editor.library_panel import LibraryPanel
+from chi_editor.profiler import ProfilerHud, profiler
+from chi_editor.storage import DocumentFile, save_canvas
 from chi_editor.toolbar import CanvasToolBar
 
+if TYPE_CHECKING:
+    from chi_editor.importer import FileImport
+
+# Items report exact bounds and geometry changes,
+# so the view only needs to repaint what has changed
+VIEWPORT_UPDATE_MODES: "dict[str, QGraphicsView.ViewportUpdateMode]" = {
+    "minimal": QGraphicsView.ViewportUpdateMode.MinimalViewportUpdate,
+    "bounding": QGraphicsView.ViewportUpdateMode.BoundingRectViewportUpdate,
+    "smart": QGraphicsView.ViewportUpdateMode.SmartViewportUpdate,
+    "full": QGraphicsView.ViewportUpdateMode.FullViewportUpdate,
+}
+
+DOCUMENT_FILTER = "Chi documents (*.chi)"
+
 
 class Editor(QMainWindow):
     # Hierarchy:
@@ -22,6 +46,7 @@ class Editor(QMainWindow):
     #           graphics_view:
     #               canvas:
     #       toolbar:
+    #       library_panel:
 
     # Contains everything except toolbar
     workspace: "QWidget"
@@ -32,7 +57,19 @@ class Editor(QMainWindow):
     # GraphicsScene where to draw all graphical objects
     canvas: "Canvas"
 
-    def __init__(self, *args, **kwargs) -> "None":
+    # Structure file being imported
+    file_import: "FileImport | None"
+
+    # Dock with library structures similar to the hovered molecule
+    library_panel: "LibraryPanel"
+
+    # Overlay with the timings of the profiler and the switch of the profiler
+    profiler_hud: "ProfilerHud"
+    profile_record_action: "QAction"
+
+    def __init__(
+        self, *args, viewport_update: "str" = "minimal", **kwargs
+    ) -> "None":
         super().__init__(*args, **kwargs)
 
         # Window settings
@@ -47,7 +84,7 @@ class Editor(QMainWindow):
         self.graphics_view = QGraphicsView(self)    # create QGraphicsView
         self.graphics_view\
             .setAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop)     # Set QGraphicsView position
-        self.graphics_view.setViewportUpdateMode(QGraphicsView.ViewportUpdateMode.FullViewportUpdate)
+        self.set_viewport_update_mode(viewport_update)
 
         # Initialize GGraphicsScene called canvas
         self.canvas = Canvas(QRectF(self.graphics_view.geometry()))
@@ -87,13 +124,206 @@ class Editor(QMainWindow):
         # Add left toolbar
         self.addToolBar(Qt.ToolBarArea.LeftToolBarArea, CanvasToolBar(canvas=self.canvas))
 
+        # Add right library panel, hidden until asked for
+        self.library_panel = LibraryPanel(self.canvas, self)
+        self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self.library_panel)
+        self.library_panel.hide()
+        # the panel follows the molecule under the cursor, buttons up or down
+        self.library_panel.visibilityChanged.connect(
+            self.graphics_view.viewport().setMouseTracking
+        )
+
+        file_menu = self.menuBar().addMenu("File")
+        file_menu.addAction("Open...", QKeySequence.StandardKey.Open, self.open_file)
+        file_menu.addAction("Save...", QKeySequence.StandardKey.Save, self.save_file)
+        file_menu.addAction("Import...", self.import_file)
+        self.file_import = None
+
+        history = self.canvas.history
+        edit_menu = self.menuBar().addMenu("Edit")
+        edit_menu.addAction("Undo", QKeySequence.StandardKey.Undo, history.undo)
+        edit_menu.addAction("Redo", QKeySequence.StandardKey.Redo, history.redo)
+        edit_menu.addSeparator()
+        edit_menu.addAction(
+            "Find Substructure...",
+            QKeySequence.StandardKey.Find,
+            self.find_substructure,
+        )
+        edit_menu.addAction("Clear Highlights", self.canvas.search.clear)
+
+        view_menu = self.menuBar().addMenu("View")
+        view_menu.addAction(self.library_panel.toggleViewAction())
+
+        self.profiler_hud = ProfilerHud(self.canvas, self.graphics_view)
+        profile_menu = self.menuBar().addMenu("Profile")
+        record = profile_menu.addAction("Record")
+        record.setCheckable(True)
+        show_hud = profile_menu.addAction("Show HUD")
+        show_hud.setCheckable(True)
+        show_hud.setShortcut(QKeySequence("F12"))
+        profile_menu.addAction("Save Trace...", self.save_trace)
+        # the HUD shows what is recorded, so it needs the recording on
+        record.toggled.connect(self.set_profiling)
+        record.toggled.connect(lambda on: on or show_hud.setChecked(False))
+        show_hud.toggled.connect(lambda on: on and record.setChecked(True))
+        show_hud.toggled.connect(self.profiler_hud.setVisible)
+        self.profile_record_action = record
+
+        self.canvas.cleaned_up.connect(self.report_clean_up)
+
+        # Opened documents are materialized as they come into view
+        self.graphics_view.horizontalScrollBar().valueChanged.connect(
+            self.materialize_visible
+        )
+        self.graphics_view.verticalScrollBar().valueChanged.connect(
+            self.materialize_visible
+        )
+
+    def set_viewport_update_mode(self, mode: "str") -> "None":
+        if mode not in VIEWPORT_UPDATE_MODES:
+            raise ValueError(
+                f"unknown viewport update mode {mode!r}, "
+                f"expected one of: {', '.join(VIEWPORT_UPDATE_MODES)}"
+            )
+        self.graphics_view.setViewportUpdateMode(VIEWPORT_UPDATE_MODES[mode])
+
+    def set_scale(self, scale: "float") -> "None":
+        transform = QTransform.fromScale(scale, scale)
+        self.graphics_view.setTransform(transform)
+        self.canvas.set_level_of_detail(
+            QStyleOptionGraphicsItem.levelOfDetailFromTransform(transform)
+        )
+        self.materialize_visible()
+
+    def visible_region(self) -> "QRectF":
+        viewport = self.graphics_view.viewport().rect()
+        return self.graphics_view.mapToScene(viewport).boundingRect()
+
+    def materialize_visible(self) -> "None":
+        self.canvas.materialize(self.visible_region())
+
+    def open_file(self) -> "None":
+        path, _ = QFileDialog.getOpenFileName(self, "Open", "", DOCUMENT_FILTER)
+        if path:
+            self.open_document(path)
+
+    def open_document(self, path: "str") -> "None":
+        try:
+            document_file = DocumentFile(path)
+        except (OSError, ValueError) as error:
+            QMessageBox.critical(self, "Open", f"Cannot open {path}: {error}")
+            return
+        self.canvas.clear()
+        self.canvas.document_file = document_file
+        self.canvas.setSceneRect(document_file.bounds())
+        self.materialize_visible()
+
+    def save_file(self) -> "None":
+        path, _ = QFileDialog.getSaveFileName(self, "Save", "", DOCUMENT_FILTER)
+        if path:
+            self.save_document(path)
+
+    def save_document(self, path: "str") -> "None":
+        # the file may be the mapped one, so everything is read from it first
+        self.canvas.materialize()
+        try:
+            save_canvas(self.canvas, path)
+        except OSError as error:
+            QMessageBox.critical(self, "Save", f"Cannot save {path}: {error}")
+
+    def import_file(self) -> "None":
+        # the importer brings RDKit readers along, so it's loaded when needed
+        from chi_editor.importer import FILE_FILTER
+
+        path, _ = QFileDialog.getOpenFileName(self, "Import", "", FILE_FILTER)
+        if path:
+            self.import_structures(path)
+
+    def import_structures(self, path: "str") -> "None":
+        from chi_editor.importer import FileImport
+
+        if self.file_import is not None:
+            self.file_import.cancel()
+        try:
+            file_import = FileImport(
+                self.canvas, path, self.visible_region().center(), parent=self
+            )
+        except (OSError, ValueError) as error:
+            QMessageBox.critical(self, "Import", f"Cannot import {path}: {error}")
+            return
+
+        progress = QProgressDialog(f"Importing {path}", "Cancel", 0, 100, self)
+        progress.setMinimumDuration(500)
+        progress.canceled.connect(file_import.cancel)
+        file_import.progressed.connect(progress.setValue)
+        # imports may go over the memory budget of the canvas
+        file_import.progressed.connect(self.materialize_visible)
+
+        def finished(imported: "int", skipped: "int") -> "None":
+            progress.reset()
+            if self.file_import is file_import:
+                self.file_import = None
+            message = f"Imported {imported} structures"
+            if skipped:
+                message += f", skipped {skipped} unreadable records"
+            self.statusBar().showMessage(message, 5000)
+
+        file_import.finished.connect(finished)
+        self.file_import = file_import
+        file_import.start()
+
+    def find_substructure(self) -> "None":
+        text, accepted = QInputDialog.getText(
+            self, "Find Substructure", "SMILES or SMARTS:"
+        )
+        if not accepted:
+            return
+        search = self.canvas.search
+        try:
+            search.run(text)
+        except ValueError as error:
+            QMessageBox.critical(self, "Find Substructure", f"Cannot search: {error}")
+            return
+        self.statusBar().showMessage(
+            f"Found {search.matched} of {search.screened} molecules, "
+            f"{search.rejected} ruled out by fingerprints, "
+            f"in {1000 * search.seconds:.1f} ms",
+            5000,
+        )
+
+    def set_profiling(self, enabled: "bool") -> "None":
+        if enabled:
+            profiler().enable()
+        else:
+            profiler().disable()
+
+    def save_trace(self) -> "None":
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Save Trace", "", "Chrome traces (*.json)"
+        )
+        if path:
+            try:
+                profiler().save_trace(path)
+            except OSError as error:
+                QMessageBox.critical(self, "Save Trace", f"Cannot save {path}: {error}")
+
+    def report_clean_up(
+        self, cleaned: "int", failed: "int", errors: "int"
+    ) -> "None":
+        message = f"Cleaned up {cleaned} molecules"
+        if failed:
+            message += f", {failed} invalid ones are selected"
+        if errors:
+            message += f", {errors} failed with errors"
+        self.statusBar().showMessage(message, 5000)
+
     def zoom_in(self) -> "None":
         # Get the current scale factor of the view
         current_scale = self.graphics_view.transform().m11()
 
         # Update the scale factor of the view
         new_scale = current_scale * 1.2
-        self.graphics_view.setTransform(QTransform.fromScale(new_scale, new_scale))
+        self.set_scale(new_scale)
 
     def zoom_out(self) -> "None":
         # Get the current scale factor of the view
@@ -101,4 +331,4 @@ class Editor(QMainWindow):
 
         # Update the scale factor of the view
         new_scale = current_scale / 1.2
-        self.graphics_view.setTransform(QTransform.fromScale(new_scale, new_scale))
+        self.set_scale(new_scale)
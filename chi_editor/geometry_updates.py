@@ -0,0 +1,69 @@
+"""Coalescing of bond geometry updates.
+
+Moving an atom only marks it as dirty, its bonds are recomputed once per
+frame. A bond whose atoms both moved, or an atom moved several times within
+a frame, costs one update.
+"""
+from typing import TYPE_CHECKING
+
+from PyQt6.QtCore import QObject, Qt, QTimer
+
+if TYPE_CHECKING:
+    from chi_editor.bases.alpha_atom import AlphaAtom
+
+# milliseconds between flushes, one frame at 60 Hz
+FRAME_INTERVAL = 16
+
+
+class GeometryUpdates(QObject):
+    """Dirty atoms whose bonds are updated on the next frame."""
+    # bond updates asked for by moved atoms and actually done
+    requested: "int"
+    performed: "int"
+
+    _atoms: "dict[AlphaAtom, None]"
+    _timer: "QTimer"
+
+    def __init__(
+        self, interval: "int" = FRAME_INTERVAL, parent: "QObject | None" = None
+    ) -> "None":
+        super().__init__(parent)
+        self.requested = self.performed = 0
+        self._atoms = {}
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(interval)
+        self._timer.setTimerType(Qt.TimerType.PreciseTimer)
+        # looked up on each timeout, so the profiler sees the flushes it wraps
+        self._timer.timeout.connect(lambda: self.flush())
+
+    @property
+    def pending(self) -> "int":
+        return len(self._atoms)
+
+    def schedule(self, atom: "AlphaAtom") -> "None":
+        self.requested += len(atom.lines)
+        self._atoms[atom] = None
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def flush(self) -> "None":
+        """Updates bonds of the dirty atoms now, e.g. before hit testing."""
+        self._timer.stop()
+        atoms, self._atoms = self._atoms, {}
+        lines = {line: None for atom in atoms for line in atom.lines}
+        for line in lines:
+            line.update_geometry()
+        self.performed += len(lines)
+
+    def discard(self) -> "None":
+        """Forgets the dirty atoms, for when they are deleted."""
+        self._timer.stop()
+        self._atoms.clear()
+
+    def stats(self) -> "dict[str, int]":
+        return {
+            "requested": self.requested,
+            "performed": self.performed,
+            "pending": self.pending,
+        }
@@ -0,0 +1,381 @@
+"""Undo and redo of canvas edits.
+
+Commands record what an edit changed, not the state of the canvas: the items
+that were added or removed and the offsets of moved atoms. Removed items are
+kept aside by the command and put back as they were, so the memory taken by
+the history grows with the size of the edits. Items evicted from the canvas
+are swapped for small stand-ins until they're put back, see tiles.
+"""
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import TYPE_CHECKING
+
+from chi_editor.bases.molecule import Molecule
+
+if TYPE_CHECKING:
+    from typing import Hashable, Iterable, Mapping
+
+    from PyQt6.QtWidgets import QGraphicsItem
+
+    from chi_editor.bases.alpha_atom import AlphaAtom
+    from chi_editor.bases.line import Line
+    from chi_editor.canvas import Canvas
+
+# rough memory taken by an item kept by a command and by a command itself
+ITEM_BYTES = 256
+COMMAND_BYTES = 64
+
+
+class Command(ABC):
+    @abstractmethod
+    def undo(self, canvas: "Canvas") -> "None":
+        ...
+
+    @abstractmethod
+    def redo(self, canvas: "Canvas") -> "None":
+        ...
+
+    def merge(self, other: "Command") -> "bool":
+        """Absorbs the next command, returns False if it can't."""
+        return False
+
+    def touched(self) -> "Iterable[AlphaAtom]":
+        """Atoms the command changes, their molecules must be on the canvas."""
+        return ()
+
+    def item_lists(self) -> "Iterable[list]":
+        """Lists of atoms and bonds the history may swap items in, see swap."""
+        return ()
+
+    @property
+    def nbytes(self) -> "int":
+        return COMMAND_BYTES
+
+
+class AddItems(Command):
+    """Atoms, bonds and other top-level items put on the canvas."""
+    atoms: "list[AlphaAtom]"
+    lines: "list[Line]"
+    others: "list[QGraphicsItem]"
+
+    def __init__(
+        self,
+        atoms: "Iterable[AlphaAtom]" = (),
+        lines: "Iterable[Line]" = (),
+        others: "Iterable[QGraphicsItem]" = (),
+    ) -> "None":
+        self.atoms = list(atoms)
+        self.lines = list(lines)
+        self.others = list(others)
+
+    @classmethod
+    def of_atoms(cls, atoms: "Iterable[AlphaAtom]") -> "AddItems":
+        """Takes the atoms with every line attached to them."""
+        atoms = list(atoms)
+        lines = {line: None for atom in atoms for line in atom.lines}
+        return cls(atoms, lines)
+
+    def touched(self) -> "Iterable[AlphaAtom]":
+        yield from self.atoms
+        for line in self.lines:
+            yield line.vertex1
+            yield line.vertex2
+
+    def item_lists(self) -> "Iterable[list]":
+        return self.atoms, self.lines
+
+    def undo(self, canvas: "Canvas") -> "None":
+        detach(canvas, self.atoms, self.lines, self.others)
+
+    def redo(self, canvas: "Canvas") -> "None":
+        attach(canvas, self.atoms, self.lines, self.others)
+
+    def merge(self, other: "Command") -> "bool":
+        if type(other) is not type(self):
+            return False
+        self.atoms.extend(other.atoms)
+        self.lines.extend(other.lines)
+        self.others.extend(other.others)
+        return True
+
+    @property
+    def nbytes(self) -> "int":
+        items = len(self.atoms) + len(self.lines) + len(self.others)
+        return COMMAND_BYTES + ITEM_BYTES * items
+
+
+class RemoveItems(AddItems):
+    """Atoms, bonds and other top-level items taken off the canvas."""
+
+    def undo(self, canvas: "Canvas") -> "None":
+        super().redo(canvas)
+
+    def redo(self, canvas: "Canvas") -> "None":
+        super().undo(canvas)
+
+
+class MoveAtoms(Command):
+    """Atoms shifted by the same offset."""
+    atoms: "list[AlphaAtom]"
+    dx: "float"
+    dy: "float"
+
+    def __init__(
+        self, atoms: "Iterable[AlphaAtom]", dx: "float", dy: "float"
+    ) -> "None":
+        self.atoms = list(atoms)
+        self.dx = dx
+        self.dy = dy
+
+    def touched(self) -> "Iterable[AlphaAtom]":
+        return self.atoms
+
+    def item_lists(self) -> "Iterable[list]":
+        return (self.atoms,)
+
+    def undo(self, canvas: "Canvas") -> "None":
+        for atom in self.atoms:
+            atom.moveBy(-self.dx, -self.dy)
+
+    def redo(self, canvas: "Canvas") -> "None":
+        for atom in self.atoms:
+            atom.moveBy(self.dx, self.dy)
+
+    def merge(self, other: "Command") -> "bool":
+        if not isinstance(other, MoveAtoms) or other.atoms != self.atoms:
+            return False
+        self.dx += other.dx
+        self.dy += other.dy
+        return True
+
+    @property
+    def nbytes(self) -> "int":
+        return COMMAND_BYTES + 8 * len(self.atoms)
+
+
+class Batch(Command):
+    """Commands undone and redone as one."""
+    commands: "list[Command]"
+
+    def __init__(self, *commands: "Command") -> "None":
+        self.commands = list(commands)
+
+    def touched(self) -> "Iterable[AlphaAtom]":
+        for command in self.commands:
+            yield from command.touched()
+
+    def item_lists(self) -> "Iterable[list]":
+        for command in self.commands:
+            yield from command.item_lists()
+
+    def undo(self, canvas: "Canvas") -> "None":
+        for command in reversed(self.commands):
+            command.undo(canvas)
+
+    def redo(self, canvas: "Canvas") -> "None":
+        for command in self.commands:
+            command.redo(canvas)
+
+    @property
+    def nbytes(self) -> "int":
+        return COMMAND_BYTES + sum(command.nbytes for command in self.commands)
+
+
+def detach(
+    canvas: "Canvas",
+    atoms: "list[AlphaAtom]",
+    lines: "list[Line]",
+    others: "list[QGraphicsItem]",
+) -> "None":
+    """Takes items off the canvas, lines must include all lines of the atoms."""
+    removed = set(atoms)
+    # molecules going away as a whole don't need to be checked for splits
+    whole = [
+        molecule
+        for molecule in {atom.molecule: None for atom in atoms}
+        if all(atom in removed for atom in molecule.atoms)
+    ]
+    whole_set = set(whole)
+    for line in lines:
+        if line.vertex1.molecule not in whole_set:
+            line.remove()
+    for molecule in whole:
+        molecule.destroy()
+    for atom in atoms:
+        if atom.scene() is not None:
+            atom.remove()
+    for item in others:
+        if item.scene() is not None:
+            canvas.removeItem(item)
+
+
+def attach(
+    canvas: "Canvas",
+    atoms: "list[AlphaAtom]",
+    lines: "list[Line]",
+    others: "list[QGraphicsItem]",
+) -> "None":
+    """Puts items taken off by detach back, rebuilding their molecules."""
+    # atoms connected by the lines being restored go into one molecule at once
+    parents = {atom: atom for atom in atoms}
+
+    def find(atom: "AlphaAtom") -> "AlphaAtom":
+        while parents[atom] is not atom:
+            parents[atom] = parents[parents[atom]]
+            atom = parents[atom]
+        return atom
+
+    for line in lines:
+        if line.vertex1 in parents and line.vertex2 in parents:
+            parents[find(line.vertex1)] = find(line.vertex2)
+
+    groups: "dict[AlphaAtom, list[AlphaAtom]]" = {}
+    for atom in atoms:
+        groups.setdefault(find(atom), []).append(atom)
+    for group in groups.values():
+        molecule = Molecule()
+        with molecule.batch():
+            for atom in group:
+                atom.lines = []
+                atom.molecule = molecule
+                molecule.add_atom(atom)
+    canvas.add_items(atoms)
+
+    for line in lines:
+        line.vertex1.add_line(line)
+        line.vertex2.add_line(line)
+        line.vertex1.molecule.add_bond(line)
+    canvas.add_items(lines)
+
+    anchors = {atom.molecule.anchor: None for atom in atoms}
+    canvas.add_items(anchor for anchor in anchors if anchor.scene() is None)
+    canvas.add_items(others)
+
+
+class History:
+    """Stacks of commands to undo and redo, bounded by their total size.
+
+    The oldest commands are forgotten once the estimated size of both stacks
+    goes over max_bytes. Every atom and bond held by a command is indexed by
+    the places it takes in the lists of the commands, so swapping items costs
+    as much as the items swapped, not as much as the history.
+    """
+    canvas: "Canvas"
+    max_bytes: "int"
+    nbytes: "int"
+
+    _undo: "deque[tuple[Command, Hashable | None]]"
+    _redo: "list[Command]"
+    # lists of the commands holding an item and its index in each of them
+    _places: "dict[object, list[tuple[list, int]]]"
+
+    def __init__(
+        self, canvas: "Canvas", max_bytes: "int" = 64 * 1024 * 1024
+    ) -> "None":
+        self.canvas = canvas
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._undo = deque()
+        self._redo = []
+        self._places = {}
+
+    @property
+    def can_undo(self) -> "bool":
+        return bool(self._undo)
+
+    @property
+    def can_redo(self) -> "bool":
+        return bool(self._redo)
+
+    def push(self, command: "Command", key: "Hashable | None" = None) -> "None":
+        """Records an edit that was already made.
+
+        Consecutive commands pushed with the same key, such as the steps of
+        one drag or the chunks of one import, are merged into one entry.
+        """
+        self._drop_redo()
+        if key is not None and self._undo:
+            last, last_key = self._undo[-1]
+            if last_key == key:
+                self.nbytes -= last.nbytes
+                lengths = [len(items) for items in last.item_lists()]
+                if last.merge(command):
+                    # merged commands only append to their lists
+                    for items, length in zip(last.item_lists(), lengths):
+                        self._index(items, length)
+                    self.nbytes += last.nbytes
+                    self._trim()
+                    return
+                self.nbytes += last.nbytes
+        self._undo.append((command, key))
+        for items in command.item_lists():
+            self._index(items)
+        self.nbytes += command.nbytes
+        self._trim()
+
+    def perform(self, command: "Command") -> "None":
+        """Makes an edit and records it."""
+        command.redo(self.canvas)
+        self.push(command)
+
+    def undo(self) -> "None":
+        if self._undo:
+            command, _ = self._undo.pop()
+            self.canvas.tiles.restore(command.touched())
+            command.undo(self.canvas)
+            self._redo.append(command)
+
+    def redo(self) -> "None":
+        if self._redo:
+            command = self._redo.pop()
+            self.canvas.tiles.restore(command.touched())
+            command.redo(self.canvas)
+            self._undo.append((command, None))
+
+    def swap(self, items: "Mapping[object, object]") -> "None":
+        """Makes every command refer to the values instead of the keys."""
+        places = self._places
+        for old, new in items.items():
+            moved = places.pop(old, None)
+            if moved is None:
+                continue
+            for item_list, index in moved:
+                item_list[index] = new
+            places.setdefault(new, []).extend(moved)
+
+    def clear(self) -> "None":
+        self._undo.clear()
+        self._redo.clear()
+        self._places.clear()
+        self.nbytes = 0
+
+    def _index(self, items: "list", start: "int" = 0) -> "None":
+        places = self._places
+        for index in range(start, len(items)):
+            places.setdefault(items[index], []).append((items, index))
+
+    def _forget(self, command: "Command") -> "None":
+        """Drops the places of a command leaving the history."""
+        places = self._places
+        for items in command.item_lists():
+            for item in items:
+                kept = [
+                    place for place in places.get(item, ()) if place[0] is not items
+                ]
+                if kept:
+                    places[item] = kept
+                else:
+                    places.pop(item, None)
+
+    def _drop_redo(self) -> "None":
+        for command in self._redo:
+            self.nbytes -= command.nbytes
+            self._forget(command)
+        self._redo.clear()
+
+    def _trim(self) -> "None":
+        while self.nbytes > self.max_bytes and len(self._undo) > 1:
+            command, _ = self._undo.popleft()
+            self.nbytes -= command.nbytes
+            self._forget(command)
+
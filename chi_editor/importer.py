@@ -0,0 +1,157 @@
+"""Streaming import of structure files.
+
+Records are parsed lazily, one at a time, and put on the canvas in chunks
+between which the Qt event loop runs, so only the current chunk is held in
+memory and the window stays responsive.
+"""
+import os
+from itertools import islice
+from typing import TYPE_CHECKING
+
+from PyQt6.QtCore import QObject, QPointF, QRectF, QTimer, pyqtSignal
+from rdkit import Chem
+
+from chi_editor.history import AddItems
+from chi_editor.toolbar.tools.structure import BOND_TYPES, put_molecule
+
+if TYPE_CHECKING:
+    from typing import BinaryIO, Iterator
+
+    from chi_editor.canvas import Canvas
+
+# file suffixes by the format of their records
+FORMATS: "dict[str, str]" = {
+    ".sdf": "sdf",
+    ".sd": "sdf",
+    ".mol": "sdf",
+    ".smi": "smiles",
+    ".smiles": "smiles",
+    ".txt": "smiles",
+}
+
+FILE_FILTER = f"Structures ({' '.join(f'*{suffix}' for suffix in FORMATS)})"
+
+# imported molecules are laid out on a grid of this many columns
+GRID_COLUMNS = 20
+GRID_STEP = 1200.0
+
+
+def file_format(path: "str | os.PathLike[str]") -> "str":
+    suffix = os.path.splitext(path)[1].lower()
+    if suffix not in FORMATS:
+        raise ValueError(f"unsupported structure file {os.fspath(path)!r}")
+    return FORMATS[suffix]
+
+
+def read_sdf(file: "BinaryIO") -> "Iterator[Chem.Mol | None]":
+    """Yields molecules of an SDF or a MOL file, None for broken records."""
+    yield from Chem.ForwardSDMolSupplier(file)
+
+
+def read_smiles(file: "BinaryIO") -> "Iterator[Chem.Mol | None]":
+    """Yields molecules of a file with a SMILES, optionally named, per line."""
+    for line in file:
+        text = line.decode(errors="replace").strip()
+        if text and not text.startswith("#"):
+            yield Chem.MolFromSmiles(text.split()[0])
+
+
+READERS = {
+    "sdf": read_sdf,
+    "smiles": read_smiles,
+}
+
+
+def prepare(molecules: "Iterator[Chem.Mol | None]") -> "Iterator[Chem.Mol | None]":
+    """Kekulizes molecules, replacing ones the canvas can't draw with None."""
+    for molecule in molecules:
+        if molecule is not None:
+            try:
+                Chem.Kekulize(molecule, clearAromaticFlags=True)
+            except Chem.KekulizeException:
+                molecule = None
+        if molecule is not None and any(
+            bond.GetBondTypeAsDouble() not in BOND_TYPES
+            for bond in molecule.GetBonds()
+        ):
+            molecule = None
+        yield molecule
+
+
+class FileImport(QObject):
+    """Puts molecules of a structure file on the canvas chunk by chunk.
+
+    Progress is reported as the share of the file read, in percent.
+    """
+    progressed = pyqtSignal(int)
+    # numbers of imported and skipped records
+    finished = pyqtSignal(int, int)
+
+    canvas: "Canvas"
+    chunk_size: "int"
+    origin: "QPointF"
+    imported: "int"
+    skipped: "int"
+
+    _file: "BinaryIO"
+    _size: "int"
+    _records: "Iterator[Chem.Mol | None]"
+    _cancelled: "bool"
+
+    def __init__(
+        self,
+        canvas: "Canvas",
+        path: "str | os.PathLike[str]",
+        origin: "QPointF | None" = None,
+        chunk_size: "int" = 50,
+        parent: "QObject | None" = None,
+    ) -> "None":
+        super().__init__(parent)
+        read = READERS[file_format(path)]
+        self.canvas = canvas
+        self.chunk_size = chunk_size
+        self.origin = origin or QPointF(0, 0)
+        self.imported = self.skipped = 0
+        self._file = open(path, "rb")
+        self._size = max(os.fstat(self._file.fileno()).st_size, 1)
+        self._records = prepare(read(self._file))
+        self._cancelled = False
+
+    def start(self) -> "None":
+        QTimer.singleShot(0, self.import_chunk)
+
+    def cancel(self) -> "None":
+        self._cancelled = True
+
+    def position(self, index: "int") -> "QPointF":
+        row, column = divmod(index, GRID_COLUMNS)
+        return self.origin + QPointF(column * GRID_STEP, row * GRID_STEP)
+
+    def import_chunk(self) -> "None":
+        if self._cancelled:
+            return self.finish()
+        chunk = list(islice(self._records, self.chunk_size))
+        for molecule in chunk:
+            if molecule is None:
+                self.skipped += 1
+                continue
+            position = self.position(self.imported)
+            atoms = put_molecule(self.canvas, molecule, position)
+            # the whole import is undone at once
+            self.canvas.history.push(AddItems.of_atoms(atoms), key=self)
+            self.canvas.setSceneRect(QRectF(
+                position.x() - GRID_STEP / 2,
+                position.y() - GRID_STEP / 2,
+                GRID_STEP,
+                GRID_STEP,
+            ))
+            self.imported += 1
+        self.progressed.emit(min(100 * self._file.tell() // self._size, 100))
+        if len(chunk) < self.chunk_size:
+            return self.finish()
+        # let the event loop paint and handle input before the next chunk
+        QTimer.singleShot(0, self.import_chunk)
+
+    def finish(self) -> "None":
+        self._file.close()
+        self.finished.emit(self.imported, self.skipped)
@@ -0,0 +1,177 @@
+"""Cache of 2D layouts computed by RDKit.
+
+Layouts are keyed by canonical SMILES and the depiction settings, and stored
+in canonical atom order, so a hit only has to put the coordinates back in the
+atom order of the molecule at hand. The first tier keeps recent layouts in
+memory, the optional second one is a SQLite file that survives restarts.
+Every process has its own cache, worker processes share the file. Workers of
+a ChemistryExecutor report their lookups back with every result, so the
+stats of the GUI process count them too.
+"""
+import sqlite3
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+import numpy as np
+from rdkit import Chem, rdBase
+from rdkit.Chem import rdDepictor
+from rdkit.Geometry import Point3D
+
+if TYPE_CHECKING:
+    from os import PathLike
+
+    from numpy.typing import NDArray
+
+
+def depiction_settings() -> "str":
+    # layouts of other RDKit versions or depiction engines may differ
+    return f"rdkit={rdBase.rdkitVersion};coordgen={rdDepictor.GetPreferCoordGen():d}"
+
+
+class LayoutCache:
+    """A size-bounded LRU of layouts in front of an optional SQLite file."""
+    max_bytes: "int"
+    path: "str | PathLike[str] | None"
+    hits: "int"
+    misses: "int"
+    # lookups made by worker processes on behalf of this one
+    worker_hits: "int"
+    worker_misses: "int"
+
+    _layouts: "OrderedDict[str, NDArray[np.float32]]"
+    _bytes: "int"
+    _connection: "sqlite3.Connection | None"
+
+    def __init__(
+        self,
+        max_bytes: "int" = 16 * 1024 * 1024,
+        path: "str | PathLike[str] | None" = None,
+    ) -> "None":
+        self.max_bytes = max_bytes
+        self.path = path
+        self.hits = self.misses = 0
+        self.worker_hits = self.worker_misses = 0
+        self._layouts = OrderedDict()
+        self._bytes = 0
+        self._connection = None
+        if path is not None:
+            self._connection = sqlite3.connect(path, timeout=1)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS layouts"
+                " (key TEXT PRIMARY KEY, coordinates BLOB NOT NULL)"
+            )
+            self._connection.commit()
+
+    def get(self, key: "str") -> "NDArray[np.float32] | None":
+        layout = self._layouts.get(key)
+        if layout is not None:
+            self._layouts.move_to_end(key)
+        elif self._connection is not None:
+            row = self._connection.execute(
+                "SELECT coordinates FROM layouts WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                layout = np.frombuffer(row[0], dtype=np.float32).reshape(-1, 2)
+                self._remember(key, layout)
+
+        if layout is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return layout
+
+    def put(self, key: "str", layout: "NDArray") -> "None":
+        layout = np.ascontiguousarray(layout, dtype=np.float32)
+        self._remember(key, layout)
+        if self._connection is not None:
+            try:
+                with self._connection:
+                    self._connection.execute(
+                        "INSERT OR REPLACE INTO layouts VALUES (?, ?)",
+                        (key, layout.tobytes()),
+                    )
+            except sqlite3.OperationalError:
+                # the file is locked by another process, it's only a cache
+                pass
+
+    def _remember(self, key: "str", layout: "NDArray[np.float32]") -> "None":
+        previous = self._layouts.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous.nbytes
+        self._layouts[key] = layout
+        self._bytes += layout.nbytes
+        while self._bytes > self.max_bytes and len(self._layouts) > 1:
+            _, evicted = self._layouts.popitem(last=False)
+            self._bytes -= evicted.nbytes
+
+    def clear(self) -> "None":
+        """Forgets the layouts kept in memory, the file is left as is."""
+        self._layouts.clear()
+        self._bytes = 0
+
+    def add_worker_lookups(self, hits: "int", misses: "int") -> "None":
+        self.worker_hits += hits
+        self.worker_misses += misses
+
+    def stats(self) -> "dict[str, int]":
+        """Lookups of this process and its workers, layouts kept in its memory."""
+        return {
+            "hits": self.hits + self.worker_hits,
+            "misses": self.misses + self.worker_misses,
+            "worker_hits": self.worker_hits,
+            "worker_misses": self.worker_misses,
+            "layouts": len(self._layouts),
+            "bytes": self._bytes,
+        }
+
+    def close(self) -> "None":
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+_cache = LayoutCache()
+
+
+def layout_cache() -> "LayoutCache":
+    """Returns the cache of this process."""
+    return _cache
+
+
+def configure(
+    path: "str | PathLike[str] | None" = None,
+    max_bytes: "int" = 16 * 1024 * 1024,
+) -> "LayoutCache":
+    """Replaces the cache of this process, e.g. to add the persistent tier."""
+    global _cache
+    _cache.close()
+    _cache = LayoutCache(max_bytes, path)
+    return _cache
+
+
+def compute_2d_coords(molecule: "Chem.Mol") -> "bool":
+    """Lays the molecule out like Compute2DCoords, reusing cached layouts.
+
+    Returns whether the layout was found in the cache.
+    """
+    key = f"{Chem.MolToSmiles(molecule)} {depiction_settings()}"
+    ranks = np.fromiter(Chem.CanonicalRankAtoms(molecule), dtype=np.intp)
+    cache = layout_cache()
+
+    layout = cache.get(key)
+    if layout is None:
+        rdDepictor.Compute2DCoords(molecule)
+        points = molecule.GetConformer().GetPositions()[:, :2]
+        canonical = np.empty_like(points)
+        canonical[ranks] = points
+        cache.put(key, canonical)
+        return False
+
+    conformer = Chem.Conformer(molecule.GetNumAtoms())
+    conformer.Set3D(False)
+    for index, (x, y) in enumerate(layout[ranks].tolist()):
+        conformer.SetAtomPosition(index, Point3D(x, y, 0))
+    molecule.RemoveAllConformers()
+    molecule.AddConformer(conformer, assignId=True)
+    return True
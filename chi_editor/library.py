@@ -0,0 +1,229 @@
+"""Similarity search in a library of reference structures.
+
+A library is built once from a structure file and saved in the column layout
+of chi_editor.storage: the Morgan fingerprints of the records as a matrix of
+packed bits, one row of 64-bit words per record, their bit counts and the
+canonical SMILES of the records. Opening a library maps the file into
+memory, so only the pages a search touches are read from disk.
+
+Tanimoto similarity, common bits over bits set in either fingerprint, is
+computed for every record at once, block by block, by counting the bits of
+the intersections byte by byte with a lookup table.
+"""
+import mmap
+import os
+import sys
+import time
+from argparse import ArgumentParser
+from typing import TYPE_CHECKING
+
+import numpy as np
+from rdkit import Chem, rdBase
+from rdkit.Chem import rdFingerprintGenerator
+
+from chi_editor.importer import READERS, file_format
+from chi_editor.storage import read_columns, write_columns
+
+if TYPE_CHECKING:
+    from os import PathLike
+    from typing import Callable
+
+    from numpy.typing import NDArray
+
+MAGIC = b"CHILIB\x00\x00"
+SUFFIX = ".chil"
+FILE_FILTER = f"Libraries (*{SUFFIX})"
+
+FINGERPRINT_RADIUS = 2
+FINGERPRINT_BITS = 2048
+WORDS = FINGERPRINT_BITS // 64
+
+COLUMNS: "dict[str, tuple[str, int]]" = {
+    "fingerprints": ("<u8", WORDS),
+    "bit_counts": ("<u2", 1),
+    "smiles_offsets": ("<i8", 1),
+    "smiles_data": ("|u1", 1),
+}
+
+# bits set in every byte value, np.bitwise_count needs NumPy 2
+BYTE_BITS = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(
+    axis=1, dtype=np.uint8
+)
+
+# records compared at once, bounds the memory taken by a search
+BLOCK_ROWS = 1 << 16
+# records read between two progress reports while building
+PROGRESS_STEP = 1000
+
+_generator: "rdFingerprintGenerator.FingerprintGenerator64 | None" = None
+
+
+def fingerprint(molecule: "Chem.Mol") -> "NDArray[np.uint64]":
+    """Returns the Morgan fingerprint of the molecule as packed 64-bit words."""
+    global _generator
+    if _generator is None:
+        _generator = rdFingerprintGenerator.GetMorganGenerator(
+            radius=FINGERPRINT_RADIUS, fpSize=FINGERPRINT_BITS
+        )
+    bits = _generator.GetFingerprintAsNumPy(molecule).astype(np.uint8)
+    return np.packbits(bits, bitorder="little").view("<u8")
+
+
+def count_bits(words: "NDArray[np.uint64]") -> "NDArray[np.int32]":
+    """Returns the number of bits set in every row of packed words."""
+    octets = np.ascontiguousarray(words).view(np.uint8)
+    return BYTE_BITS[octets].sum(axis=-1, dtype=np.int32)
+
+
+def build_library(
+    source: "str | PathLike[str]",
+    path: "str | PathLike[str]",
+    progress: "Callable[[int], None] | None" = None,
+) -> "dict[str, float]":
+    """Fingerprints every record of the structure file into a library file.
+
+    The progress callback gets the share of the source read, in percent.
+    Returns the numbers of stored and skipped records and the time taken.
+    """
+    read = READERS[file_format(source)]
+    size = os.path.getsize(source) or 1
+    start = time.perf_counter()
+    fingerprints, encoded = [], []
+    skipped = 0
+    # broken records are counted, not logged one by one
+    with open(source, "rb") as file, rdBase.BlockLogs():
+        for index, molecule in enumerate(read(file)):
+            if molecule is None or molecule.GetNumAtoms() == 0:
+                skipped += 1
+            else:
+                fingerprints.append(fingerprint(molecule))
+                encoded.append(Chem.MolToSmiles(molecule).encode())
+            if progress is not None and index % PROGRESS_STEP == 0:
+                progress(min(100 * file.tell() // size, 100))
+
+    matrix = np.array(fingerprints, dtype="<u8").reshape(-1, WORDS)
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(smiles) for smiles in encoded], out=offsets[1:])
+    write_columns(
+        path,
+        {
+            "fingerprints": matrix,
+            "bit_counts": count_bits(matrix),
+            "smiles_offsets": offsets,
+            "smiles_data": np.frombuffer(b"".join(encoded), np.uint8),
+        },
+        MAGIC,
+        COLUMNS,
+    )
+    return {
+        "stored": len(encoded),
+        "skipped": skipped,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+class Library:
+    """A library file mapped into memory."""
+    path: "str"
+    fingerprints: "NDArray[np.uint64]"
+    bit_counts: "NDArray[np.uint16]"
+
+    _columns: "dict[str, NDArray]"
+    _map: "mmap.mmap"
+
+    def __init__(self, path: "str | PathLike[str]") -> "None":
+        self.path = os.fspath(path)
+        with open(path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._columns = read_columns(self._map, MAGIC, COLUMNS, "library")
+        except ValueError:
+            self._map.close()
+            raise
+        self.fingerprints = self._columns["fingerprints"]
+        self.bit_counts = self._columns["bit_counts"]
+
+    def __len__(self) -> "int":
+        return len(self.bit_counts)
+
+    def smiles(self, index: "int") -> "str":
+        offsets = self._columns["smiles_offsets"]
+        start, end = int(offsets[index]), int(offsets[index + 1])
+        return bytes(self._columns["smiles_data"][start:end]).decode()
+
+    def search(
+        self, query: "NDArray[np.uint64]", k: "int" = 10
+    ) -> "list[tuple[int, float]]":
+        """Returns indices and similarities of the k records most like the query."""
+        query_count = int(count_bits(query))
+        indices: "list[NDArray[np.intp]]" = []
+        scores: "list[NDArray[np.float64]]" = []
+        for start in range(0, len(self), BLOCK_ROWS):
+            block = self.fingerprints[start:start + BLOCK_ROWS]
+            common = count_bits(block & query)
+            union = self.bit_counts[start:start + BLOCK_ROWS] + query_count - common
+            similarity = common / np.maximum(union, 1)
+            # only the best k of every block can be among the best k overall
+            if len(similarity) > k:
+                best = np.argpartition(similarity, -k)[-k:]
+            else:
+                best = np.arange(len(similarity))
+            indices.append(best + start)
+            scores.append(similarity[best])
+        if not indices:
+            return []
+        index, score = np.concatenate(indices), np.concatenate(scores)
+        order = np.argsort(-score, kind="stable")[:k]
+        return [(int(index[i]), float(score[i])) for i in order]
+
+    def close(self) -> "None":
+        self._columns = {}
+        del self.fingerprints, self.bit_counts
+        self._map.close()
+
+
+def library_path(source: "str | PathLike[str]") -> "str":
+    """Returns where the library of a structure file is kept."""
+    return os.path.splitext(source)[0] + SUFFIX
+
+
+def open_library(
+    path: "str | PathLike[str]",
+    progress: "Callable[[int], None] | None" = None,
+) -> "Library":
+    """Opens a library, or the library of a structure file.
+
+    The library of a structure file is built next to it, and built again
+    when the structure file is newer.
+    """
+    if os.path.splitext(path)[1].lower() == SUFFIX:
+        return Library(path)
+    built = library_path(path)
+    if not os.path.exists(built) or os.path.getmtime(built) < os.path.getmtime(path):
+        build_library(path, built, progress)
+    return Library(built)
+
+
+def main(argv: "list[str] | None" = None) -> "int":
+    parser = ArgumentParser(
+        prog="chi_editor library",
+        description="Fingerprints a SMILES or SDF file into a library for "
+        "similarity search.",
+    )
+    parser.add_argument("input", help="structure file, see chi_editor.importer")
+    parser.add_argument(
+        "-o", "--output", help=f"library file, the input with {SUFFIX} by default"
+    )
+    arguments = parser.parse_args(argv)
+
+    output = arguments.output or library_path(arguments.input)
+    try:
+        stats = build_library(arguments.input, output)
+    except (OSError, ValueError) as error:
+        print(f"chi_editor library: {error}", file=sys.stderr)
+        return 1
+    print(
+        f"stored {stats['stored']}, skipped {stats['skipped']} "
+        f"in {stats['seconds']:.2f} s to {output}"
+    )
+    return 0
@@ -0,0 +1,175 @@
+"""Side panel listing library structures similar to the molecule under the cursor.
+
+The library module brings RDKit along, so it's imported when a library is
+opened, not with the window.
+"""
+import os
+import time
+from typing import TYPE_CHECKING
+
+from PyQt6.QtCore import QPointF, Qt, QTimer
+from PyQt6.QtWidgets import (
+    QDockWidget,
+    QFileDialog,
+    QHBoxLayout,
+    QLabel,
+    QListWidget,
+    QListWidgetItem,
+    QMessageBox,
+    QProgressDialog,
+    QPushButton,
+    QSpinBox,
+    QVBoxLayout,
+    QWidget,
+)
+
+if TYPE_CHECKING:
+    from chi_editor.bases.molecule import Molecule
+    from chi_editor.canvas import Canvas
+    from chi_editor.library import Library
+
+# milliseconds the cursor rests on a molecule before it's searched for
+HOVER_DELAY = 150
+DEFAULT_HITS = 10
+MAX_HITS = 100
+# inserted hits are put this far right of the rightmost atom of the query
+INSERT_OFFSET = 600.0
+
+
+class BuildCanceled(Exception):
+    pass
+
+
+class LibraryPanel(QDockWidget):
+    canvas: "Canvas"
+    library: "Library | None"
+
+    _hits: "QListWidget"
+    _count: "QSpinBox"
+    _status: "QLabel"
+    _timer: "QTimer"
+
+    def __init__(self, canvas: "Canvas", parent: "QWidget | None" = None) -> "None":
+        super().__init__("Similar Structures", parent)
+        self.canvas = canvas
+        self.library = None
+
+        open_button = QPushButton("Open Library...")
+        open_button.clicked.connect(self.open_file)
+        self._count = QSpinBox()
+        self._count.setRange(1, MAX_HITS)
+        self._count.setValue(DEFAULT_HITS)
+        self._count.setPrefix("Top ")
+        self._count.valueChanged.connect(lambda _: self.search())
+        controls = QHBoxLayout()
+        controls.addWidget(open_button)
+        controls.addWidget(self._count)
+
+        self._status = QLabel("No library opened")
+        self._status.setWordWrap(True)
+        self._hits = QListWidget()
+        self._hits.itemActivated.connect(self.insert)
+        insert_button = QPushButton("Insert")
+        insert_button.clicked.connect(lambda: self.insert(self._hits.currentItem()))
+
+        layout = QVBoxLayout()
+        layout.addLayout(controls)
+        layout.addWidget(self._status)
+        layout.addWidget(self._hits)
+        layout.addWidget(insert_button)
+        contents = QWidget()
+        contents.setLayout(layout)
+        self.setWidget(contents)
+
+        # the cursor crosses many molecules on its way to the one it rests on
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(HOVER_DELAY)
+        self._timer.timeout.connect(self.search)
+        canvas.molecule_hovered.connect(self.hover)
+
+    def open_file(self) -> "None":
+        from chi_editor.importer import FILE_FILTER as STRUCTURES
+        from chi_editor.library import FILE_FILTER
+
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Open Library", "", f"{FILE_FILTER};;{STRUCTURES}"
+        )
+        if path:
+            self.open_library(path)
+
+    def open_library(self, path: "str") -> "None":
+        """Opens a library, building it first from a structure file if needed."""
+        from chi_editor.library import open_library
+
+        progress = QProgressDialog(f"Indexing {path}", "Cancel", 0, 100, self)
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setMinimumDuration(500)
+
+        def progressed(percent: "int") -> "None":
+            # a modal dialog runs the event loop while its value is set
+            progress.setValue(percent)
+            if progress.wasCanceled():
+                raise BuildCanceled
+
+        try:
+            library = open_library(path, progressed)
+        except BuildCanceled:
+            return
+        except (OSError, ValueError) as error:
+            QMessageBox.critical(self, "Open Library", f"Cannot open {path}: {error}")
+            return
+        finally:
+            progress.reset()
+        if self.library is not None:
+            self.library.close()
+        self.library = library
+        self._status.setText(
+            f"{os.path.basename(library.path)}: {len(library)} structures"
+        )
+        self.search()
+
+    def hover(self, molecule: "Molecule") -> "None":
+        if self.library is not None and self.isVisible():
+            self._timer.start()
+
+    def search(self) -> "None":
+        from chi_editor.library import fingerprint
+
+        # the canvas forgets the molecule when it's cleared
+        molecule = self.canvas.hovered_molecule
+        # and the molecule loses its atoms when they're erased
+        if self.library is None or molecule is None or not molecule.atoms:
+            return
+        start = time.perf_counter()
+        hits = self.library.search(
+            fingerprint(molecule.search_copy()[0]), self._count.value()
+        )
+        seconds = time.perf_counter() - start
+
+        self._hits.clear()
+        for index, similarity in hits:
+            smiles = self.library.smiles(index)
+            item = QListWidgetItem(f"{similarity:.2f}  {smiles}")
+            item.setData(Qt.ItemDataRole.UserRole, smiles)
+            self._hits.addItem(item)
+        self._status.setText(
+            f"{os.path.basename(self.library.path)}: top {len(hits)} of "
+            f"{len(self.library)} structures in {1000 * seconds:.1f} ms"
+        )
+
+    def insert(self, item: "QListWidgetItem | None") -> "None":
+        """Puts the structure of the hit next to the molecule it's similar to."""
+        from chi_editor.toolbar.tools.smiles import insert_smiles
+
+        if item is None:
+            return
+        query = self.canvas.hovered_molecule
+        if query is not None and query.atoms:
+            position = QPointF(
+                max(atom.x() for atom in query.atoms) + INSERT_OFFSET,
+                query.center().y(),
+            )
+        else:
+            position = self.canvas.sceneRect().center()
+        insert_smiles(self.canvas, item.data(Qt.ItemDataRole.UserRole), position)
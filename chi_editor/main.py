@@ -1,12 +1,73 @@
 import sys
+from argparse import ArgumentParser
 
-from PyQt6.QtWidgets import QApplication
-
-from chi_editor.editor import Editor
+from chi_editor.startup import StartupReport
 
 
 def main():
-    application = QApplication(sys.argv)
-    window = Editor()
-    window.show()
-    sys.exit(application.exec())
+    if sys.argv[1:2] == ["render"]:
+        from chi_editor.render import main as render
+
+        sys.exit(render(sys.argv[2:]))
+    if sys.argv[1:2] == ["library"]:
+        from chi_editor.library import main as library
+
+        sys.exit(library(sys.argv[2:]))
+
+    report = StartupReport()
+    with report.phase("imports"):
+        from PyQt6.QtWidgets import QApplication
+
+        from chi_editor.editor import VIEWPORT_UPDATE_MODES, Editor
+
+    parser = ArgumentParser(
+        prog="chi_editor",
+        epilog="run 'chi_editor render --help' to draw structure files headlessly, "
+        "'chi_editor library --help' to index them for similarity search",
+    )
+    parser.add_argument(
+        "--viewport-update",
+        choices=VIEWPORT_UPDATE_MODES,
+        default="minimal",
+        help="how the canvas view repaints itself after changes",
+    )
+    parser.add_argument(
+        "--layout-cache",
+        metavar="PATH",
+        help="SQLite file to keep computed 2D layouts in between sessions",
+    )
+    parser.add_argument(
+        "--profile-trace",
+        metavar="PATH",
+        help="record the session and write a Chrome trace of it on exit",
+    )
+    parser.add_argument(
+        "--startup-report",
+        action="store_true",
+        help="print how long the startup phases took to stderr",
+    )
+    # the rest is left for Qt
+    arguments, qt_arguments = parser.parse_known_args()
+    report.enabled = arguments.startup_report
+
+    if arguments.layout_cache:
+        from chi_editor import layout_cache
+
+        layout_cache.configure(arguments.layout_cache)
+
+    with report.phase("application"):
+        application = QApplication(sys.argv[:1] + qt_arguments)
+    with report.phase("window"):
+        window = Editor(viewport_update=arguments.viewport_update)
+    with report.phase("show"):
+        window.show()
+    # the chemistry stack is warmed up once the canvas is on screen
+    report.watch_first_paint(window.graphics_view.viewport())
+    if arguments.profile_trace:
+        window.profile_record_action.setChecked(True)
+    status = application.exec()
+    if arguments.profile_trace:
+        from chi_editor.profiler import profiler
+
+        profiler().save_trace(arguments.profile_trace)
+    sys.exit(status)
@@ -1,32 +1,34 @@
+from typing import TYPE_CHECKING
+
 from rdkit import Chem
 
-from chi_editor.bases.alpha_atom import AlphaAtom
-from chi_editor.bases.molecule.molecule import Molecule
+from chi_editor.bases.molecule.molecule import BOND_TYPES, Molecule
+
+if TYPE_CHECKING:
+    from numpy.typing import ArrayLike
 
+    from chi_editor.document import Document
 
-def mol_from_graphs(molecule: Molecule):
+
+def mol_from_document(
+    document: "Document", atom_ids: "ArrayLike | None" = None
+) -> Chem.Mol:
     # create empty editable mol object
     mol = Chem.RWMol()
 
-    atom_to_index: dict[AlphaAtom, int] = {}
-    # add atoms to mol and keep track of index
-    for atom in molecule.atoms:
-        atom_to_index[atom] = mol.AddAtom(Chem.Atom(atom.text))
-
-    # add bonds between adjacent atoms
-    for atom in atom_to_index:
-        for line in atom.lines:
-            atom1: int = atom_to_index[line.vertex1]
-            atom2: int = atom_to_index[line.vertex2]
-            if mol.GetBondBetweenAtoms(atom1, atom2) is None:
-                bond_type: Chem.rdchem.BondType = {
-                    line.multiplicity == 1: Chem.BondType.SINGLE,
-                    line.multiplicity == 2: Chem.BondType.DOUBLE,
-                    line.multiplicity == 3: Chem.BondType.TRIPLE,
-                }[True]
-                mol.AddBond(atom1, atom2, bond_type)
+    # atoms and bonds are taken from the arrays in one go,
+    # the mol gets atoms in the order of the given ids
+    atom_ids, bond_ids, pairs = document.compact(atom_ids)
+    for code in document.elements[atom_ids].tolist():
+        mol.AddAtom(Chem.Atom(document.symbols[code]))
+    orders = document.bond_orders[bond_ids].tolist()
+    for (atom1, atom2), order in zip(pairs.tolist(), orders):
+        mol.AddBond(atom1, atom2, BOND_TYPES[order])
 
     # Convert RWMol to Mol object
-    mol = mol.GetMol()
+    return mol.GetMol()
+
 
-    return mol
+def mol_from_graphs(molecule: Molecule) -> Chem.Mol:
+    # the molecule keeps its RDKit mirror up to date, only a copy is made
+    return Chem.Mol(molecule.rwmol)
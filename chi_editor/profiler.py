@@ -0,0 +1,276 @@
+"""Opt-in timing of the hot paths of the editor.
+
+While the profiler is off nothing is wrapped and the hot paths run their own
+code, the canvas only checks a flag once per frame. Turning it on replaces
+the methods listed in HOOKS with timed wrappers, which record every call for
+a Chrome trace (chrome://tracing, Perfetto) and sum the calls up for the HUD.
+Chemistry tasks are recorded from their submission to the delivery of their
+result, on a lane of their own.
+"""
+import functools
+import json
+import os
+import threading
+from collections import deque
+from importlib import import_module
+from time import perf_counter_ns
+from typing import TYPE_CHECKING
+
+from PyQt6.QtCore import QTimer
+from PyQt6.QtGui import QFont
+from PyQt6.QtWidgets import QLabel
+
+if TYPE_CHECKING:
+    from os import PathLike
+    from typing import Any, Callable
+
+    from PyQt6.QtWidgets import QWidget
+
+    from chi_editor.canvas import Canvas
+
+# module, class, method and trace category of the wrapped methods
+HOOKS: "tuple[tuple[str, str, str, str], ...]" = (
+    ("chi_editor.canvas", "Canvas", "mousePressEvent", "input"),
+    ("chi_editor.canvas", "Canvas", "mouseMoveEvent", "input"),
+    ("chi_editor.canvas", "Canvas", "mouseReleaseEvent", "input"),
+    ("chi_editor.bases.molecule.molecule", "Molecule", "add_atom", "molecule"),
+    ("chi_editor.bases.molecule.molecule", "Molecule", "remove_atom", "molecule"),
+    ("chi_editor.bases.molecule.molecule", "Molecule", "add_bond", "molecule"),
+    ("chi_editor.bases.molecule.molecule", "Molecule", "remove_bond", "molecule"),
+    ("chi_editor.bases.molecule.molecule", "Molecule", "merge", "molecule"),
+    ("chi_editor.bases.molecule.molecule", "Molecule", "split", "molecule"),
+    ("chi_editor.geometry_updates", "GeometryUpdates", "flush", "geometry"),
+    ("chi_editor.bases.line", "Line", "update_geometry", "geometry"),
+    ("chi_editor.bases.alpha_atom", "AlphaAtom", "paint", "paint"),
+    ("chi_editor.bases.line", "Line", "paint", "paint"),
+    ("chi_editor.bases.molecule.molecule_anchor", "MoleculeAnchor", "paint", "paint"),
+    ("chi_editor.bases.placeholder", "Placeholder", "paint", "paint"),
+)
+# recorded calls kept for the trace, the oldest are dropped past it
+MAX_EVENTS = 1_000_000
+# milliseconds between refreshes of the HUD, timings are summed over it
+HUD_INTERVAL = 500
+# hooks listed by the HUD, the slowest first
+HUD_HOOKS = 12
+
+# name, category, start and end in nanoseconds
+Event = tuple[str, str, int, int]
+
+
+class Profiler:
+    """Calls of the hooked methods and frames of the canvas."""
+    enabled: "bool"
+    events: "deque[Event]"
+    # chemistry tasks from submission to delivery, they overlap freely
+    tasks: "deque[Event]"
+    # calls and nanoseconds by hook, and frame durations, since take_window
+    window: "dict[str, list[int]]"
+    frames: "list[int]"
+
+    _originals: "dict[tuple[type, str], Callable | None]"
+    _origin: "int"
+    _frame_start: "int | None"
+
+    def __init__(self, max_events: "int" = MAX_EVENTS) -> "None":
+        self.enabled = False
+        self.events = deque(maxlen=max_events)
+        self.tasks = deque(maxlen=max_events)
+        self.window = {}
+        self.frames = []
+        self._originals = {}
+        self._origin = perf_counter_ns()
+        self._frame_start = None
+
+    def enable(self) -> "None":
+        if self.enabled:
+            return
+        self.enabled = True
+        for module, class_name, method, category in HOOKS:
+            owner = getattr(import_module(module), class_name)
+            self._wrap(owner, method, self._timed(
+                getattr(owner, method), f"{class_name}.{method}", category
+            ))
+        executor = import_module("chi_editor.chemistry").ChemistryExecutor
+        self._wrap(executor, "submit", self._timed_submit(executor.submit))
+
+    def disable(self) -> "None":
+        self.enabled = False
+        self._frame_start = None
+        for (owner, method), original in self._originals.items():
+            if original is None:
+                delattr(owner, method)
+            else:
+                setattr(owner, method, original)
+        self._originals.clear()
+
+    def clear(self) -> "None":
+        self.events.clear()
+        self.tasks.clear()
+        self.take_window()
+
+    def _wrap(self, owner: "type", method: "str", wrapper: "Callable") -> "None":
+        # inherited methods are wrapped on the class and deleted afterwards
+        self._originals[owner, method] = owner.__dict__.get(method)
+        setattr(owner, method, wrapper)
+
+    def _timed(
+        self, function: "Callable", name: "str", category: "str"
+    ) -> "Callable":
+        @functools.wraps(function)
+        def timed(*args: "Any", **kwargs: "Any") -> "Any":
+            start = perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.add(name, category, start, perf_counter_ns())
+
+        return timed
+
+    def _timed_submit(self, submit: "Callable") -> "Callable":
+        @functools.wraps(submit)
+        def timed_submit(
+            executor: "Any",
+            task: "Callable",
+            *args: "Any",
+            callback: "Callable[[Any], None]",
+        ) -> "Any":
+            name = f"chemistry.{task.__name__}"
+            submitted = perf_counter_ns()
+
+            def timed_callback(result: "Any") -> "None":
+                delivered = perf_counter_ns()
+                self.tasks.append((name, "chemistry", submitted, delivered))
+                try:
+                    callback(result)
+                finally:
+                    self.add(f"{name} callback", "chemistry", delivered,
+                             perf_counter_ns())
+
+            return submit(executor, task, *args, callback=timed_callback)
+
+        return timed_submit
+
+    def add(self, name: "str", category: "str", start: "int", end: "int") -> "None":
+        self.events.append((name, category, start, end))
+        totals = self.window.get(name)
+        if totals is None:
+            self.window[name] = [1, end - start]
+        else:
+            totals[0] += 1
+            totals[1] += end - start
+
+    def frame_started(self) -> "None":
+        self._frame_start = perf_counter_ns()
+
+    def frame_finished(self) -> "None":
+        if self._frame_start is None:
+            return
+        end = perf_counter_ns()
+        self.events.append(("frame", "frame", self._frame_start, end))
+        self.frames.append(end - self._frame_start)
+        self._frame_start = None
+
+    def take_window(self) -> "tuple[dict[str, list[int]], list[int]]":
+        """Returns the hook totals and frames since the last call and resets them."""
+        window, frames = self.window, self.frames
+        self.window, self.frames = {}, []
+        return window, frames
+
+    def trace(self) -> "dict[str, Any]":
+        """Returns the recorded calls in the Chrome trace event format."""
+        pid = os.getpid()
+        tid = threading.main_thread().ident
+        events: "list[dict[str, Any]]" = [{
+            "name": "thread_name", "ph": "M", "pid": pid, "tid": tid,
+            "args": {"name": "GUI"},
+        }]
+        for name, category, start, end in self.events:
+            events.append({
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": (start - self._origin) / 1000,
+                "dur": (end - start) / 1000,
+                "pid": pid,
+                "tid": tid,
+            })
+        for index, (name, category, start, end) in enumerate(self.tasks):
+            for phase, time in (("b", start), ("e", end)):
+                events.append({
+                    "name": name,
+                    "cat": category,
+                    "ph": phase,
+                    "id": index,
+                    "ts": (time - self._origin) / 1000,
+                    "pid": pid,
+                    "tid": tid,
+                })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def save_trace(self, path: "str | PathLike[str]") -> "None":
+        with open(path, "w") as file:
+            json.dump(self.trace(), file)
+
+
+_profiler = Profiler()
+
+
+def profiler() -> "Profiler":
+    """Returns the profiler of this process."""
+    return _profiler
+
+
+class ProfilerHud(QLabel):
+    """Frame times, item counts and hook timings shown over the canvas view."""
+    canvas: "Canvas"
+
+    _timer: "QTimer"
+
+    def __init__(self, canvas: "Canvas", parent: "QWidget") -> "None":
+        super().__init__(parent)
+        self.canvas = canvas
+        font = QFont("monospace")
+        font.setStyleHint(QFont.StyleHint.Monospace)
+        self.setFont(font)
+        # opaque, so updating it doesn't repaint the canvas underneath
+        self.setStyleSheet(
+            "QLabel { background-color: rgb(32, 32, 32); color: white; "
+            "padding: 6px; }"
+        )
+        self.move(8, 8)
+        self._timer = QTimer(self)
+        self._timer.setInterval(HUD_INTERVAL)
+        self._timer.timeout.connect(self.refresh)
+        self.hide()
+
+    def setVisible(self, visible: "bool") -> "None":
+        super().setVisible(visible)
+        if visible:
+            profiler().take_window()
+            self.refresh()
+            self._timer.start()
+        else:
+            self._timer.stop()
+
+    def refresh(self) -> "None":
+        window, frames = profiler().take_window()
+        seconds = HUD_INTERVAL / 1000
+        if frames:
+            frame = (
+                f"frame {sum(frames) / len(frames) / 1e6:6.2f} ms avg, "
+                f"{max(frames) / 1e6:6.2f} ms max, {len(frames) / seconds:5.1f} fps"
+            )
+        else:
+            frame = "frame      - no repaints"
+        canvas = self.canvas
+        lines = [
+            frame,
+            f"items {len(canvas.items())}, atoms {len(canvas.atom_index)}, "
+            f"evicted molecules {len(canvas.tiles)}",
+            "",
+        ]
+        hooks = sorted(window.items(), key=lambda item: -item[1][1])[:HUD_HOOKS]
+        for name, (calls, total) in hooks:
+            lines.append(f"{name:<40} {calls:7d} {total / 1e6:9.2f} ms")
+        self.setText("\n".join(lines))
+        self.adjustSize()
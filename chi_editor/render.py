@@ -0,0 +1,187 @@
+"""Rendering of structure files to pictures without a window.
+
+Molecules are laid out and drawn by the same items as on the canvas, in
+worker processes running the offscreen Qt platform. Every worker writes its
+pictures straight to disk, only a few records are in flight at a time.
+"""
+import multiprocessing
+import os
+import sys
+import time
+from argparse import ArgumentParser
+from concurrent import futures
+from typing import TYPE_CHECKING
+
+from PyQt6.QtCore import QPointF, QRectF, QSize, Qt
+from PyQt6.QtGui import QImage, QPainter
+from PyQt6.QtSvg import QSvgGenerator
+from PyQt6.QtWidgets import QApplication
+
+from chi_editor import layout_cache
+from chi_editor.bases.alpha_atom import AlphaAtom
+from chi_editor.bases.line import Line
+from chi_editor.canvas import Canvas
+from chi_editor.importer import READERS, file_format, prepare
+from chi_editor.toolbar.tools.structure import put_molecule
+
+if TYPE_CHECKING:
+    from rdkit import Chem
+
+IMAGE_FORMATS = ("svg", "png")
+# room around the drawing, in scene units
+MARGIN = 20.0
+
+# application and canvas of the worker process, the canvas is reused
+_application: "QApplication | None" = None
+_canvas: "Canvas | None" = None
+
+
+def start_worker(cache_path: "str | None") -> "None":
+    global _application, _canvas
+    # workers never have a display
+    os.environ["QT_QPA_PLATFORM"] = "offscreen"
+    layout_cache.configure(cache_path)
+    _application = QApplication.instance() or QApplication([])
+    _canvas = Canvas()
+
+
+def render_molecule(
+    molecule: "Chem.Mol", path: "str", image_format: "str", scale: "float"
+) -> "str":
+    """Draws the molecule to the file, returns its path."""
+    canvas = _canvas
+    canvas.clear()
+    put_molecule(canvas, molecule, QPointF(0, 0))
+    canvas.geometry_updates.flush()
+
+    bounds = QRectF()
+    for item in canvas.items():
+        if isinstance(item, (AlphaAtom, Line)):
+            bounds = bounds.united(item.sceneBoundingRect())
+        else:
+            # anchors and such are for editing only
+            item.hide()
+    bounds.adjust(-MARGIN, -MARGIN, MARGIN, MARGIN)
+    width, height = round(bounds.width() * scale), round(bounds.height() * scale)
+    target = QRectF(0, 0, width, height)
+
+    if image_format == "svg":
+        device = QSvgGenerator()
+        device.setFileName(path)
+        device.setSize(QSize(width, height))
+        device.setViewBox(target)
+    else:
+        device = QImage(width, height, QImage.Format.Format_ARGB32_Premultiplied)
+        device.fill(Qt.GlobalColor.white)
+
+    painter = QPainter(device)
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    painter.setRenderHint(QPainter.RenderHint.TextAntialiasing)
+    canvas.render(painter, target, bounds)
+    painter.end()
+    if image_format != "svg" and not device.save(path):
+        raise OSError(f"cannot write {path}")
+    return path
+
+
+def render_file(
+    path: "str",
+    output: "str",
+    image_format: "str" = "svg",
+    workers: "int | None" = None,
+    scale: "float" = 1.0,
+    cache_path: "str | None" = None,
+) -> "dict[str, float]":
+    """Renders every record of the structure file into the output directory.
+
+    Pictures are named after the index of their record in the file.
+    Returns the numbers of rendered, skipped and failed records and the time
+    taken in seconds.
+    """
+    read = READERS[file_format(path)]
+    os.makedirs(output, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    stats = {"rendered": 0, "skipped": 0, "failed": 0, "seconds": 0.0}
+
+    def collect(done: "set[futures.Future]") -> "None":
+        for future in done:
+            target = pending.pop(future)
+            error = future.exception()
+            if error is None:
+                stats["rendered"] += 1
+            else:
+                stats["failed"] += 1
+                print(f"{target}: {error}", file=sys.stderr)
+
+    start = time.perf_counter()
+    pending: "dict[futures.Future, str]" = {}
+    with open(path, "rb") as file, futures.ProcessPoolExecutor(
+        workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=start_worker,
+        initargs=(cache_path,),
+    ) as pool:
+        for index, molecule in enumerate(prepare(read(file))):
+            if molecule is None:
+                stats["skipped"] += 1
+                continue
+            target = os.path.join(output, f"{index:06d}.{image_format}")
+            pending[pool.submit(
+                render_molecule, molecule, target, image_format, scale
+            )] = target
+            # records are read only as fast as the workers draw them
+            if len(pending) >= 4 * workers:
+                done, _ = futures.wait(pending, return_when=futures.FIRST_COMPLETED)
+                collect(done)
+        done, _ = futures.wait(pending)
+        collect(done)
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+def main(argv: "list[str] | None" = None) -> "int":
+    parser = ArgumentParser(
+        prog="chi_editor render",
+        description="Draws every structure of a SMILES or SDF file to a picture.",
+    )
+    parser.add_argument("input", help="structure file, see chi_editor.importer")
+    parser.add_argument(
+        "-o", "--output", default="render", help="directory to write pictures to"
+    )
+    parser.add_argument("--format", choices=IMAGE_FORMATS, default="svg")
+    parser.add_argument(
+        "--workers", type=int, help="number of worker processes, all cores by default"
+    )
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="size of the pictures relative to the canvas",
+    )
+    parser.add_argument(
+        "--layout-cache",
+        metavar="PATH",
+        help="SQLite file to keep computed 2D layouts in between runs",
+    )
+    arguments = parser.parse_args(argv)
+
+    try:
+        stats = render_file(
+            arguments.input,
+            arguments.output,
+            arguments.format,
+            arguments.workers,
+            arguments.scale,
+            arguments.layout_cache,
+        )
+    except (OSError, ValueError) as error:
+        print(f"chi_editor render: {error}", file=sys.stderr)
+        return 1
+
+    rate = stats["rendered"] / stats["seconds"] if stats["seconds"] else 0.0
+    print(
+        f"rendered {stats['rendered']}, skipped {stats['skipped']}, "
+        f"failed {stats['failed']} in {stats['seconds']:.2f} s "
+        f"({rate:.1f} molecules/s)"
+    )
+    return 0 if stats["failed"] == 0 else 1
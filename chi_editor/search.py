@@ -0,0 +1,130 @@
+"""Substructure search over the molecules of a canvas.
+
+Every molecule keeps a copy of its structure prepared for matching, with the
+pattern fingerprint of the copy, until it's edited again. A query is first
+compared with the fingerprints: a molecule lacking any bit set for the query
+can't contain it, so only the few remaining molecules are matched atom by
+atom.
+"""
+import time
+from typing import TYPE_CHECKING
+
+from rdkit import Chem, DataStructs, rdBase
+
+from chi_editor.bases.molecule.molecule import PATTERN_FINGERPRINT_SIZE
+
+if TYPE_CHECKING:
+    from chi_editor.bases.alpha_atom import AlphaAtom
+    from chi_editor.bases.line import Line
+    from chi_editor.bases.molecule import Molecule
+    from chi_editor.canvas import Canvas
+
+# matches highlighted per molecule, symmetric queries match many times
+MAX_MATCHES = 1000
+
+
+def parse_query(text: "str") -> "Chem.Mol":
+    """Reads a SMILES, or a SMARTS if the text is not valid SMILES."""
+    text = text.strip()
+    if not text:
+        raise ValueError("the query is empty")
+    # parse errors are reported by the exception instead of RDKit's log
+    with rdBase.BlockLogs():
+        query = Chem.MolFromSmiles(text)
+        # bracket atoms such as [#7] read as SMILES are radicals matching nothing
+        if query is None or any(
+            atom.GetNumRadicalElectrons() for atom in query.GetAtoms()
+        ):
+            query = Chem.MolFromSmarts(text)
+    if query is None:
+        raise ValueError(f"{text!r} is neither SMILES nor SMARTS")
+    return query
+
+
+class SubstructureSearch:
+    """Highlights the atoms and bonds of a canvas matching a query."""
+    canvas: "Canvas"
+    # molecules compared, rejected by their fingerprints and matching the
+    # query in the last search, and the time it took in seconds
+    screened: "int"
+    rejected: "int"
+    matched: "int"
+    seconds: "float"
+
+    _atoms: "list[AlphaAtom]"
+    _lines: "list[Line]"
+
+    def __init__(self, canvas: "Canvas") -> "None":
+        self.canvas = canvas
+        self.screened = self.rejected = self.matched = 0
+        self.seconds = 0.0
+        self._atoms = []
+        self._lines = []
+
+    def run(self, text: "str") -> "list[Molecule]":
+        """Highlights every match of the query, returns the matching molecules.
+
+        Only molecules on the canvas are searched, not the evicted ones.
+        """
+        query = parse_query(text)
+        start = time.perf_counter()
+        query_fingerprint = Chem.PatternFingerprint(query, PATTERN_FINGERPRINT_SIZE)
+        self.clear()
+
+        found = []
+        molecules = {atom.molecule: None for atom in self.canvas.atom_index}
+        for molecule in molecules:
+            copy, fingerprint = molecule.search_copy()
+            if not DataStructs.AllProbeBitsMatch(query_fingerprint, fingerprint):
+                self.rejected += 1
+                continue
+            matches = copy.GetSubstructMatches(
+                query, uniquify=True, maxMatches=MAX_MATCHES
+            )
+            if matches:
+                self._highlight(molecule, query, matches)
+                found.append(molecule)
+
+        self.screened = len(molecules)
+        self.matched = len(found)
+        self.seconds = time.perf_counter() - start
+        return found
+
+    def _highlight(
+        self,
+        molecule: "Molecule",
+        query: "Chem.Mol",
+        matches: "tuple[tuple[int, ...], ...]",
+    ) -> "None":
+        atoms = molecule.indexed_atoms
+        bonds = [
+            (bond.GetBeginAtomIdx(), bond.GetEndAtomIdx())
+            for bond in query.GetBonds()
+        ]
+        for match in matches:
+            for index in match:
+                atom = atoms[index]
+                if not atom.highlighted:
+                    atom.set_highlighted(True)
+                    self._atoms.append(atom)
+            for begin, end in bonds:
+                first, second = atoms[match[begin]], atoms[match[end]]
+                for line in first.lines:
+                    if line.vertex2 is second or line.vertex1 is second:
+                        if not line.highlighted:
+                            line.set_highlighted(True)
+                            self._lines.append(line)
+                        break
+
+    def clear(self) -> "None":
+        """Removes the highlights of the last search."""
+        for item in (*self._atoms, *self._lines):
+            item.set_highlighted(False)
+        self._atoms.clear()
+        self._lines.clear()
+        self.screened = self.rejected = self.matched = 0
+
+    def discard(self) -> "None":
+        """Forgets the highlighted items, for when they are deleted."""
+        self._atoms.clear()
+        self._lines.clear()
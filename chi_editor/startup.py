@@ -0,0 +1,131 @@
+"""Startup timing and the background warm-up of the chemistry stack.
+
+The window is shown before the chemistry modules are imported: tools are
+imported when first chosen, and the modules behind the structure tools and
+the importer are imported by a background thread once the window has
+painted, so the first use of a tool usually finds them ready. datamol is
+only imported by the worker processes that clean up molecules.
+"""
+import importlib
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
+
+from PyQt6.QtCore import QEvent, QObject, QTimer
+
+if TYPE_CHECKING:
+    from typing import Iterable, Iterator
+
+    from PyQt6.QtWidgets import QWidget
+
+# imported in the background after the first paint
+CHEMISTRY_MODULES = (
+    "chi_editor.chemistry",
+    "chi_editor.importer",
+    "chi_editor.toolbar.tools.structure",
+    "chi_editor.toolbar.tools.smiles",
+)
+
+
+class StartupReport(QObject):
+    """Durations of the startup phases and the packages each one imported.
+
+    Times are counted from the creation of the report. The report is
+    written to stderr on the first paint of the watched widget, the warm-up
+    adds its own line when it's done.
+    """
+    enabled: "bool"
+    # name, start and end in seconds, imported packages with module counts
+    phases: "list[tuple[str, float, float, dict[str, int]]]"
+
+    _start: "float"
+    _widget: "QWidget | None"
+    # when the widget started to be watched and the modules imported by then
+    _watch_start: "float"
+    _watch_modules: "set[str]"
+
+    def __init__(self, enabled: "bool" = False) -> "None":
+        super().__init__()
+        self.enabled = enabled
+        self.phases = []
+        self._start = time.perf_counter()
+        self._widget = None
+        self._watch_start = 0.0
+        self._watch_modules = set()
+
+    @contextmanager
+    def phase(self, name: "str") -> "Iterator[None]":
+        modules = set(sys.modules)
+        start = time.perf_counter()
+        yield
+        self.record(name, start, modules)
+
+    def record(self, name: "str", start: "float", modules: "set[str]") -> "None":
+        packages: "dict[str, int]" = {}
+        for module in sys.modules.keys() - modules:
+            package = module.partition(".")[0]
+            if package in sys.stdlib_module_names:
+                package = "stdlib"
+            packages[package] = packages.get(package, 0) + 1
+        self.phases.append(
+            (name, start - self._start, time.perf_counter() - self._start, packages)
+        )
+
+    def format(self, phases: "Iterable[tuple] | None" = None) -> "str":
+        lines = []
+        for name, start, end, packages in phases or self.phases:
+            imported = ", ".join(
+                f"{package} ({count})"
+                for package, count in sorted(packages.items(), key=lambda p: -p[1])
+            )
+            lines.append(
+                f"{name:<20} {1000 * (end - start):8.1f} ms"
+                f"  at {1000 * end:8.1f} ms"
+                + (f"  imported {imported}" if imported else "")
+            )
+        return "\n".join(lines)
+
+    def show(self, phases: "Iterable[tuple] | None" = None) -> "None":
+        if self.enabled:
+            print(self.format(phases), file=sys.stderr)
+
+    def watch_first_paint(self, widget: "QWidget") -> "None":
+        """Ends the startup on the first paint of the widget, then warms up."""
+        self._widget = widget
+        self._watch_modules = set(sys.modules)
+        self._watch_start = time.perf_counter()
+        widget.installEventFilter(self)
+
+    def eventFilter(self, watched: "QObject", event: "QEvent") -> "bool":
+        if watched is self._widget and event.type() == QEvent.Type.Paint:
+            self._widget.removeEventFilter(self)
+            self._widget = None
+            # the paint itself is done once control is back in the event loop
+            QTimer.singleShot(0, self._painted)
+        return False
+
+    def _painted(self) -> "None":
+        self.record("first paint", self._watch_start, self._watch_modules)
+        self.show()
+        warm_up(report=self)
+
+
+def warm_up(
+    modules: "Iterable[str]" = CHEMISTRY_MODULES,
+    report: "StartupReport | None" = None,
+) -> "threading.Thread":
+    """Imports the modules in a background thread."""
+    def run() -> "None":
+        before = set(sys.modules)
+        start = time.perf_counter()
+        for module in modules:
+            importlib.import_module(module)
+        if report is not None:
+            report.record("chemistry warm-up", start, before)
+            report.show(report.phases[-1:])
+
+    thread = threading.Thread(target=run, name="chemistry warm-up", daemon=True)
+    thread.start()
+    return thread
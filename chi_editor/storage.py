@@ -0,0 +1,301 @@
+"""Native document format of the editor.
+
+A file starts with a header and a table of named columns, followed by the
+columns themselves as raw little-endian arrays aligned to ALIGNMENT bytes::
+
+    header:  magic (8 bytes), format version (u32), number of columns (u32)
+    column:  name (16 bytes), dtype (8 bytes), rows (u64), width (u64),
+             offset (u64)
+
+Atoms and bonds are sorted by molecule, so the atoms and the bonds of one
+molecule are contiguous ranges given by the molecule offset columns. Opening
+a file maps it into memory and views the columns in place, nothing is parsed
+until molecules are materialized.
+"""
+import mmap
+import struct
+from typing import TYPE_CHECKING
+
+import numpy as np
+from PyQt6.QtCore import QRectF
+
+from chi_editor.bases.alpha_atom import AlphaAtom
+from chi_editor.bases.molecule import Molecule
+from chi_editor.bases.sources import BASIC_RECTANGLE
+from chi_editor.chem_bonds import BOND_CLASSES
+from chi_editor.toolbar.tools.text import TextItem
+
+if TYPE_CHECKING:
+    from os import PathLike
+
+    from numpy.typing import NDArray
+
+    from chi_editor.bases.line import Line
+    from chi_editor.canvas import Canvas
+
+MAGIC = b"CHIDOC\x00\x00"
+VERSION = 1
+ALIGNMENT = 64
+
+HEADER = struct.Struct("<8sII")
+COLUMN = struct.Struct("<16s8sQQQ")
+
+# dtypes of the columns, a width of 1 means a flat column
+COLUMNS: "dict[str, tuple[str, int]]" = {
+    "symbols": ("|u1", 1),
+    "atom_elements": ("<i2", 1),
+    "atom_coordinates": ("<f8", 2),
+    "bond_atoms": ("<i4", 2),
+    "bond_orders": ("|i1", 1),
+    "bond_wedges": ("|u1", 1),
+    "molecule_atoms": ("<i8", 1),
+    "molecule_bonds": ("<i8", 1),
+    "molecule_bounds": ("<f8", 4),
+    "text_positions": ("<f8", 2),
+    "text_offsets": ("<i8", 1),
+    "text_data": ("|u1", 1),
+}
+
+
+def save_canvas(canvas: "Canvas", path: "str | PathLike[str]") -> "None":
+    """Writes atoms, bonds, molecules and text items of the canvas to a file."""
+    document = canvas.document
+
+    groups: "dict[Molecule, list[int]]" = {}
+    for atom_id in document.live_atoms().tolist():
+        item = document.atom_items[atom_id]
+        groups.setdefault(item.molecule, []).append(atom_id)
+    sizes = np.array([len(atom_ids) for atom_ids in groups.values()], dtype=np.int64)
+    molecule_atoms = np.zeros(len(sizes) + 1, dtype=np.int64)
+    np.cumsum(sizes, out=molecule_atoms[1:])
+
+    order = [atom_id for atom_ids in groups.values() for atom_id in atom_ids]
+    atom_ids, bond_ids, pairs = document.compact(np.array(order, dtype=np.intp))
+    coordinates = document.coordinates[atom_ids]
+
+    # bonds follow the molecule of their first atom
+    atom_molecules = np.repeat(np.arange(len(sizes)), sizes)
+    bond_molecules = atom_molecules[pairs[:, 0]]
+    bond_order = np.argsort(bond_molecules, kind="stable")
+    molecule_bonds = np.zeros(len(sizes) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(bond_molecules, minlength=len(sizes)), out=molecule_bonds[1:])
+
+    molecule_bounds = np.zeros((len(sizes), 4), dtype=np.float64)
+    if len(sizes):
+        starts = molecule_atoms[:-1]
+        molecule_bounds[:, :2] = np.minimum.reduceat(coordinates, starts)
+        molecule_bounds[:, 2:] = np.maximum.reduceat(coordinates, starts)
+        molecule_bounds[:, 2:] += BASIC_RECTANGLE.width(), BASIC_RECTANGLE.height()
+
+    texts = [
+        item for item in canvas.items()
+        if isinstance(item, TextItem) and item.parentItem() is None
+    ]
+    encoded = [item.toPlainText().encode() for item in texts]
+    text_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(text) for text in encoded], out=text_offsets[1:])
+
+    columns = {
+        "symbols": np.frombuffer("\n".join(document.symbols).encode(), np.uint8),
+        "atom_elements": document.elements[atom_ids],
+        "atom_coordinates": coordinates,
+        "bond_atoms": pairs[bond_order],
+        "bond_orders": document.bond_orders[bond_ids][bond_order],
+        "bond_wedges": document.bond_wedges[bond_ids][bond_order],
+        "molecule_atoms": molecule_atoms,
+        "molecule_bonds": molecule_bonds,
+        "molecule_bounds": molecule_bounds,
+        "text_positions": np.array(
+            [(item.x(), item.y()) for item in texts], dtype=np.float64
+        ).reshape(-1, 2),
+        "text_offsets": text_offsets,
+        "text_data": np.frombuffer(b"".join(encoded), np.uint8),
+    }
+    write_columns(path, columns)
+
+
+def write_columns(
+    path: "str | PathLike[str]",
+    columns: "dict[str, NDArray]",
+    magic: "bytes" = MAGIC,
+    specs: "dict[str, tuple[str, int]]" = COLUMNS,
+) -> "None":
+    """Writes the columns in the layout above, other formats reuse it."""
+    offset = _align(HEADER.size + COLUMN.size * len(columns))
+    table, arrays = [], []
+    for name, array in columns.items():
+        dtype, width = specs[name]
+        array = np.ascontiguousarray(array, dtype=dtype)
+        rows = len(array)
+        table.append(
+            COLUMN.pack(name.encode(), dtype.encode(), rows, width, offset)
+        )
+        arrays.append((offset, array))
+        offset = _align(offset + array.nbytes)
+
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(magic, VERSION, len(columns)))
+        file.write(b"".join(table))
+        for offset, array in arrays:
+            file.write(b"\x00" * (offset - file.tell()))
+            file.write(array.tobytes())
+
+
+class DocumentFile:
+    """A saved document mapped into memory.
+
+    Molecules and text items are created on demand, either all at once or
+    only those within a region of the scene, and every one of them at most
+    once.
+    """
+    columns: "dict[str, NDArray]"
+    symbols: "list[str]"
+    # which molecules and text items were created already
+    molecules_done: "NDArray[np.bool_]"
+    texts_done: "NDArray[np.bool_]"
+
+    _map: "mmap.mmap"
+
+    def __init__(self, path: "str | PathLike[str]") -> "None":
+        with open(path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self.columns = read_columns(self._map)
+        except ValueError:
+            self._map.close()
+            raise
+        self.symbols = bytes(self.columns["symbols"]).decode().split("\n")
+        self.molecules_done = np.zeros(self.molecule_count, dtype=np.bool_)
+        self.texts_done = np.zeros(self.text_count, dtype=np.bool_)
+
+    @property
+    def molecule_count(self) -> "int":
+        return len(self.columns["molecule_bounds"])
+
+    @property
+    def text_count(self) -> "int":
+        return len(self.columns["text_positions"])
+
+    @property
+    def is_complete(self) -> "bool":
+        return bool(self.molecules_done.all() and self.texts_done.all())
+
+    def bounds(self) -> "QRectF":
+        """Returns the rectangle containing every molecule and text item."""
+        points = np.concatenate((
+            self.columns["molecule_bounds"].reshape(-1, 2),
+            self.columns["text_positions"],
+        ))
+        if not len(points):
+            return QRectF()
+        (min_x, min_y), (max_x, max_y) = points.min(axis=0), points.max(axis=0)
+        return QRectF(min_x, min_y, max_x - min_x, max_y - min_y)
+
+    def materialize(self, canvas: "Canvas", region: "QRectF | None" = None) -> "int":
+        """Creates missing items intersecting the region, or all of them.
+
+        Returns the number of molecules created.
+        """
+        molecules = ~self.molecules_done
+        texts = ~self.texts_done
+        if region is not None:
+            left, top = region.left(), region.top()
+            right, bottom = region.right(), region.bottom()
+            bounds = self.columns["molecule_bounds"]
+            molecules &= (
+                (bounds[:, 0] <= right) & (bounds[:, 2] >= left)
+                & (bounds[:, 1] <= bottom) & (bounds[:, 3] >= top)
+            )
+            positions = self.columns["text_positions"]
+            texts &= (
+                (positions[:, 0] >= left) & (positions[:, 0] <= right)
+                & (positions[:, 1] >= top) & (positions[:, 1] <= bottom)
+            )
+
+        created = np.flatnonzero(molecules)
+        for index in created.tolist():
+            canvas.add_items(self.create_molecule(index))
+        self.molecules_done[created] = True
+
+        offsets = self.columns["text_offsets"]
+        data = self.columns["text_data"]
+        for index in np.flatnonzero(texts).tolist():
+            text = TextItem()
+            text.setPlainText(
+                bytes(data[offsets[index]:offsets[index + 1]]).decode()
+            )
+            text.setPos(*self.columns["text_positions"][index].tolist())
+            canvas.addItem(text)
+        self.texts_done[texts] = True
+        return len(created)
+
+    def create_molecule(self, index: "int") -> "list":
+        """Creates atoms, bonds and the anchor of one molecule."""
+        columns = self.columns
+        first_atom, last_atom = columns["molecule_atoms"][index:index + 2].tolist()
+        first_bond, last_bond = columns["molecule_bonds"][index:index + 2].tolist()
+
+        atoms: "list[AlphaAtom]" = []
+        group = Molecule()
+        with group.batch():
+            elements = columns["atom_elements"][first_atom:last_atom].tolist()
+            points = columns["atom_coordinates"][first_atom:last_atom].tolist()
+            for element, (x, y) in zip(elements, points):
+                atom = AlphaAtom(self.symbols[element], molecule=group)
+                atom.setPos(x, y)
+                atoms.append(atom)
+
+        bonds: "list[Line]" = []
+        pairs = columns["bond_atoms"][first_bond:last_bond] - first_atom
+        orders = columns["bond_orders"][first_bond:last_bond].tolist()
+        wedges = columns["bond_wedges"][first_bond:last_bond].tolist()
+        for (start, end), order, wedge in zip(pairs.tolist(), orders, wedges):
+            start_atom, end_atom = atoms[start], atoms[end]
+            bond = BOND_CLASSES[order, bool(wedge)](start_atom, end_atom)
+            start_atom.add_line(bond)
+            end_atom.add_line(bond)
+            group.add_bond(bond)
+            bonds.append(bond)
+        return [*atoms, *bonds, group.anchor]
+
+    def close(self) -> "None":
+        # views into the map have to go before the map itself
+        self.columns = {}
+        self._map.close()
+
+
+def read_columns(
+    buffer: "mmap.mmap",
+    magic: "bytes" = MAGIC,
+    specs: "dict[str, tuple[str, int]]" = COLUMNS,
+    kind: "str" = "document",
+) -> "dict[str, NDArray]":
+    """Returns views of the columns of a mapped file without copying them."""
+    if len(buffer) < HEADER.size or HEADER.unpack_from(buffer)[0] != magic:
+        raise ValueError(f"not a Chi {kind}")
+    _, version, count = HEADER.unpack_from(buffer)
+    if version > VERSION:
+        raise ValueError(f"unsupported {kind} version {version}")
+
+    table = {}
+    for index in range(count):
+        name, dtype, rows, width, offset = COLUMN.unpack_from(
+            buffer, HEADER.size + COLUMN.size * index
+        )
+        dtype = np.dtype(dtype.rstrip(b"\x00").decode())
+        if offset + dtype.itemsize * rows * width > len(buffer):
+            raise ValueError(f"{kind} is truncated")
+        table[name.rstrip(b"\x00").decode()] = dtype, rows, width, offset
+    missing = specs.keys() - table.keys()
+    if missing:
+        raise ValueError(f"{kind} misses columns: {', '.join(sorted(missing))}")
+
+    columns = {}
+    for name, (dtype, rows, width, offset) in table.items():
+        array = np.frombuffer(buffer, dtype=dtype, count=rows * width, offset=offset)
+        columns[name] = array.reshape(rows, width) if width > 1 else array
+    return columns
+
+
+def _align(offset: "int") -> "int":
+    return -(-offset // ALIGNMENT) * ALIGNMENT
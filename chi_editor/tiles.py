@@ -0,0 +1,259 @@
+"""Eviction of molecules far from the view.
+
+The canvas is split into square tiles. Once the live atoms take more than
+the memory budget, molecules in the tiles farthest from the view are taken
+off the canvas and kept as a few arrays; they are put back when the view
+comes near one of their tiles. The history refers to evicted atoms and bonds
+through stand-ins, so the items themselves are freed; items still referenced
+elsewhere are put back as they were, the others are created anew.
+"""
+import weakref
+from math import floor, hypot
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from chi_editor.history import attach, detach
+
+if TYPE_CHECKING:
+    from typing import Iterable
+
+    from numpy.typing import NDArray
+    from PyQt6.QtCore import QRectF
+
+    from chi_editor.bases.alpha_atom import AlphaAtom
+    from chi_editor.bases.line import Line
+    from chi_editor.bases.molecule import Molecule
+    from chi_editor.canvas import Canvas
+
+TILE_SIZE = 2048.0
+# rough memory taken by a live atom with its bonds and index entries
+ATOM_BYTES = 1024
+
+Tile = tuple[int, int]
+
+
+class EvictedItem:
+    """Stands for an atom or a bond of an evicted molecule in the history."""
+    __slots__ = ("molecule", "vertex1", "vertex2")
+
+    molecule: "EvictedMolecule"
+    # stand-ins of the atoms of a bond, like the atoms of a line
+    vertex1: "EvictedItem | None"
+    vertex2: "EvictedItem | None"
+
+    def __init__(
+        self,
+        molecule: "EvictedMolecule",
+        vertex1: "EvictedItem | None" = None,
+        vertex2: "EvictedItem | None" = None,
+    ) -> "None":
+        self.molecule = molecule
+        self.vertex1 = vertex1
+        self.vertex2 = vertex2
+
+
+class EvictedMolecule:
+    """Atoms and bonds of a molecule taken off the canvas."""
+    symbols: "list[str]"
+    coordinates: "NDArray[np.float64]"
+    bonds: "NDArray[np.int32]"
+    atom_type: "type[AlphaAtom]"
+    bond_types: "list[type[Line]]"
+    tiles: "set[Tile]"
+    restored: "bool"
+    # stand-ins of the atoms followed by those of the bonds
+    stand_ins: "list[EvictedItem]"
+
+    # the items themselves, for as long as something else keeps them
+    _atoms: "list[weakref.ref[AlphaAtom]]"
+    _lines: "list[weakref.ref[Line]]"
+
+    def __init__(self, molecule: "Molecule", tiles: "set[Tile]") -> "None":
+        atoms = list(molecule.atoms)
+        indices = {atom: index for index, atom in enumerate(atoms)}
+        lines = list({line: None for atom in atoms for line in atom.lines})
+        self.symbols = [atom.text for atom in atoms]
+        self.coordinates = np.array(
+            [(atom.x(), atom.y()) for atom in atoms], dtype=np.float64
+        )
+        self.bonds = np.array(
+            [(indices[line.vertex1], indices[line.vertex2]) for line in lines],
+            dtype=np.int32,
+        ).reshape(-1, 2)
+        self.atom_type = type(atoms[0])
+        self.bond_types = [type(line) for line in lines]
+        self.tiles = tiles
+        self.restored = False
+        self._atoms = [weakref.ref(atom) for atom in atoms]
+        self._lines = [weakref.ref(line) for line in lines]
+        atom_stand_ins = [EvictedItem(self) for _ in atoms]
+        self.stand_ins = atom_stand_ins + [
+            EvictedItem(self, atom_stand_ins[start], atom_stand_ins[end])
+            for start, end in self.bonds.tolist()
+        ]
+
+    def items(self) -> "tuple[list[AlphaAtom], list[Line]]":
+        """Returns the items of the molecule, creating the ones that are gone."""
+        atoms: "list[AlphaAtom]" = []
+        for reference, symbol, (x, y) in zip(
+            self._atoms, self.symbols, self.coordinates.tolist()
+        ):
+            atom = reference()
+            if atom is None:
+                atom = self.atom_type(symbol)
+            atom.setPos(x, y)
+            atoms.append(atom)
+
+        lines: "list[Line]" = []
+        for reference, bond_type, (start, end) in zip(
+            self._lines, self.bond_types, self.bonds.tolist()
+        ):
+            # a line keeps its atoms, so a line still there has its old atoms
+            line = reference()
+            if line is None:
+                line = bond_type(atoms[start], atoms[end])
+            lines.append(line)
+        return atoms, lines
+
+
+class Tiles:
+    """Molecules of a canvas kept off it while they're far from the view."""
+    canvas: "Canvas"
+    tile_size: "float"
+    max_bytes: "int"
+    evicted: "int"
+    restored: "int"
+
+    _tiles: "dict[Tile, list[EvictedMolecule]]"
+    _by_atom: "weakref.WeakKeyDictionary[AlphaAtom, EvictedMolecule]"
+
+    def __init__(
+        self,
+        canvas: "Canvas",
+        tile_size: "float" = TILE_SIZE,
+        max_bytes: "int" = 32 * 1024 * 1024,
+    ) -> "None":
+        self.canvas = canvas
+        self.tile_size = tile_size
+        self.max_bytes = max_bytes
+        self.evicted = self.restored = 0
+        self._tiles = {}
+        self._by_atom = weakref.WeakKeyDictionary()
+
+    def __len__(self) -> "int":
+        """Number of molecules kept off the canvas."""
+        return len({
+            id(molecule)
+            for molecules in self._tiles.values()
+            for molecule in molecules
+            if not molecule.restored
+        })
+
+    @property
+    def live_bytes(self) -> "int":
+        return len(self.canvas.atom_index) * ATOM_BYTES
+
+    def tile(self, x: "float", y: "float") -> "Tile":
+        return floor(x / self.tile_size), floor(y / self.tile_size)
+
+    def near(self, region: "QRectF") -> "set[Tile]":
+        """Tiles within one tile of the region."""
+        left, top = self.tile(region.left(), region.top())
+        right, bottom = self.tile(region.right(), region.bottom())
+        return {
+            (column, row)
+            for column in range(left - 1, right + 2)
+            for row in range(top - 1, bottom + 2)
+        }
+
+    def update(self, region: "QRectF") -> "None":
+        """Puts back molecules near the region, then evicts far ones if needed."""
+        near = self.near(region)
+        swapped: "dict[object, object]" = {}
+        for tile in near & self._tiles.keys():
+            for molecule in self._tiles.pop(tile):
+                self._restore(molecule, swapped)
+        self.canvas.history.swap(swapped)
+        if self.live_bytes > self.max_bytes:
+            self._evict(near, region.center().x(), region.center().y())
+
+    def _evict(self, near: "set[Tile]", x: "float", y: "float") -> "None":
+        squares = self.canvas.atom_index.squares(self.tile_size)
+        # the farthest tiles go first
+        far = sorted(
+            squares.keys() - near,
+            key=lambda tile: -hypot(
+                (tile[0] + 0.5) * self.tile_size - x,
+                (tile[1] + 0.5) * self.tile_size - y,
+            ),
+        )
+        swapped: "dict[object, EvictedItem]" = {}
+        for tile in far:
+            if self.live_bytes <= self.max_bytes:
+                break
+            for molecule in {atom.molecule: None for atom in squares[tile]}:
+                if not molecule.atoms:
+                    continue
+                tiles = {
+                    self.tile(atom.center().x(), atom.center().y())
+                    for atom in molecule.atoms
+                }
+                # molecules reaching into the view stay
+                if not tiles & near:
+                    self._evict_molecule(molecule, tiles, swapped)
+        # only the stand-ins are left to keep the items alive
+        self.canvas.history.swap(swapped)
+
+    def _evict_molecule(
+        self,
+        molecule: "Molecule",
+        tiles: "set[Tile]",
+        swapped: "dict[object, EvictedItem]",
+    ) -> "None":
+        evicted = EvictedMolecule(molecule, tiles)
+        atoms = list(molecule.atoms)
+        lines = list({line: None for atom in atoms for line in atom.lines})
+        detach(self.canvas, atoms, lines, [])
+        swapped.update(zip([*atoms, *lines], evicted.stand_ins))
+        for tile in tiles:
+            self._tiles.setdefault(tile, []).append(evicted)
+        for atom in atoms:
+            self._by_atom[atom] = evicted
+        self.evicted += 1
+
+    def _restore(
+        self, evicted: "EvictedMolecule", swapped: "dict[object, object]"
+    ) -> "None":
+        if evicted.restored:
+            return
+        evicted.restored = True
+        atoms, lines = evicted.items()
+        attach(self.canvas, atoms, lines, [])
+        swapped.update(zip(evicted.stand_ins, [*atoms, *lines]))
+        self.restored += 1
+
+    def restore(self, atoms: "Iterable[AlphaAtom | EvictedItem]") -> "None":
+        """Puts back the molecules of the atoms, e.g. before an undo."""
+        swapped: "dict[object, object]" = {}
+        for atom in atoms:
+            if isinstance(atom, EvictedItem):
+                self._restore(atom.molecule, swapped)
+                continue
+            evicted = self._by_atom.pop(atom, None)
+            if evicted is not None:
+                self._restore(evicted, swapped)
+        self.canvas.history.swap(swapped)
+
+    def restore_all(self) -> "None":
+        tiles, self._tiles = self._tiles, {}
+        swapped: "dict[object, object]" = {}
+        for molecules in tiles.values():
+            for molecule in molecules:
+                self._restore(molecule, swapped)
+        self._by_atom.clear()
+        self.canvas.history.swap(swapped)
+
+    def clear(self) -> "None":
+        self._tiles.clear()
+        self._by_atom.clear()
@@ -1,34 +1,48 @@
 from typing import TYPE_CHECKING
 
-from PyQt6.QtGui import QActionGroup
+from PyQt6.QtGui import QAction, QActionGroup
 from PyQt6.QtWidgets import QToolBar
 
 from chi_editor.toolbar.tools import tools
 
 if TYPE_CHECKING:
-    from PyQt6.QtGui import QAction
-
+    from chi_editor.bases.tool import Tool
     from chi_editor.canvas import Canvas
+    from chi_editor.toolbar.tools import ToolEntry
 
 
 class CanvasToolBar(QToolBar):
     _canvas: "Canvas"
+    # entries of the buttons and the tools created for them so far
+    _entries: "dict[QAction, ToolEntry]"
+    _tools: "dict[QAction, Tool]"
 
     def __init__(self, *args, canvas: "Canvas", **kwargs) -> "None":
         super().__init__(*args, **kwargs)
         self._canvas = canvas
+        self._entries = {}
+        self._tools = {}
         self.setStyleSheet("""QToolBar { background-color: rgb(212, 204, 234); }""")
         self.setMovable(False)
 
         action_group = QActionGroup(self)
         action_group.setExclusive(True)
 
-        for Tool in tools:
-            tool = Tool(canvas)
-            self.addAction(tool)
-            action_group.addAction(tool)
+        for entry in tools:
+            action = QAction(entry.icon(), entry.name, self)
+            action.setCheckable(True)
+            self._entries[action] = entry
+            self.addAction(action)
+            action_group.addAction(action)
 
         self.actionTriggered.connect(self.changeAction)
 
+    def tool(self, action: "QAction") -> "Tool":
+        """Returns the tool of the button, creating it on first use."""
+        tool = self._tools.get(action)
+        if tool is None:
+            tool = self._tools[action] = self._entries[action].load()(self._canvas)
+        return tool
+
     def changeAction(self, action: "QAction") -> "None":
-        self._canvas.current_action = action
\ No newline at end of file
+        self._canvas.current_action = self.tool(action)
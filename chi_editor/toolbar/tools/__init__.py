@@ -1,31 +1,63 @@
-from ...bases.tool import Tool
-from .arrow import Arrow
-from .atoms.carbon import Carbon
-from .atoms.nitrogen import Nitrogen
-from .atoms.oxygen import Oxygen
-from .bond import Bond
-from .bonds.create_double_bond import CreateDoubleBond
-from .bonds.create_single_bond import CreateSingleBond
-from .bonds.create_triple_bond import CreateTripleBond
-from .bonds.create_wedge_bond import CreateWedgeBond
-from .drag import Drag
-from .eraser import Eraser
-from .smiles import Smiles
-from .structure import Structure
-from .text import Text
-
-tools: tuple[type[Tool], ...] = (
-    Arrow,
-    Text,
-    CreateSingleBond,
-    CreateDoubleBond,
-    CreateTripleBond,
-    CreateWedgeBond,
-    Carbon,
-    Nitrogen,
-    Oxygen,
-    Structure,
-    Smiles,
-    Eraser,
-    Drag
+"""Tools of the toolbar.
+
+Tools are listed by the module they are defined in, so a tool and whatever
+it depends on, such as RDKit for the structure tools, are imported only when
+the tool is first chosen.
+"""
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+from PyQt6.QtGui import QIcon
+
+from chi_editor.constants import TOOLS
+
+if TYPE_CHECKING:
+    from chi_editor.bases.tool import Tool
+
+# icons by picture name, shared by tools with the same picture
+_icons: "dict[str, QIcon]" = {}
+
+
+class ToolEntry:
+    """A tool known by its module, class name and icon picture."""
+    module: "str"
+    name: "str"
+    picture: "str"
+
+    def __init__(self, module: "str", name: "str", picture: "str") -> "None":
+        self.module = module
+        self.name = name
+        self.picture = picture
+
+    def load(self) -> "type[Tool]":
+        return getattr(import_module(self.module, __name__), self.name)
+
+    def icon(self) -> "QIcon":
+        """Returns the icon, Qt reads the file only when it's first drawn."""
+        icon = _icons.get(self.picture)
+        if icon is None:
+            path = TOOLS / f"{self.picture}.png"
+            if not path.exists():
+                raise ValueError(
+                    f"can't find assets for {self.name}, checked at {path}\n"
+                    f" module reference: {self.module}"
+                )
+            icon = _icons[self.picture] = QIcon(str(path))
+        return icon
+
+
+tools: "tuple[ToolEntry, ...]" = (
+    ToolEntry(".arrow", "Arrow", "arrow"),
+    ToolEntry(".text", "Text", "text"),
+    ToolEntry(".bonds.create_single_bond", "CreateSingleBond", "bond1"),
+    ToolEntry(".bonds.create_double_bond", "CreateDoubleBond", "bond2"),
+    ToolEntry(".bonds.create_triple_bond", "CreateTripleBond", "bond3"),
+    ToolEntry(".bonds.create_wedge_bond", "CreateWedgeBond", "bond1"),
+    ToolEntry(".atoms.carbon", "Carbon", "carbon"),
+    ToolEntry(".atoms.nitrogen", "Nitrogen", "nitrogen"),
+    ToolEntry(".atoms.oxygen", "Oxygen", "oxygen"),
+    ToolEntry(".structure", "Structure", "structure"),
+    ToolEntry(".smiles", "Smiles", "structure"),
+    ToolEntry(".eraser", "Eraser", "eraser"),
+    ToolEntry(".drag", "Drag", "arrow"),
 )
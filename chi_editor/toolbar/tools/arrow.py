@@ -1,19 +1,50 @@
+from PyQt6.QtCore import QPointF
 from PyQt6.QtWidgets import QGraphicsSceneMouseEvent
 
+from ...bases.alpha_atom import AlphaAtom
+from ...bases.molecule import MoleculeAnchor
 from ...bases.tool import Tool
 from ...canvas import Canvas
+from ...history import Batch, MoveAtoms
+
+# decimals of the offsets under which atoms count as moved together
+OFFSET_DIGITS = 6
 
 
 class Arrow(Tool):
+    # positions of the atoms that can be dragged, taken on press
+    _start: "dict[AlphaAtom, QPointF]"
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._start = {}
+
     def mouse_press_event(self, event: QGraphicsSceneMouseEvent) -> None:
         super(Canvas, self.canvas).mousePressEvent(event)
+        self._start = {}
+        for item in self.canvas.selectedItems():
+            if isinstance(item, AlphaAtom):
+                self._start[item] = item.pos()
+            elif isinstance(item, MoleculeAnchor):
+                for atom in item.atoms:
+                    self._start[atom] = atom.pos()
 
     def mouse_move_event(self, event: QGraphicsSceneMouseEvent) -> None:
         super(Canvas, self.canvas).mouseMoveEvent(event)
 
     def mouse_release_event(self, event: QGraphicsSceneMouseEvent) -> None:
         super(Canvas, self.canvas).mouseReleaseEvent(event)
-
-    @property
-    def picture(self) -> str:
-        return "arrow"
+        # the whole drag becomes one step of the history
+        # atoms moved together differ by rounding errors of their positions
+        moves: "dict[tuple[float, float], tuple[QPointF, list[AlphaAtom]]]" = {}
+        for atom, start in self._start.items():
+            offset = atom.pos() - start
+            if atom.scene() is self.canvas and not offset.isNull():
+                key = round(offset.x(), OFFSET_DIGITS), round(offset.y(), OFFSET_DIGITS)
+                moves.setdefault(key, (offset, []))[1].append(atom)
+        self._start = {}
+        if moves:
+            self.canvas.history.push(Batch(*(
+                MoveAtoms(atoms, offset.x(), offset.y())
+                for offset, atoms in moves.values()
+            )))
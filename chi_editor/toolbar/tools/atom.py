@@ -2,6 +2,7 @@ from PyQt6.QtWidgets import QGraphicsSceneMouseEvent
 
 from ...bases.alpha_atom import AlphaAtom
 from ...bases.tool import Tool
+from ...history import AddItems
 
 
 class Atom(Tool):
@@ -11,7 +12,4 @@ class Atom(Tool):
         new_atom = AlphaAtom(self._element)
         new_atom.setPos(event.scenePos() - new_atom.sceneBoundingRect().center())
         new_atom.add_to_canvas(self.canvas)
-
-    @property
-    def picture(self) -> str:
-        return "carbon"
+        self.canvas.history.push(AddItems([new_atom]))
@@ -1,15 +1,12 @@
 from __future__ import annotations
 
 from PyQt6.QtCore import QPointF, Qt
-from PyQt6.QtWidgets import (
-    QGraphicsEllipseItem,
-    QGraphicsItem,
-    QGraphicsSceneMouseEvent,
-)
+from PyQt6.QtWidgets import QGraphicsItem, QGraphicsSceneMouseEvent
 
 from ...bases.alpha_atom import AlphaAtom
 from ...bases.line import Line
 from ...bases.tool import Tool
+from ...history import AddItems
 
 
 class Bond(Tool):
@@ -17,10 +14,7 @@ class Bond(Tool):
     bond: Line = None
 
     def atom_at(self, pos: QPointF) -> AlphaAtom | None:
-        for item in self.canvas.items(pos, Qt.ItemSelectionMode.IntersectsItemShape):
-            if isinstance(item, AlphaAtom):
-                return item
-        return None
+        return self.canvas.atom_at(pos)
 
     def mouse_press_event(self, event: QGraphicsSceneMouseEvent) -> None:
         if event.button() == Qt.MouseButton.LeftButton:
@@ -31,6 +25,9 @@ class Bond(Tool):
                 self.canvas.addItem(self.bond)
 
     def mouse_move_event(self, event: QGraphicsSceneMouseEvent) -> None:
+        # the view tracks the mouse while the library panel is shown
+        if event.buttons() == Qt.MouseButton.NoButton:
+            return
         if self.bond is not None:
             atom = self.atom_at(event.scenePos())
             if atom is not None and atom != self.startItem:
@@ -38,31 +35,29 @@ class Bond(Tool):
             else:
                 new_end = event.scenePos()
 
-            mouse_item = QGraphicsEllipseItem(0, 0, 0, 0)
-            mouse_item.setPos(new_end)
-            self.bond.update_pixmap(mouse_item, following_mouse=True)
+            self.bond.follow(new_end)
 
     def mouse_release_event(self, event) -> None:
         if self.bond is None:
             return
+        # the tool lets go of the bond however the drag ends
+        bond, start_atom = self.bond, self.startItem
+        self.bond = self.startItem = None
 
         end_atom = self.atom_at(event.scenePos())
-        if end_atom is None or end_atom == self.startItem:
-            self.canvas.removeItem(self.bond)
+        if end_atom is None or end_atom == start_atom:
+            self.canvas.removeItem(bond)
             return
 
-        self.bond.set_v2(end_atom)
-        only_one_line_between = self.startItem.add_line(self.bond)
+        bond.set_v2(end_atom)
+        only_one_line_between = start_atom.add_line(bond)
         if not only_one_line_between:
-            self.canvas.removeItem(self.bond)
+            self.canvas.removeItem(bond)
         else:  # if line didn't exist before, we add it
-            end_atom.add_line(self.bond)
-        self.startItem.molecule.update_atoms()
+            end_atom.add_line(bond)
+            start_atom.molecule.add_bond(bond)
+            self.canvas.history.push(AddItems(lines=[bond]))
 
     # should be @property
     def get_line(self, start_atom: QGraphicsItem, mouse_pos: QPointF) -> Line:
         pass
-
-    @property
-    def picture(self) -> str:
-        return "bond"
@@ -10,7 +10,3 @@ class CreateWedgeBond(Bond):
 
     def get_line(self, start_atom: QGraphicsItem, mouse_pos: QPointF) -> Line:
         return WedgeBond(start_atom, mouse_pos)
-
-    @property
-    def picture(self) -> str:
-        return "bond1"
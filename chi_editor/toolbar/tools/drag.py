@@ -14,7 +14,3 @@ class Drag(Tool):
     def mouse_release_event(self, event: QGraphicsSceneMouseEvent) -> None:
         for view in self.canvas.views():
             view.setDragMode(QGraphicsView.DragMode.NoDrag)
-
-    @property
-    def picture(self) -> str:
-        return "arrow"
@@ -1,22 +1,54 @@
 from PyQt6.QtCore import Qt
-from PyQt6.QtWidgets import QGraphicsSceneMouseEvent
+from PyQt6.QtWidgets import QGraphicsItem, QGraphicsSceneMouseEvent
 
+from ...bases.alpha_atom import AlphaAtom
+from ...bases.line import Line
+from ...bases.molecule import MoleculeAnchor
+from ...bases.placeholder import Placeholder
 from ...bases.tool import Tool
+from ...history import RemoveItems
 
 
 class Eraser(Tool):
 
     def mouse_press_event(self, event: QGraphicsSceneMouseEvent) -> None:
         if event.button() == Qt.MouseButton.LeftButton:
+            atom = self.canvas.atom_at(event.scenePos())
+            if atom is not None:
+                self.canvas.history.perform(RemoveItems.of_atoms([atom]))
+                return
             items = self.canvas.items(event.scenePos(), Qt.ItemSelectionMode.IntersectsItemShape)
             if not items:
                 return super(Eraser, self).mouse_press_event(event)
-            else:
-                items[0].remove()
+            self.erase(items[0].topLevelItem())
         else:
-            self.canvas.clear()
+            self.erase_all()
 
+    def erase(self, item: QGraphicsItem) -> None:
+        history = self.canvas.history
+        if isinstance(item, Line):
+            history.perform(RemoveItems(lines=[item]))
+        elif isinstance(item, MoleculeAnchor):
+            history.perform(RemoveItems.of_atoms(item.atoms))
+        elif isinstance(item, Placeholder):
+            # the result it waits for is dropped, there is nothing to undo
+            item.remove()
+        else:
+            history.perform(RemoveItems(others=[item]))
 
-    @property
-    def picture(self) -> str:
-        return "eraser"
+    def erase_all(self) -> None:
+        # items are taken off rather than deleted, so this can be undone
+        self.canvas.close_document_file()
+        self.canvas.tiles.restore_all()
+        atoms, lines, others = [], [], []
+        for item in self.canvas.items():
+            if isinstance(item, AlphaAtom):
+                atoms.append(item)
+            elif isinstance(item, Line):
+                lines.append(item)
+            elif isinstance(item, Placeholder):
+                # results of pending tasks are dropped along with everything
+                item.remove()
+            elif item.parentItem() is None and not isinstance(item, MoleculeAnchor):
+                others.append(item)
+        self.canvas.history.perform(RemoveItems(atoms, lines, others))
@@ -1,10 +1,18 @@
-from PyQt6.QtCore import Qt
+from typing import TYPE_CHECKING
+
+from PyQt6.QtCore import QPointF, Qt
 from PyQt6.QtWidgets import QGraphicsSceneMouseEvent, QInputDialog, QWidget
 from rdkit import Chem
 
+from ...bases.placeholder import Placeholder
 from ...bases.tool import Tool
+from ...chemistry import from_smiles
+from ...history import AddItems
 from .structure import put_molecule
 
+if TYPE_CHECKING:
+    from ...canvas import Canvas
+
 
 class Smiles(Tool):
     def mouse_press_event(self, event: QGraphicsSceneMouseEvent) -> None:
@@ -12,14 +20,25 @@ class Smiles(Tool):
             dialog = SmilesDialog()
             self.canvas.addWidget(dialog)
             if dialog.smiles != "":
-                molecule: Chem.Mol = Chem.MolFromSmiles(dialog.smiles)
-                Chem.Kekulize(molecule)
-                put_molecule(self.canvas, molecule, event.scenePos())
+                self.insert(dialog.smiles, event.scenePos())
             self.canvas.removeItem(dialog.graphicsProxyWidget())
 
-    @property
-    def picture(self) -> str:
-        return "structure"
+    def insert(self, smiles: str, position: QPointF) -> None:
+        insert_smiles(self.canvas, smiles, position)
+
+
+def insert_smiles(canvas: "Canvas", smiles: str, position: QPointF) -> None:
+    """Parses and lays out the SMILES in a worker, then puts it on canvas."""
+    placeholder = Placeholder(position)
+    canvas.addItem(placeholder)
+
+    def put(molecule: Chem.Mol | None) -> None:
+        # the canvas was cleared while the worker was busy
+        if placeholder.remove() and molecule is not None:
+            atoms = put_molecule(canvas, molecule, position)
+            canvas.history.push(AddItems.of_atoms(atoms))
+
+    canvas.chemistry.submit(from_smiles, smiles, callback=put)
 
 
 class SmilesDialog(QWidget):
@@ -1,148 +1,200 @@
 from __future__ import annotations
 
-from datamol import incorrect_valence
+import sys
+from contextlib import ExitStack
+
 from PyQt6.QtCore import QPointF, Qt
-from PyQt6.QtGui import QImage, QPixmap
-from PyQt6.QtWidgets import QGraphicsPixmapItem, QGraphicsSceneMouseEvent
+from PyQt6.QtWidgets import QGraphicsItem, QGraphicsSceneMouseEvent
 from rdkit import Chem
 from rdkit.Chem import Mol
 
 from ...bases.alpha_atom import AlphaAtom
 from ...bases.line import Line
+from ...bases.molecule import Molecule
+from ...bases.placeholder import Placeholder
 from ...bases.tool import Tool
 from ...chem_bonds.double_bond import DoubleBond
 from ...chem_bonds.single_bond import SingleBond
 from ...chem_bonds.triple_bond import TripleBond
+from ...chemistry import clean_up_all
+from ...history import AddItems, Batch, RemoveItems
+from ...layout_cache import compute_2d_coords
 from ...playground import mol_from_graphs
 
 
+def has_layout(molecule: Chem.Mol) -> bool:
+    return molecule.GetNumConformers() > 0 and not molecule.GetConformer().Is3D()
+
+
 def create_atoms(molecule: Chem.Mol, position: QPointF) -> list[AlphaAtom]:
-    Chem.rdDepictor.Compute2DCoords(molecule)
+    # molecules laid out by a worker come with their 2D coordinates
+    if not has_layout(molecule):
+        compute_2d_coords(molecule)
+    # place the whole depiction at once, centered on the position
+    points = molecule.GetConformer().GetPositions()[:, :2]
+    points = (points - points.mean(axis=0)) * 100 + (position.x(), position.y())
+
+    # every fragment of salts and mixtures is a molecule of its own
+    groups: list[Molecule] = []
+    group_of: list[int] = [0] * molecule.GetNumAtoms()
+    for group, fragment in enumerate(Chem.GetMolFrags(molecule)):
+        groups.append(Molecule())
+        for index in fragment:
+            group_of[index] = group
+
     atoms: list[AlphaAtom] = []
-    molecule_center: QPointF = get_geometrical_center(
-        [
-            QPointF(
-                molecule.GetConformer().GetAtomPosition(i).x,
-                molecule.GetConformer().GetAtomPosition(i).y,
+    with ExitStack() as batches:
+        for group in groups:
+            batches.enter_context(group.batch())
+        for atom, (x, y) in zip(molecule.GetAtoms(), points.tolist()):
+            new_atom = AlphaAtom(
+                atom.GetSymbol(), molecule=groups[group_of[atom.GetIdx()]]
             )
-            for i in range(molecule.GetNumAtoms())
-        ]
-    )
-    for atom in molecule.GetAtoms():
-        positions = molecule.GetConformer().GetAtomPosition(atom.GetIdx())
-        new_atom = AlphaAtom(atom.GetSymbol())
-        new_atom.setPos(
-            position + (QPointF(positions.x, positions.y) - molecule_center) * 100,
-        )
-        atoms.append(new_atom)
+            new_atom.setPos(x, y)
+            atoms.append(new_atom)
     return atoms
 
 
-def get_geometrical_center(points: list[QPointF]) -> QPointF:
-    x: float = sum(point.x() for point in points)
-    y: float = sum(point.y() for point in points)
-    atoms_count: int = len(points)
-    return QPointF(x / atoms_count, y / atoms_count)
+BOND_TYPES: dict[float, type[Line]] = {
+    1: SingleBond,
+    2: DoubleBond,
+    3: TripleBond,
+}
 
 
 def create_bonds(molecule: Chem.Mol, atoms: list[AlphaAtom]) -> list[Line]:
     result: list[Line] = []
     for bond in molecule.GetBonds():
-        start_position: int = bond.GetBeginAtomIdx()
-        end_position: int = bond.GetEndAtomIdx()
-        bond_type: float = bond.GetBondTypeAsDouble()
-        new_bond: Line = {
-            bond_type == 1: SingleBond(atoms[start_position], atoms[end_position]),
-            bond_type == 2: DoubleBond(atoms[start_position], atoms[end_position]),
-            bond_type == 3: TripleBond(atoms[start_position], atoms[end_position]),
-        }[True]
-
-        atoms[start_position].add_line(new_bond)
-        atoms[end_position].add_line(new_bond)
-        atoms[start_position].molecule.update_atoms()
+        start_atom = atoms[bond.GetBeginAtomIdx()]
+        end_atom = atoms[bond.GetEndAtomIdx()]
+        bond_type: type[Line] = BOND_TYPES[bond.GetBondTypeAsDouble()]
+        new_bond: Line = bond_type(start_atom, end_atom)
+
+        start_atom.add_line(new_bond)
+        end_atom.add_line(new_bond)
+        # atoms of a fragment made by create_atoms already share a molecule,
+        # so this only adds the bond to its RDKit mirror
+        start_atom.molecule.add_bond(new_bond)
 
         result.append(new_bond)
     return result
 
 
-def create_molecule(canvas, atom: AlphaAtom) -> Mol | None:
-    # molecule_smiles: str = Chem.MolToSmiles(mol_from_graphs(atom.molecule))
-    # molecule_dm: Chem.Mol = Chem.MolFromSmiles(molecule_smiles)
-    molecule_dm = mol_from_graphs(atom.molecule)
-    if not check_correctness(canvas, molecule_dm):
-        return None
-    Chem.Kekulize(molecule_dm)
-    return molecule_dm
-
+# most molecules sent to a worker in one task
+CLEAN_UP_CHUNK = 16
 
-def check_correctness(canvas, mol: Chem.Mol) -> bool:
-    if mol is None or incorrect_valence(mol):
-        image = QImage("resources//stathem.jpg")
-        mol = QGraphicsPixmapItem(QPixmap.fromImage(image))
-        for item in canvas.items():
-            if isinstance(item, AlphaAtom):
-                item.molecule.destroy()
-        canvas.addItem(mol)
-        return False
-    return True
 
+def submit_clean_up(canvas, molecules: list[Molecule]) -> None:
+    """Lays the molecules out again in workers and replaces them all at once.
 
-def put_bonds(canvas, molecule: Chem.Mol, atoms: list[AlphaAtom]) -> None:
-    bonds = create_bonds(molecule, atoms)
-    for bond in bonds:
-        canvas.addItem(bond)
+    Chunks of molecules are checked and laid out in parallel, the results are
+    applied in one step once the last chunk is back. Molecules that are not
+    valid are left as they are and selected, those changed or removed
+    meanwhile are left as well. So are molecules the cleanup failed on, they
+    are reported as errors but not selected.
+    """
+    if not molecules:
+        return
+    # the valence check of the canvas already knows about most invalid ones
+    invalid = canvas.valence.invalid_molecules()
+    rejected = [molecule for molecule in molecules if molecule in invalid]
+    molecules = [molecule for molecule in molecules if molecule not in invalid]
+    revisions = [molecule.revision for molecule in molecules]
+    placeholders = [Placeholder(molecule.anchor.pos()) for molecule in molecules]
+    canvas.add_items(placeholders)
+    # a molecule, None for an invalid one or the error the cleanup failed with
+    results: list[Mol | str | None] = [None] * len(molecules)
+    remaining = 0
+
+    def collect(start: int, size: int, chunk: list[Mol | str | None] | None) -> None:
+        nonlocal remaining
+        if chunk is None:
+            # the executor already reported why the whole task failed
+            chunk = ["task failed"] * size
+        results[start:start + size] = chunk
+        remaining -= 1
+        if remaining == 0:
+            apply()
+
+    def apply() -> None:
+        replaced: list[tuple[Molecule, Mol]] = []
+        failed: list[Molecule] = list(rejected)
+        errors = 0
+        for molecule, revision, placeholder, result in zip(
+            molecules, revisions, placeholders, results
+        ):
+            if not placeholder.remove() or molecule.revision != revision:
+                continue
+            if result is None:
+                failed.append(molecule)
+            elif isinstance(result, str):
+                print(f"cleanup failed: {result}", file=sys.stderr)
+                errors += 1
+            else:
+                replaced.append((molecule, result))
+
+        if replaced:
+            old = RemoveItems.of_atoms(
+                atom for molecule, _ in replaced for atom in molecule.atoms
+            )
+            positions = [molecule.anchor.pos() for molecule, _ in replaced]
+            old.redo(canvas)
+            atoms: list[AlphaAtom] = []
+            items: list[QGraphicsItem] = []
+            for (_, result), position in zip(replaced, positions):
+                new_atoms = create_atoms(result, position)
+                new_bonds = create_bonds(result, new_atoms)
+                atoms.extend(new_atoms)
+                anchors = {atom.molecule.anchor: None for atom in new_atoms}
+                items.extend([*new_atoms, *new_bonds, *anchors])
+            canvas.add_items(items)
+            canvas.history.push(Batch(old, AddItems.of_atoms(atoms)))
+        if failed:
+            canvas.clearSelection()
+            for molecule in failed:
+                for atom in molecule.atoms:
+                    atom.setSelected(True)
+        canvas.cleaned_up.emit(len(replaced), len(failed), errors)
+
+    if not molecules:
+        return apply()
+    # few molecules are still spread over all workers
+    size = min(CLEAN_UP_CHUNK, -(-len(molecules) // canvas.chemistry.workers))
+    for start in range(0, len(molecules), size):
+        chunk = [
+            mol_from_graphs(molecule) for molecule in molecules[start:start + size]
+        ]
+        remaining += 1
+        canvas.chemistry.submit(
+            clean_up_all,
+            chunk,
+            callback=lambda result, start=start, size=len(chunk): collect(
+                start, size, result
+            ),
+        )
 
 
-def put_molecule(canvas, molecule: Chem.Mol, position: QPointF) -> None:
+def put_molecule(canvas, molecule: Chem.Mol, position: QPointF) -> list[AlphaAtom]:
+    """Creates all items of the molecule and adds them to the canvas at once."""
     if molecule is None:
-        return
-    atoms: list[AlphaAtom] = create_atoms(
-        molecule, position
-    )
-    for atom in atoms:
-        atom.add_to_canvas(canvas)
-    put_bonds(canvas, molecule, atoms)
+        return []
+    atoms: list[AlphaAtom] = create_atoms(molecule, position)
+    bonds: list[Line] = create_bonds(molecule, atoms)
+    anchors = {atom.molecule.anchor for atom in atoms}
+    canvas.add_items([*atoms, *bonds, *anchors])
+    return atoms
 
 
 class Structure(Tool):
     def mouse_press_event(self, event: QGraphicsSceneMouseEvent) -> None:
         if event.button() == Qt.MouseButton.LeftButton:
-            items: list = self.canvas.items(
-                event.scenePos(), Qt.ItemSelectionMode.IntersectsItemShape
-            )
-            if items == [] or not isinstance(items[0], AlphaAtom):
+            current_atom: AlphaAtom | None = self.canvas.atom_at(event.scenePos())
+            if current_atom is None:
                 return super(Structure, self).mouse_press_event(event)
-
-            current_atom: AlphaAtom = items[0]
-            molecule: Chem.Mol = create_molecule(self.canvas, current_atom)
-
-            if molecule is None:
-                return
-
-            atoms: list[AlphaAtom] = create_atoms(
-                molecule, current_atom.molecule.anchor.pos()
-            )
-
-            for atom in atoms:
-                atom.add_to_canvas(self.canvas)
-            put_bonds(self.canvas, molecule, atoms)
-            current_atom.molecule.destroy()
+            submit_clean_up(self.canvas, [current_atom.molecule])
         else:
-            atoms: list[AlphaAtom] = []
-            old_atoms: list[AlphaAtom] = []
+            molecules: dict[Molecule, None] = {}
             for item in self.canvas.items():
-                if isinstance(item, AlphaAtom) and item not in old_atoms:
-                    molecule = create_molecule(self.canvas, item)
-                    if molecule is None:
-                        return
-                    old_atoms.extend(item.molecule.atoms)
-                    new_atoms = create_atoms(molecule, item.molecule.anchor.pos())
-                    atoms.extend(new_atoms)
-                    put_bonds(self.canvas, molecule, new_atoms)
-                    item.molecule.destroy()
-            for atom in atoms:
-                atom.add_to_canvas(self.canvas)
-
-    @property
-    def picture(self) -> str:
-        return "structure"
+                if isinstance(item, AlphaAtom):
+                    molecules[item.molecule] = None
+            submit_clean_up(self.canvas, list(molecules))
@@ -8,6 +8,7 @@ from PyQt6.QtWidgets import (
 )
 
 from ...bases.tool import Tool
+from ...history import AddItems
 
 
 class Text(Tool):
@@ -16,10 +17,7 @@ class Text(Tool):
         new_text.setPos(event.scenePos())
 
         self.canvas.addItem(new_text)
-
-    @property
-    def picture(self) -> str:
-        return "text"
+        self.canvas.history.push(AddItems(others=[new_text]))
 
 
 class TextItem(QGraphicsTextItem):
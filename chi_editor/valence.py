@@ -0,0 +1,104 @@
+"""Valence checks that follow the edits of the canvas.
+
+Atoms are marked whenever one of their bonds is added or removed, and only
+marked atoms are checked again, so validating an edit costs as much as the
+number of atoms it touched. An atom is invalid when the bond orders around it
+add up to more than the largest valence RDKit allows for its element, which
+is what makes sanitization fail for the uncharged atoms of the editor.
+"""
+from typing import TYPE_CHECKING
+
+from PyQt6.QtCore import QObject, QTimer
+from rdkit import Chem
+
+if TYPE_CHECKING:
+    from chi_editor.bases.alpha_atom import AlphaAtom
+    from chi_editor.bases.molecule import Molecule
+
+# largest allowed valence by element symbol, None if any is allowed
+_max_valences: "dict[str, int | None] | None" = None
+
+
+def max_valence(symbol: "str") -> "int | None":
+    """Returns None for symbols that are not elements as well, e.g. labels."""
+    global _max_valences
+    if _max_valences is None:
+        # RDKit complains loudly about unknown symbols, so all are read at once
+        table = Chem.GetPeriodicTable()
+        _max_valences = {}
+        for number in range(1, table.GetMaxAtomicNumber() + 1):
+            valences = list(table.GetValenceList(number))
+            _max_valences[table.GetElementSymbol(number)] = (
+                None if -1 in valences else max(valences)
+            )
+    return _max_valences.get(symbol)
+
+
+def explicit_valence(atom: "AlphaAtom") -> "int":
+    return sum(line.multiplicity for line in atom.lines)
+
+
+class ValenceCheck(QObject):
+    """Invalid atoms of a canvas, updated right after the edits."""
+    # atoms checked since the check was created
+    checked: "int"
+
+    _invalid: "set[AlphaAtom]"
+    _dirty: "dict[AlphaAtom, None]"
+    _timer: "QTimer"
+
+    def __init__(self, parent: "QObject | None" = None) -> "None":
+        super().__init__(parent)
+        self.checked = 0
+        self._invalid = set()
+        self._dirty = {}
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+
+    def mark(self, atom: "AlphaAtom") -> "None":
+        """Makes the atom checked again once the current edit is done."""
+        self._dirty[atom] = None
+        if not self._timer.isActive():
+            self._timer.start(0)
+
+    def forget(self, atom: "AlphaAtom") -> "None":
+        """Drops an atom leaving the canvas."""
+        self._dirty.pop(atom, None)
+        if atom in self._invalid:
+            self._invalid.discard(atom)
+            atom.set_valence_error(False)
+
+    def discard(self) -> "None":
+        """Forgets every atom, for when they are deleted."""
+        self._timer.stop()
+        self._dirty.clear()
+        self._invalid.clear()
+
+    def flush(self) -> "None":
+        self._timer.stop()
+        atoms, self._dirty = self._dirty, {}
+        for atom in atoms:
+            if atom.scene() is None:
+                continue
+            limit = max_valence(atom.text)
+            invalid = limit is not None and explicit_valence(atom) > limit
+            if invalid != (atom in self._invalid):
+                if invalid:
+                    self._invalid.add(atom)
+                else:
+                    self._invalid.discard(atom)
+                atom.set_valence_error(invalid)
+        self.checked += len(atoms)
+
+    def is_valid(self) -> "bool":
+        self.flush()
+        return not self._invalid
+
+    def invalid_atoms(self) -> "set[AlphaAtom]":
+        self.flush()
+        return set(self._invalid)
+
+    def invalid_molecules(self) -> "set[Molecule]":
+        self.flush()
+        return {atom.molecule for atom in self._invalid}
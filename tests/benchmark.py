@@ -0,0 +1,360 @@
+"""Headless performance benchmarks for the editor core.
+
+Run from the repository root:
+
+    python -m tests.benchmark --output bench.json
+    python -m tests.benchmark --compare bench.json
+
+Every scenario drives the real canvas, items and tools with synthetic
+workloads. Results are printed as JSON: the best and the median wall time of
+several repeats and the peak of Python allocations traced by tracemalloc.
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import TYPE_CHECKING
+
+from PyQt6.QtCore import QEvent, QPointF, QRectF, Qt
+from PyQt6.QtGui import QImage, QMouseEvent, QPainter
+from PyQt6.QtWidgets import QApplication, QGraphicsItem, QGraphicsView
+from rdkit import Chem
+
+from chi_editor.bases.alpha_atom import AlphaAtom
+from chi_editor.canvas import Canvas
+from chi_editor.chemistry import from_smiles
+from chi_editor.history import AddItems
+from chi_editor.toolbar.tools.arrow import Arrow
+from chi_editor.toolbar.tools.atoms.carbon import Carbon
+from chi_editor.toolbar.tools.bonds.create_single_bond import CreateSingleBond
+from chi_editor.toolbar.tools.eraser import Eraser
+from chi_editor.toolbar.tools.structure import Structure, put_molecule
+
+if TYPE_CHECKING:
+    from typing import Callable, Iterator
+
+    from chi_editor.bases.tool import Tool
+
+# distance between atoms placed by the benchmarks
+STEP = 80.0
+
+
+class Session:
+    """A canvas shown in a view, receiving mouse events through the view."""
+    canvas: Canvas
+    view: QGraphicsView
+
+    def __init__(self) -> None:
+        self.canvas = Canvas(QRectF(0, 0, 1000, 600))
+        self.view = QGraphicsView(self.canvas)
+        self.view.setSceneRect(QRectF(-5000, -5000, 10000, 10000))
+        self.view.resize(1000, 600)
+        self.view.show()
+
+    def use(self, tool_type: type[Tool]) -> Tool:
+        tool = tool_type(self.canvas)
+        self.canvas.current_action = tool
+        return tool
+
+    def send(
+        self,
+        kind: QEvent.Type,
+        scene_pos: QPointF,
+        button: Qt.MouseButton,
+        buttons: Qt.MouseButton,
+    ) -> None:
+        viewport = self.view.viewport()
+        local = QPointF(self.view.mapFromScene(scene_pos))
+        event = QMouseEvent(
+            kind,
+            local,
+            QPointF(viewport.mapToGlobal(local)),
+            button,
+            buttons,
+            Qt.KeyboardModifier.NoModifier,
+        )
+        QApplication.sendEvent(viewport, event)
+
+    def click(
+        self, pos: QPointF, button: Qt.MouseButton = Qt.MouseButton.LeftButton
+    ) -> None:
+        self.send(QEvent.Type.MouseButtonPress, pos, button, button)
+        self.send(QEvent.Type.MouseButtonRelease, pos, button, Qt.MouseButton.NoButton)
+        self.canvas.geometry_updates.flush()
+
+    def drag(self, start: QPointF, end: QPointF, steps: int) -> None:
+        left, no = Qt.MouseButton.LeftButton, Qt.MouseButton.NoButton
+        self.send(QEvent.Type.MouseButtonPress, start, left, left)
+        for step in range(1, steps + 1):
+            current = start + (end - start) * (step / steps)
+            self.send(QEvent.Type.MouseMove, current, no, left)
+        self.send(QEvent.Type.MouseButtonRelease, end, left, no)
+        # bonds left for the next frame are part of the cost
+        self.canvas.geometry_updates.flush()
+
+    def atoms(self) -> list[AlphaAtom]:
+        return [item for item in self.canvas.items() if isinstance(item, AlphaAtom)]
+
+    def put_chain(self, size: int, position: QPointF | None = None) -> list[AlphaAtom]:
+        molecule = Chem.MolFromSmiles(chain_smiles(size))
+        Chem.Kekulize(molecule)
+        return put_molecule(self.canvas, molecule, position or QPointF(0, 0))
+
+
+def grid(count: int) -> Iterator[QPointF]:
+    columns = max(1, int(count ** 0.5))
+    for index in range(count):
+        yield QPointF((index % columns) * STEP, (index // columns) * STEP)
+
+
+def chain_smiles(size: int) -> str:
+    return "".join("C(=O)" if index % 3 == 1 else "C" for index in range(size))
+
+
+def center_of(item: QGraphicsItem) -> QPointF:
+    return item.sceneBoundingRect().center()
+
+
+def line_of_atoms(session: Session, count: int) -> list[AlphaAtom]:
+    session.use(Carbon)
+    for index in range(count):
+        session.click(QPointF(index * STEP, (index % 2) * STEP / 2))
+    return sorted(session.atoms(), key=lambda atom: atom.x())
+
+
+def bond_atoms(session: Session, atoms: list[AlphaAtom], ring: bool) -> None:
+    session.use(CreateSingleBond)
+    pairs = list(zip(atoms, atoms[1:]))
+    if ring:
+        pairs.append((atoms[-1], atoms[0]))
+    for start, end in pairs:
+        session.drag(center_of(start), center_of(end), steps=4)
+
+
+def insert_atoms(size: int) -> Callable[[], object]:
+    session = Session()
+    session.use(Carbon)
+
+    def run() -> None:
+        for pos in grid(size):
+            session.click(pos)
+
+    return run
+
+
+def bond_chain(size: int) -> Callable[[], object]:
+    session = Session()
+    atoms = line_of_atoms(session, size)
+    return lambda: bond_atoms(session, atoms, ring=False)
+
+
+def bond_ring(size: int) -> Callable[[], object]:
+    session = Session()
+    atoms = line_of_atoms(session, size)
+    return lambda: bond_atoms(session, atoms, ring=True)
+
+
+def drag_molecule(size: int) -> Callable[[], object]:
+    session = Session()
+    atoms = session.put_chain(size)
+    session.use(Arrow)
+    start = center_of(atoms[0].molecule.anchor)
+    end = start + QPointF(STEP * 5, STEP * 3)
+
+    def run() -> None:
+        session.drag(start, end, steps=50)
+        session.drag(end, start, steps=50)
+
+    return run
+
+
+def smiles_import(size: int) -> Callable[[], object]:
+    session = Session()
+    return lambda: session.put_chain(size)
+
+
+def structure_cleanup(size: int) -> Callable[[], object]:
+    session = Session()
+    for index in range(max(1, size // 20)):
+        session.put_chain(20, QPointF(index * STEP * 30, 0))
+    session.use(Structure)
+    # start the workers before measuring
+    session.canvas.chemistry.submit(from_smiles, "C", callback=lambda _: None)
+    session.canvas.chemistry.wait()
+
+    def run() -> None:
+        session.click(QPointF(-4000, -4000), Qt.MouseButton.RightButton)
+        session.canvas.chemistry.wait()
+
+    return run
+
+
+def erase_atoms(size: int) -> Callable[[], object]:
+    session = Session()
+    centers = [center_of(atom) for atom in session.put_chain(size)]
+    session.use(Eraser)
+
+    def run() -> None:
+        for center in centers:
+            session.click(center)
+        session.click(QPointF(-4000, -4000), Qt.MouseButton.RightButton)
+
+    return run
+
+
+def render_canvas(size: int) -> Callable[[], object]:
+    session = Session()
+    session.put_chain(size)
+    image = QImage(1000, 600, QImage.Format.Format_ARGB32_Premultiplied)
+
+    def run() -> None:
+        painter = QPainter(image)
+        session.canvas.render(painter)
+        painter.end()
+
+    return run
+
+
+def scroll_import(size: int) -> Callable[[], object]:
+    session = Session()
+    canvas = session.canvas
+    # an edit made before the import keeps the history non-empty
+    canvas.history.push(AddItems.of_atoms(session.put_chain(20, QPointF(-3000, 0))))
+    # one molecule per window, all of them merged into one entry like an import
+    for index in range(size):
+        atoms = session.put_chain(10, QPointF(index * 3000, 0))
+        canvas.history.push(AddItems.of_atoms(atoms), key="import")
+    # every molecule out of sight is evicted
+    canvas.tiles.max_bytes = 0
+    windows = [QRectF(index * 3000, -500, 1000, 1000) for index in range(size)]
+
+    def run() -> None:
+        for window in [*windows, *reversed(windows)]:
+            canvas.materialize(window)
+
+    return run
+
+
+SCENARIOS: dict[str, Callable[[int], Callable[[], object]]] = {
+    "insert_atoms": insert_atoms,
+    "bond_chain": bond_chain,
+    "bond_ring": bond_ring,
+    "drag_molecule": drag_molecule,
+    "smiles_import": smiles_import,
+    "structure_cleanup": structure_cleanup,
+    "erase_atoms": erase_atoms,
+    "render_canvas": render_canvas,
+    "scroll_import": scroll_import,
+}
+
+
+def measure(
+    setup: Callable[[int], Callable[[], object]], size: int, repeats: int
+) -> dict[str, object]:
+    timings: list[float] = []
+    peak = 0
+    for repeat in range(repeats):
+        run = setup(size)
+        gc.collect()
+        if repeat == 0:
+            tracemalloc.start()
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+        if repeat == 0:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    return {
+        "best": min(timings),
+        "median": statistics.median(timings),
+        "peak_memory": peak,
+    }
+
+
+def run_suite(
+    names: list[str], sizes: list[int], repeats: int
+) -> dict[str, object]:
+    results = []
+    for name in names:
+        for size in sizes:
+            result = {"scenario": name, "size": size, "repeats": repeats}
+            result.update(measure(SCENARIOS[name], size, repeats))
+            results.append(result)
+            print(
+                f"{name:>18} {size:>6}: {result['median'] * 1000:10.2f} ms "
+                f"{result['peak_memory'] / 1024:10.1f} KiB",
+                file=sys.stderr,
+            )
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+def compare(
+    baseline: dict[str, object], current: dict[str, object], tolerance: float
+) -> bool:
+    """Prints a comparison table and returns False if anything got slower."""
+    old = {(r["scenario"], r["size"]): r for r in baseline["results"]}
+    success = True
+    for result in current["results"]:
+        previous = old.get((result["scenario"], result["size"]))
+        if previous is None:
+            continue
+        ratio = result["median"] / previous["median"]
+        memory_ratio = result["peak_memory"] / max(previous["peak_memory"], 1)
+        slower = ratio > 1 + tolerance
+        success = success and not slower
+        print(
+            f"{result['scenario']:>18} {result['size']:>6}: "
+            f"time x{ratio:5.2f} memory x{memory_ratio:5.2f}"
+            f"{'  SLOWER' if slower else ''}"
+        )
+    return success
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS)
+    )
+    parser.add_argument("--sizes", nargs="+", type=int, default=[25, 100, 300])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", help="file to save the results to")
+    parser.add_argument("--compare", help="results saved earlier to compare with")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.1,
+        help="allowed slowdown of the median time in compare mode",
+    )
+    arguments = parser.parse_args(argv)
+
+    # the platform is picked when the application is created
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    application = QApplication.instance() or QApplication(sys.argv[:1])
+    report = run_suite(arguments.scenarios, arguments.sizes, arguments.repeats)
+
+    if arguments.output:
+        with open(arguments.output, "w") as file:
+            json.dump(report, file, indent=2)
+    if arguments.compare:
+        with open(arguments.compare) as file:
+            baseline = json.load(file)
+        return 0 if compare(baseline, report, arguments.tolerance) else 1
+    if not arguments.output:
+        json.dump(report, sys.stdout, indent=2)
+    application.processEvents()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
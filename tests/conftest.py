@@ -0,0 +1,79 @@
+import os
+from typing import Iterator
+
+import pytest
+from PyQt6.QtCore import QPointF
+from PyQt6.QtWidgets import QApplication
+from rdkit import Chem
+
+from chi_editor.bases.alpha_atom import AlphaAtom
+from chi_editor.bases.line import Line
+from chi_editor.canvas import Canvas
+from chi_editor.chem_bonds.single_bond import SingleBond
+from chi_editor.toolbar.tools.structure import put_molecule
+from tests.benchmark import Session
+
+
+@pytest.fixture(scope="session")
+def application() -> QApplication:
+    # the tests run without a display
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def canvas(application: QApplication) -> Iterator[Canvas]:
+    canvas = Canvas()
+    yield canvas
+    canvas.clear()
+    # the worker pool is only started by tests that need it
+    if canvas._chemistry is not None:
+        canvas._chemistry.shutdown()
+
+
+@pytest.fixture
+def session(application: QApplication) -> Iterator[Session]:
+    """A canvas shown in a view, for tests sending mouse events."""
+    session = Session()
+    yield session
+    session.view.close()
+    session.canvas.clear()
+
+
+def put_smiles(canvas: Canvas, smiles: str, x: float = 0.0) -> list[AlphaAtom]:
+    """Puts the Kekulé structure of the SMILES on the canvas."""
+    molecule = Chem.MolFromSmiles(smiles)
+    Chem.Kekulize(molecule, clearAromaticFlags=True)
+    return put_molecule(canvas, molecule, QPointF(x, 0.0))
+
+
+def add_atom(canvas: Canvas, x: float, y: float = 0.0) -> AlphaAtom:
+    atom = AlphaAtom("C")
+    atom.setPos(x, y)
+    atom.add_to_canvas(canvas)
+    return atom
+
+
+def add_bond(
+    canvas: Canvas,
+    start: AlphaAtom,
+    end: AlphaAtom,
+    bond_type: type[Line] = SingleBond,
+) -> Line:
+    """Bonds the atoms the way the bond tools do."""
+    line = bond_type(start, end)
+    canvas.addItem(line)
+    start.add_line(line)
+    end.add_line(line)
+    start.molecule.add_bond(line)
+    return line
+
+
+def lines_of(canvas: Canvas) -> list[Line]:
+    return [item for item in canvas.items() if isinstance(item, Line)]
+
+
+def molecules_of(canvas: Canvas) -> set:
+    return {
+        item.molecule for item in canvas.items() if isinstance(item, AlphaAtom)
+    }
@@ -0,0 +1,83 @@
+from PyQt6.QtCore import QPointF, QRectF
+
+from chi_editor.atom_index import ATOM_RADIUS, AtomIndex
+from chi_editor.history import RemoveItems
+from tests.conftest import add_atom
+
+CELL = 2 * ATOM_RADIUS
+
+
+def test_nearest_within_radius():
+    index = AtomIndex()
+    near, far = object(), object()
+    index.insert(near, QPointF(10.0, 0.0))
+    index.insert(far, QPointF(30.0, 0.0))
+    assert index.nearest(QPointF(0.0, 0.0)) is near
+    assert index.nearest(QPointF(25.0, 0.0)) is far
+    assert index.nearest(QPointF(0.0, 0.0), radius=5.0) is None
+    assert index.nearest(QPointF(0.0, 0.0), radius=10.0) is near
+
+
+def test_atoms_across_cell_borders():
+    index = AtomIndex()
+    atom = object()
+    # the points lie in the neighbouring cells, also across zero
+    for x in (CELL - 0.5, -0.5, 3 * CELL - 0.5):
+        index.insert(atom, QPointF(x, x))
+        assert index.nearest(QPointF(x + 1.0, x + 1.0)) is atom
+        assert index.nearest(QPointF(x - ATOM_RADIUS, x)) is atom
+        assert index.nearest(QPointF(x + ATOM_RADIUS + 1.0, x)) is None
+    assert len(index) == 1
+
+
+def test_move_into_another_cell():
+    index = AtomIndex()
+    atom = object()
+    index.insert(atom, QPointF(0.0, 0.0))
+    index.move(atom, QPointF(10 * CELL, -10 * CELL))
+    assert index.nearest(QPointF(0.0, 0.0)) is None
+    assert index.nearest(QPointF(10 * CELL, -10 * CELL)) is atom
+    assert list(index.squares(CELL)) == [(10, -10)]
+    index.remove(atom)
+    assert not index._cells and not len(index)
+    # discarding an atom that is gone already is fine
+    index.discard(atom)
+
+
+def test_canvas_follows_moves(canvas):
+    atom = add_atom(canvas, 0.0)
+    atom.moveBy(500.0, 300.0)
+    assert canvas.atom_at(QPointF(ATOM_RADIUS, ATOM_RADIUS)) is None
+    assert canvas.atom_at(atom.center()) is atom
+
+
+def test_erased_atoms_leave_the_index(canvas):
+    atom = add_atom(canvas, 0.0)
+    center = atom.center()
+    canvas.history.perform(RemoveItems.of_atoms([atom]))
+    assert canvas.atom_at(center) is None
+    assert atom not in canvas.atom_index
+    canvas.history.undo()
+    assert canvas.atom_at(center) is atom
+    canvas.history.redo()
+    assert canvas.atom_at(center) is None
+
+
+def test_evicted_atoms_leave_the_index(canvas):
+    canvas.tiles.max_bytes = 0
+    atom = add_atom(canvas, 0.0)
+    center = atom.center()
+    canvas.materialize(QRectF(100000.0, 0.0, 1000.0, 1000.0))
+    assert canvas.atom_at(center) is None
+    assert not len(canvas.atom_index)
+    canvas.materialize()
+    restored = canvas.atom_at(center)
+    assert restored is not None
+    assert canvas.atom_index.nearest(center) is restored
+
+
+def test_cleared_canvas_has_no_atoms(canvas):
+    add_atom(canvas, 0.0)
+    canvas.clear()
+    assert not len(canvas.atom_index)
+    assert canvas.atom_at(QPointF(ATOM_RADIUS, ATOM_RADIUS)) is None
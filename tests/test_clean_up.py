@@ -0,0 +1,47 @@
+from rdkit import Chem
+
+from chi_editor.chemistry import clean_up_all
+from chi_editor.toolbar.tools import structure
+from chi_editor.toolbar.tools.structure import submit_clean_up
+from tests.conftest import molecules_of, put_smiles
+
+
+def fail(molecules: list) -> list:
+    raise RuntimeError("worker gave up")
+
+
+def test_clean_up_all_keeps_molecules_apart():
+    valid = Chem.MolFromSmiles("CCO")
+    invalid = Chem.MolFromSmiles("C(C)(C)(C)(C)C", sanitize=False)
+    results = clean_up_all([valid, invalid, "not a molecule"])
+    assert isinstance(results[0], Chem.Mol)
+    assert results[1] is None
+    assert isinstance(results[2], str)
+
+
+def clean_up(canvas, molecules) -> list:
+    reports = []
+    canvas.cleaned_up.connect(lambda *counts: reports.append(counts))
+    submit_clean_up(canvas, molecules)
+    canvas.chemistry.wait()
+    return reports
+
+
+def test_clean_up_replaces_molecules(canvas):
+    put_smiles(canvas, "CCO")
+    put_smiles(canvas, "c1ccccc1", x=1000.0)
+    assert clean_up(canvas, list(molecules_of(canvas))) == [(2, 0, 0)]
+    assert sorted(len(m.atoms) for m in molecules_of(canvas)) == [3, 6]
+    canvas.history.undo()
+    assert sorted(len(m.atoms) for m in molecules_of(canvas)) == [3, 6]
+
+
+def test_failed_task_is_an_error(canvas, monkeypatch):
+    atoms = put_smiles(canvas, "CCO")
+    molecule = atoms[0].molecule
+    monkeypatch.setattr(structure, "clean_up_all", fail)
+    assert clean_up(canvas, [molecule]) == [(0, 0, 1)]
+    # left as it was and not selected as an invalid one
+    assert molecules_of(canvas) == {molecule}
+    assert not canvas.selectedItems()
+    assert not canvas.history.can_undo
@@ -0,0 +1,84 @@
+import numpy as np
+
+from chi_editor.document import Document
+from chi_editor.history import RemoveItems
+from tests.conftest import put_smiles
+
+
+def test_rows_are_reused():
+    document = Document(capacity=4)
+    first = document.add_atom("C", 0, 0)
+    second = document.add_atom("O", 1, 0)
+    document.remove_atom(first)
+    third = document.add_atom("N", 2, 0)
+    assert third == first
+    assert document.element(third) == "N"
+    assert document.atom_count == 2
+    assert document.live_atoms().tolist() == [first, second]
+
+
+def test_removing_twice_frees_once():
+    document = Document()
+    atom = document.add_atom("C", 0, 0)
+    document.remove_atom(atom)
+    document.remove_atom(atom)
+    assert document.add_atom("C", 0, 0) == atom
+    assert document.add_atom("C", 0, 0) != atom
+
+
+def test_add_remove_cycles_stay_bounded():
+    document = Document(capacity=4)
+    for _ in range(1000):
+        atoms = [document.add_atom("C", float(i), 0.0) for i in range(10)]
+        bonds = [document.add_bond(a, b, 1) for a, b in zip(atoms, atoms[1:])]
+        for bond in bonds:
+            document.remove_bond(bond)
+        for atom in atoms:
+            document.remove_atom(atom)
+    assert document.atom_count == 10
+    assert document.bond_count == 9
+    assert len(document.elements) <= 16
+    assert len(document.live_atoms()) == 0
+
+
+def test_bonds_within_and_compact():
+    document = Document()
+    atoms = [document.add_atom("C", float(i), 0.0) for i in range(4)]
+    bonds = [document.add_bond(a, b, 1) for a, b in zip(atoms, atoms[1:])]
+    document.remove_bond(bonds[0])
+    document.remove_atom(atoms[0])
+    assert document.bonds_within(atoms[1:]).tolist() == bonds[1:]
+    assert document.bonds_within(atoms[2:3]).tolist() == []
+
+    atom_ids, bond_ids, pairs = document.compact()
+    assert atom_ids.tolist() == atoms[1:]
+    assert bond_ids.tolist() == bonds[1:]
+    assert pairs.tolist() == [[0, 1], [1, 2]]
+    assert document.centroid(atom_ids) == (2.0, 0.0)
+    assert document.bounds(atom_ids) == (1.0, 0.0, 3.0, 0.0)
+
+
+def test_translate_moves_items(canvas):
+    atoms = put_smiles(canvas, "CCO")
+    ids = [atom.atom_id for atom in atoms]
+    before = [atom.pos() for atom in atoms]
+    canvas.document.translate(ids, 10.0, -5.0)
+    for atom, position in zip(atoms, before):
+        assert atom.x() == position.x() + 10.0
+        assert atom.y() == position.y() - 5.0
+    assert np.allclose(
+        canvas.document.coordinates[ids], [[a.x(), a.y()] for a in atoms]
+    )
+
+
+def test_canvas_undo_cycles_stay_bounded(canvas):
+    atoms = put_smiles(canvas, "c1ccccc1CCO")
+    rows = canvas.document.atom_count, canvas.document.bond_count
+    canvas.history.perform(RemoveItems.of_atoms(atoms))
+    for _ in range(50):
+        canvas.history.undo()
+        canvas.history.redo()
+    canvas.history.undo()
+    assert (canvas.document.atom_count, canvas.document.bond_count) == rows
+    assert len(canvas.document.live_atoms()) == len(atoms)
+    assert len(canvas.document.live_bonds()) == 9
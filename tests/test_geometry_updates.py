@@ -0,0 +1,91 @@
+from PyQt6.QtGui import QTransform
+from PyQt6.QtTest import QTest
+
+from chi_editor.profiler import profiler
+from tests.conftest import add_atom, add_bond
+
+
+def chain(canvas, size: int) -> list:
+    atoms = [add_atom(canvas, 100.0 * index) for index in range(size)]
+    for start, end in zip(atoms, atoms[1:]):
+        add_bond(canvas, start, end)
+    canvas.geometry_updates.flush()
+    return atoms
+
+
+def test_moves_coalesce_within_a_frame(canvas):
+    atoms = chain(canvas, 3)
+    updates = canvas.geometry_updates
+    requested, performed = updates.requested, updates.performed
+    for _ in range(5):
+        for atom in atoms:
+            atom.moveBy(1.0, 2.0)
+    # every move asks for each bond of the atom: 1 + 2 + 1 per round
+    assert updates.requested - requested == 5 * 4
+    assert updates.pending == 3
+    updates.flush()
+    assert updates.performed - performed == 2
+    assert updates.stats()["pending"] == 0
+
+
+def test_bonds_follow_after_flush(canvas):
+    start, end = chain(canvas, 2)
+    (line,) = start.lines
+    end.moveBy(0.0, 100.0)
+    assert line.end_point() != end.center()
+    canvas.geometry_updates.flush()
+    assert line.start_point() == start.center()
+    assert line.end_point() == end.center()
+
+
+def test_only_geometry_changes_mark_atoms(canvas):
+    start, end = chain(canvas, 2)
+    updates = canvas.geometry_updates
+    start.setSelected(True)
+    start.setZValue(5)
+    start.update()
+    assert not updates.pending
+    start.setTransform(QTransform().rotate(10.0))
+    assert updates.pending == 1
+    updates.flush()
+    end.setPos(end.pos())
+    assert not updates.pending
+
+
+def test_atoms_without_bonds_are_not_scheduled(canvas):
+    atom = add_atom(canvas, 0.0)
+    updates = canvas.geometry_updates
+    requested = updates.requested
+    atom.moveBy(10.0, 10.0)
+    assert not updates.pending
+    assert updates.requested == requested
+
+
+def test_discard_forgets_dirty_atoms(canvas):
+    atoms = chain(canvas, 2)
+    updates = canvas.geometry_updates
+    performed = updates.performed
+    atoms[0].moveBy(5.0, 0.0)
+    updates.discard()
+    assert not updates.pending
+    updates.flush()
+    assert updates.performed == performed
+
+
+def test_profiler_records_timer_flushes(canvas):
+    start, end = add_atom(canvas, 0.0), add_atom(canvas, 100.0)
+    add_bond(canvas, start, end)
+    updates = canvas.geometry_updates
+    updates.flush()
+    profiler().enable()
+    try:
+        profiler().clear()
+        end.moveBy(10.0, 0.0)
+        assert updates.pending
+        QTest.qWait(100)
+        assert not updates.pending
+        names = [name for name, *_ in profiler().events]
+    finally:
+        profiler().disable()
+        profiler().clear()
+    assert "GeometryUpdates.flush" in names
@@ -0,0 +1,131 @@
+import pytest
+from PyQt6.QtCore import QPointF
+
+from chi_editor.bases.placeholder import Placeholder
+from chi_editor.history import (
+    AddItems,
+    Batch,
+    Command,
+    History,
+    MoveAtoms,
+    RemoveItems,
+)
+from chi_editor.toolbar.tools.eraser import Eraser
+from chi_editor.toolbar.tools.text import TextItem
+from tests.conftest import add_atom, add_bond, lines_of, molecules_of, put_smiles
+
+
+def state(canvas) -> tuple:
+    """Atom and line counts and sorted molecule sizes, checked for consistency."""
+    molecules = molecules_of(canvas)
+    for molecule in molecules:
+        assert molecule.rwmol.GetNumAtoms() == len(molecule.atoms)
+        assert molecule.anchor.scene() is canvas
+    atoms = sum(len(molecule.atoms) for molecule in molecules)
+    sizes = sorted(len(molecule.atoms) for molecule in molecules)
+    return atoms, len(lines_of(canvas)), sizes
+
+
+def test_command_is_abstract():
+    with pytest.raises(TypeError):
+        Command()
+
+
+def test_add_items(canvas):
+    atoms = put_smiles(canvas, "CCO")
+    canvas.history.push(AddItems.of_atoms(atoms))
+    canvas.history.undo()
+    assert state(canvas) == (0, 0, [])
+    canvas.history.redo()
+    assert state(canvas) == (3, 2, [3])
+
+
+def test_remove_items_splits_and_restores(canvas):
+    atoms = put_smiles(canvas, "CCC")
+    canvas.history.perform(RemoveItems.of_atoms([atoms[1]]))
+    assert state(canvas) == (2, 0, [1, 1])
+    canvas.history.undo()
+    assert state(canvas) == (3, 2, [3])
+    canvas.history.redo()
+    assert state(canvas) == (2, 0, [1, 1])
+
+
+def test_added_bond(canvas):
+    first, second = add_atom(canvas, 0), add_atom(canvas, 100)
+    line = add_bond(canvas, first, second)
+    canvas.history.push(AddItems(lines=[line]))
+    canvas.history.undo()
+    assert state(canvas) == (2, 0, [1, 1])
+    canvas.history.redo()
+    assert state(canvas) == (2, 1, [2])
+
+
+def test_move_atoms_merge_by_key(canvas):
+    atoms = [add_atom(canvas, 0), add_atom(canvas, 100)]
+    add_bond(canvas, *atoms)
+    start = [atom.pos() for atom in atoms]
+    for _ in range(3):
+        for atom in atoms:
+            atom.moveBy(10, 5)
+        canvas.history.push(MoveAtoms(atoms, 10, 5), key="drag")
+    canvas.history.undo()
+    assert [atom.pos() for atom in atoms] == start
+    assert not canvas.history.can_undo
+    canvas.history.redo()
+    assert atoms[0].pos() == start[0] + QPointF(30, 15)
+
+
+def test_batch_undoes_in_reverse(canvas):
+    atoms = put_smiles(canvas, "CCO")
+    canvas.history.push(AddItems.of_atoms(atoms))
+    # removing then moving the rest must be undone move first
+    batch = Batch(RemoveItems.of_atoms([atoms[2]]), MoveAtoms(atoms[:2], 50, 0))
+    canvas.history.perform(batch)
+    assert state(canvas) == (2, 1, [2])
+    canvas.history.undo()
+    assert state(canvas) == (3, 2, [3])
+    canvas.history.undo()
+    assert state(canvas) == (0, 0, [])
+    canvas.history.redo()
+    canvas.history.redo()
+    assert state(canvas) == (2, 1, [2])
+
+
+def test_history_is_bounded(canvas):
+    history = History(canvas, max_bytes=1000)
+    for index in range(20):
+        history.push(AddItems(atoms=put_smiles(canvas, "C", x=100.0 * index)))
+    assert history.nbytes <= 1000
+    assert history.can_undo
+
+
+def test_erasing_text_can_be_undone(canvas):
+    text = TextItem()
+    text.setPlainText("note")
+    canvas.addItem(text)
+    eraser = Eraser(canvas)
+    eraser.erase(text)
+    assert text.scene() is None
+    canvas.history.undo()
+    assert text.scene() is canvas
+
+
+def test_erasing_anchor_erases_molecule(canvas):
+    atoms = put_smiles(canvas, "CC.O")
+    Eraser(canvas).erase(atoms[0].molecule.anchor)
+    assert state(canvas) == (1, 0, [1])
+    canvas.history.undo()
+    assert state(canvas) == (3, 1, [1, 2])
+
+
+def test_erase_all_drops_placeholders(canvas):
+    put_smiles(canvas, "CCO")
+    placeholder = Placeholder(QPointF(0, 0))
+    canvas.addItem(placeholder)
+    Eraser(canvas).erase_all()
+    assert state(canvas) == (0, 0, [])
+    # the result it waited for is dropped when it comes back
+    assert not placeholder.remove()
+    canvas.history.undo()
+    assert state(canvas) == (3, 2, [3])
+    assert placeholder.scene() is None
@@ -0,0 +1,43 @@
+import numpy as np
+from rdkit import Chem
+
+from chi_editor import layout_cache as cache_module
+from chi_editor.chemistry import ChemistryExecutor, from_smiles
+from chi_editor.layout_cache import LayoutCache, compute_2d_coords, layout_cache
+
+
+def test_lru_is_bounded():
+    cache = LayoutCache(max_bytes=3 * 8 * 2)
+    for index in range(5):
+        cache.put(str(index), np.zeros((2, 2)))
+    assert cache.get("0") is None
+    assert cache.get("4") is not None
+    assert cache.stats()["layouts"] == 3
+
+
+def test_hit_reuses_layout_in_atom_order():
+    cache_module.configure()
+    first = Chem.MolFromSmiles("OCC")
+    assert not compute_2d_coords(first)
+    # the same molecule with its atoms in another order
+    second = Chem.MolFromSmiles("CCO")
+    assert compute_2d_coords(second)
+    points = second.GetConformer().GetPositions()
+    assert np.allclose(points[2], first.GetConformer().GetPositions()[0])
+
+
+def test_worker_lookups_are_counted(application):
+    cache_module.configure()
+    executor = ChemistryExecutor(max_workers=1)
+    results = []
+    try:
+        for _ in range(2):
+            executor.submit(from_smiles, "c1ccccc1O", callback=results.append)
+            executor.wait()
+    finally:
+        executor.shutdown()
+    assert all(result is not None for result in results)
+    stats = layout_cache().stats()
+    assert stats["worker_misses"] == 1
+    assert stats["worker_hits"] == 1
+    assert stats["hits"] >= stats["worker_hits"]
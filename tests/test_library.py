@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+from rdkit import Chem, DataStructs
+from rdkit.Chem import rdFingerprintGenerator
+
+from chi_editor import library
+from chi_editor.library import Library, build_library, count_bits, fingerprint
+
+SMILES = ["CCO", "CCCO", "c1ccccc1", "c1ccccc1O", "CC(=O)O", "CCN", "C1CCCCC1"]
+
+
+@pytest.fixture
+def built(tmp_path) -> Library:
+    source = tmp_path / "structures.smi"
+    source.write_text("\n".join([*SMILES, "not a molecule"]) + "\n")
+    stats = build_library(source, tmp_path / "structures.chil")
+    assert (stats["stored"], stats["skipped"]) == (len(SMILES), 1)
+    opened = Library(tmp_path / "structures.chil")
+    yield opened
+    opened.close()
+
+
+def expected(query: str) -> list[float]:
+    """Similarities to the query computed by RDKit, in the library's order."""
+    generator = rdFingerprintGenerator.GetMorganGenerator(
+        radius=library.FINGERPRINT_RADIUS, fpSize=library.FINGERPRINT_BITS
+    )
+    probe = generator.GetFingerprint(Chem.MolFromSmiles(query))
+    return [
+        DataStructs.TanimotoSimilarity(
+            probe, generator.GetFingerprint(Chem.MolFromSmiles(smiles))
+        )
+        for smiles in SMILES
+    ]
+
+
+def test_count_bits():
+    words = np.array([[0, 1], [2**64 - 1, 3]], dtype="<u8")
+    assert count_bits(words).tolist() == [1, 66]
+
+
+@pytest.mark.parametrize("query", ["CCO", "c1ccccc1C"])
+def test_search_ranks_like_rdkit(built, query):
+    hits = built.search(fingerprint(Chem.MolFromSmiles(query)), k=3)
+    scores = expected(query)
+    best = sorted(range(len(SMILES)), key=lambda index: -scores[index])[:3]
+    assert [index for index, _ in hits] == best
+    assert [score for _, score in hits] == pytest.approx(
+        [scores[index] for index in best]
+    )
+
+
+def test_search_finds_the_query_itself(built):
+    index, score = built.search(fingerprint(Chem.MolFromSmiles("OCC")), k=1)[0]
+    assert built.smiles(index) == "CCO"
+    assert score == pytest.approx(1.0)
+
+
+def test_search_across_blocks(built, monkeypatch):
+    monkeypatch.setattr(library, "BLOCK_ROWS", 2)
+    hits = built.search(fingerprint(Chem.MolFromSmiles("CCO")), k=100)
+    assert len(hits) == len(SMILES)
+    assert [score for _, score in hits] == sorted(expected("CCO"), reverse=True)
+
+
+def test_empty_library(tmp_path):
+    source = tmp_path / "empty.smi"
+    source.write_text("")
+    build_library(source, tmp_path / "empty.chil")
+    empty = Library(tmp_path / "empty.chil")
+    assert len(empty) == 0
+    assert empty.search(fingerprint(Chem.MolFromSmiles("CCO"))) == []
+    empty.close()
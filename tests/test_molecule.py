@@ -0,0 +1,151 @@
+from rdkit import Chem
+
+from chi_editor.bases.molecule.molecule import find_detached_component
+from chi_editor.chem_bonds.wedge_bond import WedgeBond
+from tests.conftest import add_atom, add_bond, molecules_of, put_smiles
+
+
+def assert_mirrored(molecule) -> None:
+    """Checks every atom and bond of the molecule against its RDKit copy."""
+    rwmol, indices = molecule.rwmol, molecule.atom_indices
+    assert rwmol.GetNumAtoms() == len(molecule.atoms)
+    assert len(molecule.indexed_atoms) == len(molecule.atoms)
+    assert set(indices) == set(molecule.atoms)
+    bonds = sum(len(atom.lines) for atom in molecule.atoms) // 2
+    assert rwmol.GetNumBonds() == bonds
+    for atom in molecule.atoms:
+        assert atom.molecule is molecule
+        index = indices[atom]
+        assert molecule.indexed_atoms[index] is atom
+        rdkit_atom = rwmol.GetAtomWithIdx(index)
+        assert rdkit_atom.GetSymbol() == atom.text
+        assert {neighbor.GetIdx() for neighbor in rdkit_atom.GetNeighbors()} == {
+            indices[adjacent] for adjacent in atom.get_adjacent_atoms()
+        }
+        for line in atom.lines:
+            begin, end = indices[line.vertex1], indices[line.vertex2]
+            bond = rwmol.GetBondBetweenAtoms(begin, end)
+            assert bond.GetBondTypeAsDouble() == line.multiplicity
+            if line.wedge:
+                assert bond.GetBondDir() == Chem.BondDir.BEGINWEDGE
+                assert bond.GetBeginAtomIdx() == begin
+            else:
+                assert bond.GetBondDir() == Chem.BondDir.NONE
+
+
+def test_bond_merges_molecules(canvas):
+    first, second = add_atom(canvas, 0), add_atom(canvas, 100)
+    assert first.molecule is not second.molecule
+    add_bond(canvas, first, second)
+    assert first.molecule is second.molecule
+    assert len(first.molecule.atoms) == 2
+    assert_mirrored(first.molecule)
+    assert molecules_of(canvas) == {first.molecule}
+
+
+def test_merge_keeps_bigger_molecule(canvas):
+    chain = put_smiles(canvas, "NCO")
+    big = chain[0].molecule
+    single = add_atom(canvas, 1000)
+    add_bond(canvas, single, chain[-1])
+    assert single.molecule is big
+    assert len(big.atoms) == 4
+    assert_mirrored(big)
+
+
+def test_removing_bridge_splits(canvas):
+    atoms = put_smiles(canvas, "OCNS")
+    bridge = next(
+        line for line in atoms[1].lines if atoms[2] in (line.vertex1, line.vertex2)
+    )
+    bridge.remove()
+    assert atoms[0].molecule is atoms[1].molecule
+    assert atoms[2].molecule is atoms[3].molecule
+    assert atoms[0].molecule is not atoms[2].molecule
+    for molecule in molecules_of(canvas):
+        assert len(molecule.atoms) == 2
+        assert_mirrored(molecule)
+
+
+def test_removing_ring_bond_keeps_molecule(canvas):
+    atoms = put_smiles(canvas, "C1CCNCO1")
+    molecule = atoms[0].molecule
+    atoms[0].lines[0].remove()
+    assert molecules_of(canvas) == {molecule}
+    assert len(molecule.atoms) == 6
+    assert_mirrored(molecule)
+
+
+def test_removing_atom_splits(canvas):
+    atoms = put_smiles(canvas, "OCNC(=O)S")
+    atoms[1].remove()
+    sizes = sorted(len(molecule.atoms) for molecule in molecules_of(canvas))
+    assert sizes == [1, 4]
+    for molecule in molecules_of(canvas):
+        assert_mirrored(molecule)
+
+
+def test_removing_atom_renumbers(canvas):
+    atoms = put_smiles(canvas, "C1CCNCO1")
+    molecule = atoms[0].molecule
+    # a ring atom goes, the ring opens into a chain numbered from zero again
+    atoms[2].remove()
+    assert molecules_of(canvas) == {molecule}
+    assert sorted(molecule.atom_indices.values()) == list(range(5))
+    assert_mirrored(molecule)
+
+
+def test_merge_appends_smaller_molecule(canvas):
+    big = put_smiles(canvas, "OCCN")
+    small = put_smiles(canvas, "SCl", x=1000.0)
+    add_bond(canvas, big[-1], small[0])
+    molecule = big[0].molecule
+    assert molecule.indexed_atoms[4:] == small
+    assert_mirrored(molecule)
+
+
+def test_wedge_bonds_are_mirrored(canvas):
+    atoms = put_smiles(canvas, "CC(O)N")
+    extra = add_atom(canvas, 1000.0)
+    wedge = add_bond(canvas, atoms[0], extra, WedgeBond)
+    molecule = atoms[0].molecule
+    assert_mirrored(molecule)
+    # the wedge is added again when its smaller component is split off
+    bridge = next(
+        line for line in atoms[1].lines if atoms[0] in (line.vertex1, line.vertex2)
+    )
+    bridge.remove()
+    assert extra.molecule is not molecule
+    assert set(extra.molecule.atoms) == {atoms[0], extra}
+    assert wedge in atoms[0].lines
+    for molecule in molecules_of(canvas):
+        assert_mirrored(molecule)
+
+
+def test_ring_closure_changes_revision(canvas):
+    atoms = put_smiles(canvas, "CCCCCC")
+    molecule = atoms[0].molecule
+    copy, _ = molecule.search_copy()
+    assert copy.GetRingInfo().NumRings() == 0
+    revision = molecule.revision
+    add_bond(canvas, atoms[0], atoms[-1])
+    assert atoms[0].molecule is molecule
+    assert molecule.revision > revision
+    # so the search copy made before the ring was closed is made again
+    copy, _ = molecule.search_copy()
+    assert copy.GetRingInfo().NumRings() == 1
+    assert_mirrored(molecule)
+
+
+def test_find_detached_component(canvas):
+    atoms = put_smiles(canvas, "CCCCC")
+    # detach the last atom from its neighbour as Line.remove does
+    line = next(
+        line for line in atoms[4].lines if atoms[3] in (line.vertex1, line.vertex2)
+    )
+    atoms[3].lines.remove(line)
+    atoms[4].lines.remove(line)
+    assert find_detached_component(atoms[3], atoms[4]) == {atoms[4]}
+    assert find_detached_component(atoms[4], atoms[3]) == {atoms[4]}
+    assert find_detached_component(atoms[0], atoms[3]) is None
+    assert find_detached_component(atoms[0], atoms[0]) is None
@@ -0,0 +1,59 @@
+import pytest
+
+from chi_editor.bases.alpha_atom import AlphaAtom
+from chi_editor.bases.line import Line
+from chi_editor.search import parse_query
+from tests.conftest import put_smiles
+
+
+def highlighted(canvas) -> tuple[int, int]:
+    items = [item for item in canvas.items() if getattr(item, "highlighted", False)]
+    return (
+        sum(isinstance(item, AlphaAtom) for item in items),
+        sum(isinstance(item, Line) for item in items),
+    )
+
+
+@pytest.fixture
+def molecules(canvas) -> dict:
+    return {
+        smiles: put_smiles(canvas, smiles, x=1000.0 * index)[0].molecule
+        for index, smiles in enumerate(["CCO", "c1ccccc1", "c1ccncc1"])
+    }
+
+
+def test_run_highlights_matches(canvas, molecules):
+    search = canvas.search
+    assert search.run("c1ccccc1") == [molecules["c1ccccc1"]]
+    assert (search.screened, search.matched) == (3, 1)
+    assert highlighted(canvas) == (6, 6)
+
+
+def test_fingerprints_rule_out_molecules(canvas, molecules):
+    search = canvas.search
+    assert search.run("CO") == [molecules["CCO"]]
+    # neither ring has an oxygen to set the query bits
+    assert search.rejected == 2
+
+
+def test_smarts_query(canvas, molecules):
+    assert canvas.search.run("[#7]") == [molecules["c1ccncc1"]]
+    assert highlighted(canvas) == (1, 0)
+
+
+def test_new_search_clears_the_last_one(canvas, molecules):
+    search = canvas.search
+    search.run("c1ccccc1")
+    assert search.run("[#8]") == [molecules["CCO"]]
+    assert highlighted(canvas) == (1, 0)
+    search.clear()
+    assert highlighted(canvas) == (0, 0)
+    assert (search.screened, search.rejected, search.matched) == (0, 0, 0)
+
+
+@pytest.mark.parametrize("text", ["", "   ", "C1CC(", "[Xx"])
+def test_bad_query(canvas, text):
+    with pytest.raises(ValueError):
+        parse_query(text)
+    with pytest.raises(ValueError):
+        canvas.search.run(text)
@@ -0,0 +1,83 @@
+import pytest
+from PyQt6.QtCore import QRectF
+
+from chi_editor.bases.alpha_atom import AlphaAtom
+from chi_editor.canvas import Canvas
+from chi_editor.chem_bonds import WedgeBond
+from chi_editor.storage import DocumentFile, save_canvas
+from chi_editor.toolbar.tools.text import TextItem
+from tests.conftest import add_bond, lines_of, put_smiles
+
+
+def summary(canvas: Canvas) -> tuple:
+    """Element, position and bond counts of every molecule, and the texts."""
+    molecules = []
+    for molecule in {
+        item.molecule for item in canvas.items() if isinstance(item, AlphaAtom)
+    }:
+        atoms = sorted((atom.text, atom.x(), atom.y()) for atom in molecule.atoms)
+        lines = {line for atom in molecule.atoms for line in atom.lines}
+        bonds = sorted(
+            (type(line).__name__, line.multiplicity) for line in lines
+        )
+        molecules.append((atoms, bonds))
+    texts = sorted(
+        (item.toPlainText(), item.x(), item.y())
+        for item in canvas.items()
+        if isinstance(item, TextItem)
+    )
+    return sorted(molecules), texts
+
+
+@pytest.fixture
+def saved(canvas, tmp_path):
+    put_smiles(canvas, "C1=CC=CC=C1C#N")
+    put_smiles(canvas, "CC.O", x=2000.0)
+    first, second = put_smiles(canvas, "C.Cl", x=4000.0)
+    add_bond(canvas, first, second, WedgeBond)
+    text = TextItem()
+    text.setPlainText("héllo")
+    text.setPos(10.0, 20.0)
+    canvas.addItem(text)
+    path = tmp_path / "document.chi"
+    save_canvas(canvas, path)
+    return canvas, path
+
+
+def test_round_trip(saved, application):
+    canvas, path = saved
+    document_file = DocumentFile(path)
+    restored = Canvas()
+    try:
+        assert document_file.molecule_count == 4
+        document_file.materialize(restored)
+        wedges = [line for line in lines_of(restored) if line.wedge]
+        assert document_file.is_complete
+        assert summary(restored) == summary(canvas)
+        assert len(lines_of(restored)) == len(lines_of(canvas))
+        assert len(wedges) == 1
+    finally:
+        restored.clear()
+        document_file.close()
+
+
+def test_materialize_region(saved, application):
+    canvas, path = saved
+    document_file = DocumentFile(path)
+    restored = Canvas()
+    try:
+        created = document_file.materialize(restored, QRectF(-500, -500, 1000, 1000))
+        assert created == 1
+        assert not document_file.is_complete
+        document_file.materialize(restored)
+        assert summary(restored) == summary(canvas)
+    finally:
+        restored.clear()
+        document_file.close()
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "other.chi"
+    path.write_bytes(b"not a document at all")
+    with pytest.raises(ValueError, match="not a Chi document"):
+        DocumentFile(path)
@@ -0,0 +1,19 @@
+from tests.conftest import molecules_of, put_smiles
+
+
+def test_fragments_become_molecules(canvas):
+    atoms = put_smiles(canvas, "CC.O")
+    molecules = molecules_of(canvas)
+    assert len(molecules) == 2
+    assert atoms[0].molecule is atoms[1].molecule
+    assert atoms[2].molecule is not atoms[0].molecule
+    assert sorted(molecule.rwmol.GetNumAtoms() for molecule in molecules) == [1, 2]
+    for molecule in molecules:
+        assert molecule.anchor.scene() is canvas
+
+
+def test_single_fragment_is_one_molecule(canvas):
+    put_smiles(canvas, "c1ccccc1O")
+    (molecule,) = molecules_of(canvas)
+    assert len(molecule.atoms) == 7
+    assert molecule.rwmol.GetNumBonds() == 7
@@ -0,0 +1,72 @@
+import gc
+import weakref
+
+from PyQt6.QtCore import QRectF
+
+from chi_editor.history import AddItems
+from tests.conftest import molecules_of, put_smiles
+
+FAR = QRectF(100000.0, 0.0, 1000.0, 1000.0)
+HOME = QRectF(0.0, 0.0, 1000.0, 1000.0)
+
+
+def import_row(canvas, count: int) -> list:
+    """Puts molecules in a row the way an import does."""
+    atoms = []
+    for index in range(count):
+        placed = put_smiles(canvas, "CCO", x=3000.0 * index)
+        canvas.history.push(AddItems.of_atoms(placed), key="import")
+        atoms.extend(placed)
+    return atoms
+
+
+def test_evicted_items_are_freed(canvas):
+    canvas.tiles.max_bytes = 0
+    references = [weakref.ref(atom) for atom in import_row(canvas, 5)]
+    canvas.materialize(FAR)
+    gc.collect()
+    assert len(canvas.tiles) == 5
+    assert all(reference() is None for reference in references)
+
+
+def test_undo_puts_evicted_molecules_back(canvas):
+    canvas.tiles.max_bytes = 0
+    import_row(canvas, 5)
+    canvas.materialize(FAR)
+    gc.collect()
+    canvas.history.undo()
+    assert not molecules_of(canvas)
+    canvas.history.redo()
+    assert len(molecules_of(canvas)) == 5
+
+
+def test_eviction_cycles_reuse_rows(canvas):
+    canvas.tiles.max_bytes = 0
+    import_row(canvas, 5)
+    rows = canvas.document.atom_count
+    for _ in range(4):
+        canvas.materialize(FAR)
+        canvas.materialize(HOME)
+    canvas.materialize()
+    assert canvas.document.atom_count == rows
+    assert len(molecules_of(canvas)) == 5
+
+
+def test_scrolling_swaps_only_evicted_items(canvas):
+    canvas.tiles.max_bytes = 0
+    put_smiles(canvas, "CN", x=-3000.0)
+    canvas.history.push(AddItems.of_atoms(molecules_of(canvas).pop().atoms))
+    import_row(canvas, 40)
+    for _ in range(2):
+        for index in [*range(40), *reversed(range(40))]:
+            canvas.materialize(QRectF(3000.0 * index, 0.0, 1000.0, 1000.0))
+    # every indexed place still holds the item it is indexed under
+    places = canvas.history._places
+    assert places
+    for item, held in places.items():
+        assert all(items[index] is item for items, index in held)
+    canvas.history.undo()
+    canvas.materialize()
+    assert len(molecules_of(canvas)) == 1
+    canvas.history.redo()
+    assert len(molecules_of(canvas)) == 41
@@ -0,0 +1,82 @@
+import pytest
+from PyQt6.QtCore import QEvent, QPointF, Qt
+from PyQt6.QtWidgets import QGraphicsItem
+
+from chi_editor.history import Batch, MoveAtoms
+from chi_editor.toolbar.tools.arrow import Arrow
+from chi_editor.toolbar.tools.bonds.create_single_bond import CreateSingleBond
+from tests.benchmark import center_of
+from tests.conftest import add_atom, lines_of, put_smiles
+
+
+def xy(point: QPointF) -> tuple[float, float]:
+    return point.x(), point.y()
+
+
+def test_hover_leaves_committed_bond(session):
+    canvas = session.canvas
+    start, end = add_atom(canvas, 0.0), add_atom(canvas, 100.0)
+    tool = session.use(CreateSingleBond)
+    session.drag(center_of(start), center_of(end), steps=4)
+    (bond,) = lines_of(canvas)
+    assert tool.bond is None and tool.startItem is None
+    bounds = bond.sceneBoundingRect()
+
+    # the view tracks the mouse while the library panel is shown
+    session.view.viewport().setMouseTracking(True)
+    no = Qt.MouseButton.NoButton
+    session.send(QEvent.Type.MouseMove, QPointF(500.0, 400.0), no, no)
+    canvas.geometry_updates.flush()
+    assert bond.sceneBoundingRect() == bounds
+    assert canvas.history.can_undo
+
+
+def test_bond_dropped_on_empty_space_is_forgotten(session):
+    canvas = session.canvas
+    start = add_atom(canvas, 0.0)
+    tool = session.use(CreateSingleBond)
+    session.drag(center_of(start), QPointF(300.0, 300.0), steps=4)
+    assert not lines_of(canvas)
+    assert tool.bond is None and tool.startItem is None
+    assert not canvas.history.can_undo
+
+
+def test_dragging_a_molecule_moves_it_as_a_whole(session):
+    canvas = session.canvas
+    atoms = put_smiles(canvas, "CC(=O)O")
+    molecule = atoms[0].molecule
+    before = {atom: atom.scenePos() for atom in atoms}
+    anchor_before = molecule.anchor.scenePos()
+    session.use(Arrow)
+    start = center_of(molecule.anchor)
+    session.drag(start, start + QPointF(240.0, 160.0), steps=10)
+    offset = molecule.anchor.scenePos() - anchor_before
+    assert not offset.isNull()
+
+    flag = QGraphicsItem.GraphicsItemFlag.ItemSendsScenePositionChanges
+    document = canvas.document
+    for atom in atoms:
+        assert atom.parentItem() is None
+        assert atom.flags() & flag
+        assert xy(atom.scenePos()) == pytest.approx(xy(before[atom] + offset))
+        assert canvas.atom_at(atom.center()) is atom
+        assert document.coordinates[atom.atom_id].tolist() == [atom.x(), atom.y()]
+    for line in lines_of(canvas):
+        assert line.parentItem() is None
+        assert line.start_point() == line.vertex1.center()
+        assert line.end_point() == line.vertex2.center()
+
+    # the whole drag is one step of the history, with a single move
+    (entry,) = canvas.history._undo
+    command, _ = entry
+    assert isinstance(command, Batch)
+    (move,) = command.commands
+    assert isinstance(move, MoveAtoms)
+    assert set(move.atoms) == set(atoms)
+    assert (move.dx, move.dy) == pytest.approx((offset.x(), offset.y()))
+
+    canvas.history.undo()
+    canvas.geometry_updates.flush()
+    for atom in atoms:
+        assert xy(atom.scenePos()) == pytest.approx(xy(before[atom]))
+    assert xy(molecule.anchor.scenePos()) == pytest.approx(xy(anchor_before))
@@ -0,0 +1,80 @@
+from chi_editor.history import AddItems, RemoveItems
+from chi_editor.toolbar.tools.structure import submit_clean_up
+from tests.conftest import add_atom, add_bond
+
+
+def star(canvas, arms: int) -> tuple:
+    """A carbon bonded to the given number of carbons around it."""
+    center = add_atom(canvas, 0.0)
+    arms = [add_atom(canvas, 0.0, 100.0 * (index + 1)) for index in range(arms)]
+    lines = [add_bond(canvas, center, arm) for arm in arms]
+    return center, arms, lines
+
+
+def test_over_bonded_atom_is_flagged(canvas):
+    center, _, _ = star(canvas, 5)
+    valence = canvas.valence
+    assert not valence.is_valid()
+    assert valence.invalid_atoms() == {center}
+    assert valence.invalid_molecules() == {center.molecule}
+    assert center.valence_error
+
+
+def test_four_bonds_are_valid(canvas):
+    center, _, _ = star(canvas, 4)
+    assert canvas.valence.is_valid()
+    assert not canvas.valence.invalid_molecules()
+    assert not center.valence_error
+
+
+def test_erasing_a_neighbour_clears_the_flag(canvas):
+    center, arms, _ = star(canvas, 5)
+    assert not canvas.valence.is_valid()
+    canvas.history.perform(RemoveItems.of_atoms([arms[0]]))
+    assert canvas.valence.is_valid()
+    assert not center.valence_error
+
+
+def test_undoing_a_bond_clears_the_flag(canvas):
+    center, arms, _ = star(canvas, 4)
+    extra = add_atom(canvas, 300.0)
+    canvas.history.push(AddItems(lines=[add_bond(canvas, center, extra)]))
+    assert canvas.valence.invalid_atoms() == {center}
+    canvas.history.undo()
+    assert canvas.valence.is_valid()
+    assert not center.valence_error
+    canvas.history.redo()
+    assert canvas.valence.invalid_atoms() == {center}
+
+
+def test_erased_invalid_atom_is_forgotten(canvas):
+    center, _, _ = star(canvas, 5)
+    assert not canvas.valence.is_valid()
+    canvas.history.perform(RemoveItems.of_atoms([center]))
+    assert canvas.valence.is_valid()
+
+
+def test_checks_only_touched_atoms(canvas):
+    atoms = [add_atom(canvas, 100.0 * index) for index in range(50)]
+    for start, end in zip(atoms, atoms[1:]):
+        add_bond(canvas, start, end)
+    valence = canvas.valence
+    valence.flush()
+    checked = valence.checked
+    add_bond(canvas, atoms[0], atoms[-1])
+    valence.flush()
+    assert valence.checked - checked == 2
+    # moves don't change bonds, nothing is checked again
+    atoms[10].moveBy(5.0, 5.0)
+    valence.flush()
+    assert valence.checked - checked == 2
+
+
+def test_clean_up_rejects_invalid_molecules_without_workers(canvas):
+    center, _, _ = star(canvas, 5)
+    reports = []
+    canvas.cleaned_up.connect(lambda *counts: reports.append(counts))
+    submit_clean_up(canvas, [center.molecule])
+    assert reports == [(0, 1, 0)]
+    assert canvas._chemistry is None
+    assert all(atom.isSelected() for atom in center.molecule.atoms)